@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes da paginação por chave (iter_records/iter_pages/_keyset_params) e da
+carga em lote com tabelas filhas (iter_doctype_data_bulk/get_doctype_data_bulk)
+do módulo api_client_data.py, com um cliente falso em memória.
+"""
+
+import io
+import json
+import os
+import sys
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+
+from api_client_data import (
+    _keyset_params, get_doctype_data_bulk, iter_doctype_data_bulk, iter_keys, iter_pages, iter_records
+)
+
+def _matches(row, filters):
+    for field, operator, value in filters:
+        if operator == ">" and not row.get(field, "") > value:
+            return False
+        if operator == "=" and row.get(field) != value:
+            return False
+        if operator == "in" and row.get(field) not in value:
+            return False
+    return True
+
+class FakeClient:
+    """Lista registros em memória seguindo os parâmetros da listagem do Frappe."""
+
+    def __init__(self, tables, before_page=None, fail_doctype=None):
+        self.tables = tables
+        self.before_page = before_page # Chamado antes de cada página (simula escritas concorrentes)
+        self.fail_doctype = fail_doctype
+        self.requests = []
+
+    def get(self, doctype, params=None, stream=False):
+        self.requests.append((doctype, params))
+        if self.before_page:
+            self.before_page(doctype, params)
+        response = requests.Response()
+        response.status_code = 500 if doctype == self.fail_doctype else 200
+        rows = [row for row in self.tables.get(doctype, []) if _matches(row, json.loads(params["filters"]))]
+        rows.sort(key=lambda row: row["name"])
+        fields = json.loads(params["fields"])
+        if "*" not in fields:
+            rows = [{field: row.get(field) for field in fields} for row in rows]
+        body = json.dumps({"data": [dict(row) for row in rows[:params["limit_page_length"]]]})
+        response.raw = io.BytesIO(body.encode("utf-8"))
+        return response
+
+def _names(count, prefix="DOC"):
+    return [{"name": f"{prefix}-{i:03d}"} for i in range(count)]
+
+def test_keyset_params():
+    params = _keyset_params(["descricao"], [["status", "=", "Ativo"]], 50, "Contract", "DOC-009")
+    assert json.loads(params["fields"]) == ["descricao", "name"] # 'name' é incluído para avançar o cursor
+    assert json.loads(params["filters"]) == [["status", "=", "Ativo"], ["name", ">", "DOC-009"]]
+    assert params["order_by"] == "name asc" and params["limit_page_length"] == 50
+    assert params["parent"] == "Contract"
+
+    first = _keyset_params(None, None, 10, None, None)
+    assert json.loads(first["fields"]) == ["name"] and json.loads(first["filters"]) == []
+    assert "parent" not in first
+    assert json.loads(_keyset_params(["*"], None, 10, None, None)["fields"]) == ["*"]
+
+def test_limites_de_pagina():
+    """Tabela com múltiplo exato do tamanho da página: uma requisição a mais, vazia, e nenhuma página vazia."""
+    client = FakeClient({"Asset": _names(6)})
+    pages = list(iter_pages(client, "Asset", page_size=3))
+    assert [[row["name"] for row in page] for page in pages] == [
+        ["DOC-000", "DOC-001", "DOC-002"], ["DOC-003", "DOC-004", "DOC-005"]]
+    assert len(client.requests) == 3
+    assert json.loads(client.requests[2][1]["filters"]) == [["name", ">", "DOC-005"]]
+
+    client = FakeClient({"Asset": _names(7)})
+    assert len(list(iter_records(client, "Asset", page_size=3))) == 7
+    assert len(client.requests) == 3 # A última página incompleta encerra a listagem
+
+    client = FakeClient({"Asset": []})
+    assert list(iter_pages(client, "Asset", page_size=3)) == []
+    assert list(iter_keys(client, "Asset", page_size=3)) == []
+
+def test_sem_repeticoes_com_insercoes_entre_paginas():
+    """Registros inseridos antes do cursor durante a listagem não deslocam as páginas (como no offset)."""
+    rows = _names(6)
+
+    def insert_before_cursor(doctype, params):
+        if json.loads(params["filters"]):
+            rows.insert(0, {"name": f"AAA-{len(rows):03d}"})
+
+    client = FakeClient({"Asset": rows}, before_page=insert_before_cursor)
+    names = list(iter_keys(client, "Asset", page_size=2))
+    assert names == [f"DOC-{i:03d}" for i in range(6)]
+    assert len(names) == len(set(names))
+
+def _bulk_tables(parents=5, rows_per_parent=3):
+    contracts = _names(parents, "CT")
+    items = []
+    for contract in contracts:
+        # idx fora de ordem e nomes que intercalam pais diferentes nas páginas da tabela filha
+        for idx in reversed(range(1, rows_per_parent + 1)):
+            items.append({"name": f"IT-{idx}-{contract['name']}", "parent": contract["name"], "idx": idx,
+                          "parenttype": "Contract", "parentfield": "items", "owner": "admin",
+                          "_user_tags": None, "valor": idx * 10})
+    # Linha de outra tabela do mesmo DocType filho: não pertence a 'items'
+    items.append({"name": "IT-X", "parent": "CT-000", "idx": 1, "parenttype": "Contract",
+                  "parentfield": "outros_itens"})
+    return {"Contract": contracts, "Contract Item": items}
+
+def test_filhos_divididos_em_chunks_de_parent_in():
+    tables = _bulk_tables()
+    client = FakeClient(tables)
+    documents = list(iter_doctype_data_bulk(client, "Contract", [("items", "Contract Item")],
+                                            page_size=4, child_chunk_size=2))
+    assert [doc["key"] for doc in documents] == [f"CT-{i:03d}" for i in range(5)]
+    for doc in documents:
+        items = doc["data"]["items"]
+        assert [item["valor"] for item in items] == [10, 20, 30] # Ordenados por idx (removido depois)
+        assert {item["parent"] for item in items} == {doc["key"]}
+        assert all(item["doctype"] == "Contract Item" for item in items)
+        assert all(not {"owner", "_user_tags", "idx", "parentfield"} & set(item) for item in items)
+        assert doc["data"]["doctype"] == "Contract" and "parent" not in doc["data"]
+
+    child_filters = [json.loads(params["filters"])[0] for doctype, params in client.requests
+                     if doctype == "Contract Item"]
+    parent_chunks = [f[2] for f in child_filters if f[1] == "in"]
+    # Páginas de pais: [0..3] e [4], em chunks de até 2 pais; os 6 filhos de um chunk ocupam 2 páginas
+    assert parent_chunks == [["CT-000", "CT-001"], ["CT-000", "CT-001"], ["CT-002", "CT-003"],
+                             ["CT-002", "CT-003"], ["CT-004"]]
+    assert all(params["parent"] == "Contract" for doctype, params in client.requests
+               if doctype == "Contract Item")
+
+def test_get_doctype_data_bulk():
+    metadata = {
+        "Contract": [{"fieldname": "items", "fieldtype": "Table", "options": "Contract Item"}],
+        "Contract Item": [{"fieldname": "valor", "fieldtype": "Currency", "label": "Valor"}],
+    }
+    documents = get_doctype_data_bulk(FakeClient(_bulk_tables(parents=3)), "Contract", metadata,
+                                      page_size=2, project_fields=True)
+    assert [doc["key"] for doc in documents] == ["CT-000", "CT-001", "CT-002"]
+    assert documents[0]["data"]["items"][0] == {"name": "IT-1-CT-000", "valor": 10, "parent": "CT-000",
+                                                "doctype": "Contract Item"}
+
+    failing = FakeClient(_bulk_tables(), fail_doctype="Contract Item")
+    assert get_doctype_data_bulk(failing, "Contract", metadata) is None
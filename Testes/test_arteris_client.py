@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do ArterisClient: URL enviada ao servidor e classe da requisição usada
+pela latência de base do limitador de taxa.
+"""
+
+import io
+import os
+import sys
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+
+from arteris_client import ArterisClient, _request_class
+
+def _response(status=200, body=b"{}"):
+    response = requests.Response()
+    response.status_code = status
+    response.raw = io.BytesIO(body)
+    return response
+
+def test_send_usa_a_url_recebida():
+    client = ArterisClient("https://arteris.example/api/resource", "token x:y")
+    sent = []
+    client.session.get = lambda url, **kwargs: sent.append(url) or _response()
+    client._send("Asset", "https://arteris.example/api/resource/Asset?x=1", None, None)
+    client.get("Asset/A-1")
+    client.get(client.method_url("frappe.client.get_count"))
+    assert sent == ["https://arteris.example/api/resource/Asset?x=1",
+                    "https://arteris.example/api/resource/Asset/A-1",
+                    "https://arteris.example/api/method/frappe.client.get_count"]
+    client.close()
+
+def test_classe_da_requisicao():
+    client = ArterisClient("https://arteris.example/api/resource", "token x:y")
+    assert _request_class("Asset") == "list:Asset"
+    assert _request_class("Asset/A-1") == "document:Asset"
+    assert _request_class(client.method_url("frappe.client.get_count")) == "method:frappe.client.get_count"
+    assert _request_class("https://arteris.example/files/x.pdf") == "url"
+    client.close()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do módulo benchmark_fetch.py: matriz de casos, métricas de um caso
+contra o servidor simulado e comparação entre execuções.
+"""
+
+import os
+import sys
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmark_fetch import benchmark_matrix, run_benchmarks, compare_results
+
+def test_matriz_de_casos():
+    """O tamanho de página só varia nos cenários de documentos."""
+    cases = benchmark_matrix(["metadata", "bulk"], [1, 4], [100, 1000])
+    assert cases == [
+        ("metadata", 1, None), ("metadata", 4, None),
+        ("bulk", 1, 100), ("bulk", 1, 1000), ("bulk", 4, 100), ("bulk", 4, 1000),
+    ]
+
+def test_execucao_e_comparacao():
+    """Cada caso registra as métricas e a comparação casa os casos iguais."""
+    report = run_benchmarks(["metadata_bulk", "bulk"], [2], [100], scale=0.02, latency=0.0, isolate=False)
+    assert [(r["scenario"], r["page_size"]) for r in report["results"]] == [("metadata_bulk", None), ("bulk", 100)]
+    bulk = report["results"][1]
+    assert bulk["documents"] > 0 and bulk["requests"] > 0 and bulk["bytes"] > 0
+    assert bulk["latency_p50"] <= bulk["latency_p95"] <= bulk["latency_p99"]
+    assert bulk["peak_rss_bytes"] > 0
+
+    rows = compare_results(report, report)
+    assert [row[:3] for row in rows] == [("metadata_bulk", 2, None), ("bulk", 2, 100)]
+    assert all(change == 0 for *_, change in rows)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes da memoização dos DocTypes vinculados em process_fields_for_hierarchy
+e do benchmark_hierarchy.py.
+"""
+
+import os
+import sys
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmark_hierarchy import generate_synthetic_schema, run_benchmark
+from json_to_entity_transformer import create_hierarchical_doctype_structure, process_fields_for_hierarchy
+
+def test_links_reutilizam_os_campos_processados():
+    """Os campos do DocType vinculado são processados uma vez, mas cada Link recebe seus próprios nós."""
+    doctypes_with_fields = {
+        "City": [{"fieldname": "nome", "label": "Nome", "fieldtype": "Data"}],
+        "Asset": [{"fieldname": "origem", "label": "Origem", "fieldtype": "Link", "options": "City"},
+                  {"fieldname": "destino", "label": "Destino", "fieldtype": "Link", "options": "City"}],
+    }
+    cache = {}
+    nodes = process_fields_for_hierarchy(doctypes_with_fields["Asset"], doctypes_with_fields, True, cache)
+    assert list(cache) == ["City"]
+    assert nodes[0]["children"] == nodes[1]["children"] == [
+        {"key": "Nome", "description": "Nome", "fieldname": "nome", "type": "string"}]
+    assert nodes[0]["children"][0] is not nodes[1]["children"][0]
+
+def test_estrutura_igual_com_e_sem_memoizacao():
+    doctypes_with_fields, child_parent_mapping = generate_synthetic_schema(doctypes=20, fields=4, links=3, popular=3)
+    expected = create_hierarchical_doctype_structure(doctypes_with_fields, list(child_parent_mapping),
+                                                     memoize_links=False)
+    assert create_hierarchical_doctype_structure(doctypes_with_fields, list(child_parent_mapping)) == expected
+
+def test_benchmark():
+    report = run_benchmark(doctypes=30, fields=4, links=3, popular=5, repeat=1)
+    assert report["identical"]
+    assert report["config"]["total_doctypes"] == 30 * 3 + 5
+    assert report["seconds_with_memo"] > 0 and report["bytes"] > 0
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do módulo compact_hierarchy.py: formato compacto com $ref, expansão
+sob demanda e equivalência com a estrutura aninhada.
+"""
+
+import json
+import os
+import sys
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from compact_hierarchy import (
+    LazyHierarchyNode, compact_hierarchy, expand_hierarchy, load_hierarchy, save_compact_hierarchy, REF_KEY
+)
+from compiled_schema import CompiledSchema
+from data_to_engine_entities_v4 import transform_to_entity_engine
+from json_to_entity_transformer import create_hierarchical_doctype_structure
+
+DOCTYPES_WITH_FIELDS = {
+    "City": [{"fieldname": "nome", "label": "Nome", "fieldtype": "Data"}],
+    "Contract": [
+        {"fieldname": "numero", "label": "Número", "fieldtype": "Data"},
+        {"fieldname": "cidade", "label": "Cidade", "fieldtype": "Link", "options": "City"},
+    ],
+    "Contract Item": [
+        {"fieldname": "cidade", "label": "Cidade", "fieldtype": "Link", "options": "City"},
+        {"fieldname": "valor", "label": "Valor", "fieldtype": "Currency"},
+    ],
+}
+
+def _structure():
+    return create_hierarchical_doctype_structure(DOCTYPES_WITH_FIELDS, [])
+
+def test_cada_doctype_e_gravado_uma_vez():
+    compact = compact_hierarchy(_structure())
+    assert sorted(compact["definitions"]) == ["City", "Contract", "Contract Item"]
+    assert compact["roots"] == [{REF_KEY: "City"}, {REF_KEY: "Contract"}]
+    contract_children = compact["definitions"]["Contract"]["children"]
+    assert {REF_KEY: "City"} in contract_children and {REF_KEY: "Contract Item"} in contract_children
+    assert "path" not in json.dumps(compact["definitions"])
+
+def test_expansao_igual_a_estrutura_aninhada(tmp_path):
+    structure = _structure()
+    path = str(tmp_path / "compact.json")
+    assert save_compact_hierarchy(structure, path)
+    assert expand_hierarchy(path) == json.loads(json.dumps(structure))
+
+def test_doctype_com_conteudo_diferente_recebe_outro_id():
+    """A visão de um Link (sem relacionamentos aninhados) não se confunde com o DocType completo."""
+    doctypes_with_fields = dict(DOCTYPES_WITH_FIELDS)
+    doctypes_with_fields["Asset"] = [{"fieldname": "contrato", "label": "Contrato", "fieldtype": "Link",
+                                      "options": "Contract"}]
+    structure = create_hierarchical_doctype_structure(doctypes_with_fields, [])
+    compact = compact_hierarchy(structure)
+    assert "Contract#2" in compact["definitions"]
+    assert expand_hierarchy(compact) == json.loads(json.dumps(structure))
+
+def test_caminho_proprio_de_cada_ocorrencia():
+    """Uma tabela filha compartilhada por dois pais recebe o caminho de cada ocorrência."""
+    doctypes_with_fields = {"Item": [{"fieldname": "x", "label": "X", "fieldtype": "Data"}], "A": [], "B": []}
+    structure = create_hierarchical_doctype_structure(
+        doctypes_with_fields, [{"child": "Item", "parent": "A"}, {"child": "Item", "parent": "B"}])
+    entities = load_hierarchy(compact_hierarchy(structure))["entities"]
+    paths = [entity["children"][0]["children"][0]["path"] for entity in entities[:2]]
+    assert paths == ["A.Item.X", "B.Item.X"]
+
+def test_expansao_sob_demanda():
+    entities = load_hierarchy(compact_hierarchy(_structure()))["entities"]
+    contract = entities[1]
+    assert isinstance(contract, LazyHierarchyNode)
+    assert contract._children is None
+    assert contract["key"] == "Contract" and "path" not in contract
+    assert contract["children"][0]["path"] == "Contract.Numero"
+    assert contract._children is not None
+
+def test_load_hierarchy_formato_aninhado():
+    structure = _structure()
+    assert load_hierarchy(structure) is structure
+
+def test_transformadores_aceitam_a_visao_expandida():
+    output_data = [{"doctype": "Contract", "key": "C-1", "data": {"name": "C-1", "numero": "001"}}]
+    structure = _structure()
+    lazy = load_hierarchy(compact_hierarchy(structure))
+    assert transform_to_entity_engine(output_data, lazy) == transform_to_entity_engine(output_data, structure)
+    assert CompiledSchema(lazy).attributes == CompiledSchema(structure).attributes
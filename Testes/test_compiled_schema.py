@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do módulo compiled_schema.py: consultas sobre a estrutura hierárquica
+e equivalência dos transformadores v2/v4 com a estrutura ou o schema compilado.
+"""
+
+import os
+import pickle
+import sys
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from compiled_schema import CompiledSchema, compile_schema
+from data_to_engine_entities_v2 import get_data_engine_hierarquical as transform_v2
+from data_to_engine_entities_v4 import transform_to_entity_engine as transform_v4
+
+DOCTYPES_WITH_FIELDS = {
+    "Contract": [
+        {"fieldname": "numero", "label": "Número", "fieldtype": "Data"},
+        {"fieldname": "valor", "label": "Valor", "fieldtype": "Currency"},
+        {"fieldname": "itens", "label": "Itens", "fieldtype": "Table", "options": "Contract Item"},
+    ],
+    "Contract Item": [
+        {"fieldname": "descricao", "label": "Descrição", "fieldtype": "Data"},
+        {"fieldname": "quantidade", "label": "Quantidade", "fieldtype": "Int"},
+    ],
+}
+CHILD_PARENT_MAPPING = [{"child": "Contract Item", "parent": "Contract"}]
+
+OUTPUT_DATA = [
+    {"doctype": "Contract", "key": "C-1", "data": {"name": "C-1", "numero": "001", "valor": 10.5}},
+    {"doctype": "Contract Item", "key": "I-1",
+     "data": {"name": "I-1", "parent": "C-1", "descricao": "Item", "quantidade": 2}},
+]
+
+def _schema():
+    return CompiledSchema.from_metadata(DOCTYPES_WITH_FIELDS, CHILD_PARENT_MAPPING)
+
+def test_consultas():
+    """DocType, campos, tabelas e filho -> pai vêm de dicionários pré-computados."""
+    schema = _schema()
+    assert schema.entity_key("Contract") == "Contract"
+    assert schema.entity_key("Contract Item") == "Contract_Item"
+    assert schema.doctype_name("Contract_Item") == "Contract Item"
+    assert schema.attribute("Contract", "valor") == ("Valor", "numeric")
+    assert schema.attribute("Contract_Item", "quantidade") == ("Quantidade", "numeric")
+    assert schema.attribute("Contract", "inexistente") is None
+    assert schema.table_child("Contract", "itens") == "Contract Item"
+    assert schema.parent_of("Contract Item") == "Contract"
+    assert schema.node("Contract.Valor")["fieldname"] == "valor"
+    assert schema.node("Contract.Inexistente") is None
+
+def test_from_metadata_nao_altera_o_mapeamento():
+    mapping = list(CHILD_PARENT_MAPPING)
+    CompiledSchema.from_metadata(DOCTYPES_WITH_FIELDS, mapping)
+    assert mapping == CHILD_PARENT_MAPPING
+
+def test_compile_schema_reutiliza_o_objeto():
+    schema = _schema()
+    assert compile_schema(schema) is schema
+    assert compile_schema(schema.hierarchy).attributes == schema.attributes
+
+def test_pickle():
+    """O schema pode ser enviado a outros processos."""
+    schema = _schema()
+    restored = pickle.loads(pickle.dumps(schema))
+    assert restored.attributes == schema.attributes
+    assert restored.doctype_to_key == schema.doctype_to_key
+    assert restored.table_fields == schema.table_fields
+
+def test_transformadores_equivalentes():
+    """v2 e v4 geram a mesma saída com a estrutura hierárquica ou com o schema compilado."""
+    schema = _schema()
+    for transform in (transform_v2, transform_v4):
+        expected = transform(OUTPUT_DATA, schema.hierarchy)
+        assert expected["entities"]
+        assert transform(OUTPUT_DATA, schema) == expected
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do módulo crawl_checkpoint.py: retomada de um crawl interrompido,
+nova tentativa das chaves com falha (--retry-failed) e gravação atômica do
+state.json.
+"""
+
+import json
+import os
+import sys
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+import crawl_checkpoint
+import crawler
+from crawl_checkpoint import CrawlCheckpoint
+from crawler import crawl_documents_per_key, retry_failed_keys
+from fetch_executor import FetchExecutor
+
+KEYS = {"Asset": ["A-1", "A-2", "A-3"], "City": ["C-1", "C-2"]}
+ALL_DOCTYPES = [{"name": "Asset"}, {"name": "City"}]
+
+def _fake_api(monkeypatch, failing=(), fetched=None):
+    """Substitui a API: as chaves em 'failing' falham e as buscadas são anotadas em 'fetched'."""
+    monkeypatch.setattr(crawler, "get_keys", lambda client, doctype_name, page_size: list(KEYS[doctype_name]))
+
+    def fake_get_data_from_key(client, doctype_name, key):
+        if fetched is not None:
+            fetched.append(key)
+        return None if key in failing else {"name": key}
+
+    monkeypatch.setattr(crawler, "get_data_from_key", fake_get_data_from_key)
+
+def _document(doctype, key):
+    return {"doctype": doctype, "key": key, "data": {"name": key}}
+
+def test_retomada_carrega_documentos_e_doctypes_concluidos(tmp_path):
+    directory = str(tmp_path / "checkpoint")
+    checkpoint = CrawlCheckpoint(directory, save_every=1)
+    checkpoint.record_documents([_document("Asset", "A-2"), _document("Asset", "A-1")])
+    checkpoint.mark_completed("City")
+    # Interrupção no meio da gravação: a última linha fica cortada
+    with open(checkpoint.documents_path, "a", encoding="utf-8") as f:
+        f.write('{"doctype": "Asset", "key": "A-')
+
+    resumed = CrawlCheckpoint(directory, resume=True)
+    assert resumed.is_fetched("Asset", "A-1") and not resumed.is_fetched("Asset", "A-3")
+    assert resumed.is_completed("City") and not resumed.is_completed("Asset")
+    assert [doc["key"] for doc in resumed.documents(["City", "Asset"])] == ["A-1", "A-2"]
+    with open(resumed.state_path, "r", encoding="utf-8") as f:
+        assert json.load(f) == {"mode": "per_key", "completed_doctypes": ["City"]}
+
+    # Sem --resume, ou com outro modo, o checkpoint é descartado
+    assert not CrawlCheckpoint(directory, mode="bulk", resume=True).is_fetched("Asset", "A-1")
+    assert not CrawlCheckpoint(directory, resume=False).documents(["Asset"])
+
+def test_crawl_retomado_busca_apenas_o_que_falta(tmp_path, monkeypatch):
+    directory = str(tmp_path / "checkpoint")
+    executor = FetchExecutor(max_workers=2)
+    checkpoint = CrawlCheckpoint(directory)
+    checkpoint.record_documents([_document("Asset", "A-1")])
+    checkpoint.mark_completed("City")
+    checkpoint.save()
+
+    fetched = []
+    _fake_api(monkeypatch, fetched=fetched)
+    data = crawl_documents_per_key(None, ALL_DOCTYPES, executor, checkpoint=CrawlCheckpoint(directory, resume=True))
+    assert sorted(fetched) == ["A-2", "A-3"]
+    assert [doc["key"] for doc in data] == ["A-1", "A-2", "A-3"] # City concluído sem documentos no checkpoint
+
+def test_retry_failed(tmp_path, monkeypatch):
+    directory = str(tmp_path / "checkpoint")
+    executor = FetchExecutor(max_workers=2)
+    _fake_api(monkeypatch, failing={"A-2", "C-1"})
+    crawl_documents_per_key(None, ALL_DOCTYPES, executor, checkpoint=CrawlCheckpoint(directory))
+    assert sorted(CrawlCheckpoint(directory, resume=True).failed_keys()) == [("Asset", "A-2"), ("City", "C-1")]
+
+    # Primeira nova tentativa: só C-1 é recuperada
+    fetched = []
+    _fake_api(monkeypatch, failing={"A-2"}, fetched=fetched)
+    checkpoint = CrawlCheckpoint(directory, resume=True)
+    data = retry_failed_keys(None, ALL_DOCTYPES, executor, checkpoint)
+    assert sorted(fetched) == ["A-2", "C-1"]
+    assert [doc["key"] for doc in data] == ["A-1", "A-3", "C-1", "C-2"]
+
+    # A falha resolvida não volta ao retomar; a pendente continua
+    fetched.clear()
+    _fake_api(monkeypatch, fetched=fetched)
+    checkpoint = CrawlCheckpoint(directory, resume=True)
+    assert checkpoint.failed_keys() == [("Asset", "A-2")]
+    data = retry_failed_keys(None, ALL_DOCTYPES, executor, checkpoint)
+    assert fetched == ["A-2"]
+    assert len(data) == 5 and not CrawlCheckpoint(directory, resume=True).failed_keys()
+
+def test_gravacao_atomica_do_estado(tmp_path, monkeypatch):
+    """Uma falha ao gravar o state.json mantém o arquivo anterior inteiro."""
+    checkpoint = CrawlCheckpoint(str(tmp_path / "checkpoint"))
+    checkpoint.mark_completed("Asset")
+    with open(checkpoint.state_path, "r", encoding="utf-8") as f:
+        before = f.read()
+
+    def failing_dump(obj, f, **kwargs):
+        f.write('{"mode": "per_key", "completed_')
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(crawl_checkpoint.json, "dump", failing_dump)
+    with pytest.raises(OSError):
+        checkpoint.mark_completed("City")
+    monkeypatch.undo()
+
+    with open(checkpoint.state_path, "r", encoding="utf-8") as f:
+        assert f.read() == before
+    assert CrawlCheckpoint(checkpoint.directory, resume=True).completed_doctypes == {"Asset"}
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do módulo crawl_deadline.py: prazo no FetchExecutor e no ArterisClient,
+ordem por prioridade e situação dos DocTypes no manifesto.
+"""
+
+import os
+import sys
+import time
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from arteris_client import ArterisClient
+from crawler import _update_manifest
+from crawl_deadline import (
+    CrawlDeadline, CrawlManifest, DeadlineExceeded, prioritize_doctypes, COMPLETE, PARTIAL, MISSING
+)
+from fetch_executor import FetchExecutor
+
+def test_executor_para_de_iniciar_tarefas_no_prazo():
+    """Depois do prazo, as tarefas restantes não são iniciadas nem entregues."""
+    deadline = CrawlDeadline(0.2, reserve_seconds=0)
+    executor = FetchExecutor(max_workers=1, deadline=deadline)
+    tasks = [("Asset", time.sleep, (0.05,)) for _ in range(20)]
+    results = list(executor.run(tasks))
+    assert 1 <= len(results) < 20
+    assert deadline.skipped_tasks == 20 - len(results)
+
+def test_client_nao_inicia_requisicao_apos_o_prazo():
+    """O cliente não faz requisições depois do prazo (erro tratado como RequestException)."""
+    client = ArterisClient("http://arteris.invalid/api/resource", "token x:y",
+                           deadline=CrawlDeadline(10, reserve_seconds=10))
+    client.session.get = lambda *args, **kwargs: pytest.fail("requisição após o prazo")
+    with pytest.raises(DeadlineExceeded):
+        client.get("Asset")
+    assert client.retry_stats.summary()["attempts"] == 0
+
+def test_prioridades_e_manifesto():
+    """DocTypes mais importantes vêm primeiro; o manifesto compara documentos e chaves."""
+    doctypes = [{"name": "City"}, {"name": "Contract"}, {"name": "Asset"}]
+    ordered = prioritize_doctypes(doctypes, {"Contract": 10, "Asset": 5})
+    assert [d["name"] for d in ordered] == ["Contract", "Asset", "City"]
+
+    manifest = CrawlManifest(["Contract", "Asset", "City", "Work Role"])
+    documents = [{"doctype": "Contract", "key": str(i), "data": {}} for i in range(3)]
+    documents.append({"doctype": "Asset", "key": "a", "data": {}})
+    _update_manifest(manifest, ["Contract", "Asset", "City", "Work Role"], documents,
+                     {"Contract": 3, "Asset": 4, "City": 0})
+    assert manifest.doctypes["Contract"] == {"status": COMPLETE, "documents": 3, "expected": 3}
+    assert manifest.doctypes["Asset"]["status"] == PARTIAL
+    assert manifest.doctypes["City"]["status"] == COMPLETE # DocType vazio
+    assert manifest.doctypes["Work Role"]["status"] == MISSING # não listado
+    assert manifest.to_dict()["complete"] is False
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do módulo crawl_planner.py: estimativa de requisições, bytes e shards
+a partir das contagens, sem acessar a API.
+"""
+
+import os
+import sys
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import crawl_planner
+from crawl_planner import plan_crawl, choose_page_size, MIN_PAGE_SIZE, MAX_PAGE_SIZE
+from fetch_executor import FetchExecutor
+
+COUNTS = {"Contract": 2500, "Contract Item": 4000, "City": 0}
+META = {
+    "Contract": [{"fieldname": "items", "fieldtype": "Table", "options": "Contract Item"}],
+    "City": [],
+}
+DOCTYPES = [{"name": "Contract"}, {"name": "City"}]
+
+def _fake_api(monkeypatch):
+    monkeypatch.setattr(crawl_planner, "get_doctype_count",
+                        lambda client, doctype_name, filters=None: COUNTS[doctype_name])
+    monkeypatch.setattr(crawl_planner, "sample_doctype",
+                        lambda client, doctype_name: (1000.0, 0.1))
+
+def test_plano_em_lote(monkeypatch):
+    """Páginas do pai + max(chunks de pais, páginas de filhos) por tabela."""
+    _fake_api(monkeypatch)
+    plan = plan_crawl(None, DOCTYPES, META, FetchExecutor(max_workers=4), mode="bulk", page_size=1000)
+    contract, city = plan["doctypes"]
+    assert contract["requests"] == 3 + 25
+    assert contract["bytes"] == (2500 + 4000) * 1000
+    assert city["requests"] == 1 and city["shards"] == 1
+    # Contract concentra quase todo o trabalho: é dividido em shards (até max_workers)
+    assert contract["shards"] == 4
+    assert plan["totals"]["requests"] == 29
+    assert plan["totals"]["documents"] == 2500
+
+def test_plano_por_chave(monkeypatch):
+    """Uma requisição por documento além das páginas de chaves; sem shards."""
+    _fake_api(monkeypatch)
+    plan = plan_crawl(None, DOCTYPES, META, FetchExecutor(max_workers=4), mode="per_key", page_size=1000)
+    assert plan["doctypes"][0]["requests"] == 3 + 2500
+    assert all(d["shards"] == 1 for d in plan["doctypes"])
+    assert plan["totals"]["wall_seconds"] >= 2504 * 0.1 / 4
+
+def test_tamanho_de_pagina():
+    """A página mira TARGET_PAGE_BYTES, dentro dos limites."""
+    assert choose_page_size(1) == MAX_PAGE_SIZE
+    assert choose_page_size(10 ** 9) == MIN_PAGE_SIZE
+    assert choose_page_size(2048) == 2000
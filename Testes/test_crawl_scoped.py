@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do crawl a partir de documentos raiz (crawler.crawl_documents_scoped e
+_document_references): Links do documento e das tabelas filhas, deduplicação,
+limite de profundidade e Links para DocTypes fora do módulo.
+"""
+
+import os
+import sys
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import crawler
+from crawler import _document_references, crawl_documents_scoped
+from fetch_executor import FetchExecutor
+
+METADATA = {
+    "Contract": [
+        {"fieldname": "cidade", "fieldtype": "Link", "options": "City"},
+        {"fieldname": "owner_user", "fieldtype": "Link", "options": "User"}, # fora do módulo
+        {"fieldname": "items", "fieldtype": "Table", "options": "Contract Item"},
+    ],
+    "Contract Item": [
+        {"fieldname": "ativo", "fieldtype": "Link", "options": "Asset"},
+    ],
+    "Asset": [
+        {"fieldname": "cidade", "fieldtype": "Link", "options": "City"},
+        {"fieldname": "contrato", "fieldtype": "Link", "options": "Contract"},
+    ],
+    "City": [],
+}
+ALL_DOCTYPES = [{"name": "City"}, {"name": "Asset"}, {"name": "Contract"}, {"name": "Contract Item"}]
+DOCUMENTS = {
+    ("Contract", "CT-1"): {"name": "CT-1", "cidade": "SP", "owner_user": "admin@example.com", "items": [
+        {"name": "IT-1", "ativo": "AS-1"}, {"name": "IT-2", "ativo": "AS-2"}, {"name": "IT-3", "ativo": "AS-1"}]},
+    ("Asset", "AS-1"): {"name": "AS-1", "cidade": "SP", "contrato": "CT-1"}, # ciclo de volta à raiz
+    ("Asset", "AS-2"): {"name": "AS-2", "cidade": "RJ", "contrato": None},
+    ("City", "SP"): {"name": "SP"},
+    ("City", "RJ"): {"name": "RJ"},
+}
+
+def _fake_api(monkeypatch, missing=()):
+    """Substitui get_data_from_key por uma busca em DOCUMENTS; as buscadas são anotadas."""
+    fetched = []
+
+    def fake_get_data_from_key(client, doctype_name, key):
+        fetched.append((doctype_name, key))
+        if (doctype_name, key) in missing:
+            return None
+        return DOCUMENTS.get((doctype_name, key))
+
+    monkeypatch.setattr(crawler, "get_data_from_key", fake_get_data_from_key)
+    return fetched
+
+def test_referencias_do_documento_e_das_tabelas_filhas():
+    references = _document_references(METADATA, "Contract", DOCUMENTS[("Contract", "CT-1")])
+    # O Link para User (fora dos metadados) é ignorado; as linhas filhas contribuem com os Assets
+    assert references == [("City", "SP"), ("Asset", "AS-1"), ("Asset", "AS-2"), ("Asset", "AS-1")]
+    assert _document_references(METADATA, "Asset", DOCUMENTS[("Asset", "AS-2")]) == [("City", "RJ")]
+    assert _document_references(METADATA, "Contract", {"name": "CT-2", "items": None}) == []
+
+def test_cada_documento_e_buscado_uma_vez(monkeypatch):
+    fetched = _fake_api(monkeypatch)
+    documents = crawl_documents_scoped(None, [("Contract", "CT-1"), ("Contract", "CT-1")], ALL_DOCTYPES,
+                                       METADATA, FetchExecutor(max_workers=2))
+    assert sorted(fetched) == sorted(DOCUMENTS)
+    assert len(fetched) == len(set(fetched))
+    assert ("User", "admin@example.com") not in fetched
+    # Agrupados na ordem de all_doctypes e, dentro de cada DocType, na ordem em que foram alcançados
+    assert [(doc["doctype"], doc["key"]) for doc in documents] == [
+        ("City", "SP"), ("City", "RJ"), ("Asset", "AS-1"), ("Asset", "AS-2"), ("Contract", "CT-1")]
+
+def test_profundidade_maxima(monkeypatch):
+    fetched = _fake_api(monkeypatch)
+    documents = crawl_documents_scoped(None, [("Contract", "CT-1")], ALL_DOCTYPES, METADATA,
+                                       FetchExecutor(max_workers=2), max_depth=0)
+    assert fetched == [("Contract", "CT-1")]
+    assert [doc["key"] for doc in documents] == ["CT-1"]
+
+    fetched = _fake_api(monkeypatch)
+    crawl_documents_scoped(None, [("Contract", "CT-1")], ALL_DOCTYPES, METADATA,
+                           FetchExecutor(max_workers=2), max_depth=1)
+    assert ("City", "RJ") not in fetched # Alcançado só pelo AS-2, no segundo nível
+    assert sorted(fetched) == [("Asset", "AS-1"), ("Asset", "AS-2"), ("City", "SP"), ("Contract", "CT-1")]
+
+def test_documento_com_falha_nao_e_seguido(monkeypatch):
+    fetched = _fake_api(monkeypatch, missing={("Asset", "AS-2")})
+    documents = crawl_documents_scoped(None, [("Contract", "CT-1")], ALL_DOCTYPES, METADATA,
+                                       FetchExecutor(max_workers=2))
+    assert ("City", "RJ") not in fetched
+    assert "AS-2" not in [doc["key"] for doc in documents]
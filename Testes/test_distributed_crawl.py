@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes da fila do crawl distribuído (distributed_crawl.WorkQueue): lease,
+expiração do lease de um worker que morreu, confirmação das tarefas,
+coordenador sem progresso e reaproveitamento da fila entre execuções.
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import distributed_crawl
+from distributed_crawl import WorkQueue, run_coordinator, run_worker
+
+def test_lease_expira_e_tarefa_volta_para_a_fila(tmp_path):
+    """Uma tarefa de um worker que parou é assumida por outro; o ack antigo é descartado."""
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"))
+    run_id = queue.reset([("Asset", None, "0196"), ("Asset", "0196", None)], {"page_size": 10})
+    assert queue.settings() == {"page_size": 10, "run_id": run_id}
+
+    first = queue.lease("w1", lease_seconds=0.05)
+    second = queue.lease("w2", lease_seconds=60)
+    assert (first["id"], second["id"]) == (1, 2)
+    assert queue.lease("w2") is None
+
+    time.sleep(0.1)
+    retaken = queue.lease("w2", lease_seconds=60)
+    assert retaken["id"] == 1 and retaken["attempts"] == 2
+
+    doc = {"doctype": "Asset", "key": "a1", "data": {"name": "a1"}}
+    assert queue.ack(1, "w1", [doc]) is False # lease perdido
+    assert queue.ack(1, "w2", [doc]) is True
+    assert queue.ack(2, "w2", []) is True
+    assert queue.is_finished()
+    assert queue.documents(["Asset"]) == [doc]
+
+def test_tarefa_falha_apos_tentativas(tmp_path):
+    """Depois de max_attempts falhas a tarefa fica como 'failed' e não volta à fila."""
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"), max_attempts=2)
+    queue.reset([("City", None, None)], {})
+    for _ in range(2):
+        task = queue.lease("w1")
+        queue.fail(task["id"], "w1", "erro")
+    assert queue.lease("w1") is None
+    assert queue.counts() == {"failed": 1}
+
+def test_fila_usa_journal_de_rollback(tmp_path):
+    """O WAL depende de memória compartilhada em um único host; a fila usa o journal DELETE."""
+    path = str(tmp_path / "queue.sqlite")
+    WorkQueue(path)
+    conn = sqlite3.connect(path)
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    finally:
+        conn.close()
+
+def test_coordenador_desiste_sem_progresso(tmp_path):
+    """Sem workers, o coordenador retorna None depois de stall_leases leases sem progresso."""
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"))
+    start = time.monotonic()
+    result = run_coordinator(None, [{"name": "City"}], {}, queue, poll_seconds=0.01,
+                             lease_seconds=0.05, stall_leases=2)
+    assert result is None
+    assert time.monotonic() - start < 5
+    assert queue.counts() == {"pending": 1}
+
+def test_renovacao_do_lease_conta_como_progresso(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"))
+    queue.reset([("City", None, None)], {})
+    task = queue.lease("w1", lease_seconds=60)
+    before = queue.progress()
+    time.sleep(0.01)
+    assert queue.renew(task["id"], "w1", lease_seconds=60)
+    assert queue.progress() != before
+
+def test_lease_vencido_na_ultima_tentativa_marca_falha(tmp_path):
+    """Uma faixa que derruba o worker toda vez não volta à fila para sempre."""
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"), max_attempts=2)
+    queue.reset([("Asset", None, None)], {})
+    for attempt in (1, 2):
+        assert queue.lease("w1", lease_seconds=0.01)["attempts"] == attempt
+        time.sleep(0.02) # O worker morre sem fail() nem ack()
+    assert queue.lease("w1") is None
+    assert queue.counts() == {"failed": 1}
+    assert queue.is_finished()
+
+def test_lease_apenas_da_execucao_atual(tmp_path):
+    path = str(tmp_path / "queue.sqlite")
+    queue = WorkQueue(path)
+    queue.reset([("Asset", None, None), ("City", None, None)], {})
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            conn.execute("UPDATE tasks SET run_id = 'anterior' WHERE doctype = 'Asset'")
+    finally:
+        conn.close()
+    assert queue.lease("w1")["doctype"] == "City"
+    assert queue.lease("w1") is None
+
+def test_worker_iniciado_antes_do_reset_usa_a_nova_execucao(tmp_path, monkeypatch):
+    """Com a execução anterior terminada na fila, o worker espera o reset() e usa as novas configurações."""
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"))
+    queue.reset([("City", None, None)], {"page_size": 10})
+    assert queue.ack(queue.lease("w0")["id"], "w0", [])
+
+    page_sizes = []
+    def fake_fetch_name_range(client, doctype, doctypes_with_fields, lower, upper, page_size, project_fields):
+        page_sizes.append(page_size)
+        return []
+    monkeypatch.setattr(distributed_crawl, "fetch_name_range", fake_fetch_name_range)
+
+    result = []
+    worker = threading.Thread(target=lambda: result.append(run_worker(None, queue, "w1", poll_seconds=0.01)))
+    worker.start()
+    time.sleep(0.1)
+    assert worker.is_alive() # Não sai com a execução anterior
+    queue.reset([("City", None, None), ("Asset", None, None)], {"page_size": 500})
+    worker.join(timeout=5)
+    assert result == [2] and page_sizes == [500, 500]
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do módulo fetch_executor.py: ordem de entrega dos resultados e
+limite de requisições simultâneas por DocType.
+"""
+
+import os
+import sys
+import time
+import threading
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import fetch_executor
+from fetch_executor import FetchExecutor
+
+def test_fetch_executor_ordem_e_limite_por_doctype():
+    """Resultados saem na ordem das tarefas e o limite por DocType é respeitado."""
+    lock = threading.Lock()
+    running = {}
+    peak = {}
+
+    def fetch(doctype, index):
+        with lock:
+            running[doctype] = running.get(doctype, 0) + 1
+            peak[doctype] = max(peak.get(doctype, 0), running[doctype])
+        time.sleep(0.002 * (index % 4))
+        with lock:
+            running[doctype] -= 1
+        return index
+
+    tasks = []
+    for i in range(60):
+        doctype = "Contract Measurement" if i % 2 else "City"
+        tasks.append((doctype, fetch, (doctype, i)))
+
+    executor = FetchExecutor(max_workers=6, per_doctype_limit={"Contract Measurement": 2})
+    results = [result for _, _, result in executor.run(tasks)]
+
+    assert results == list(range(60))
+    assert peak["Contract Measurement"] <= 2
+    summary = executor.stats.summary()
+    assert summary["count"] == 60
+    assert summary["errors"] == 0
+    assert summary["p50"] is not None
+
+def test_fetch_executor_erro_vira_none():
+    """Exceções na busca são contadas como erro e entregues como None."""
+    def fetch(index):
+        if index == 1:
+            raise RuntimeError("falha simulada")
+        return index
+
+    executor = FetchExecutor(max_workers=2)
+    results = [result for _, _, result in executor.run([("Asset", fetch, (i,)) for i in range(3)], ordered=False)]
+
+    assert sorted(r for r in results if r is not None) == [0, 2]
+    assert executor.stats.summary()["errors"] == 1
+
+def test_relatorio_por_tarefa(monkeypatch):
+    """Com per_task, o relatório fala em tarefas e duração, e não em requisições e latência."""
+    messages = []
+    monkeypatch.setattr(fetch_executor.logger, "info", lambda msg, *args: messages.append(msg % args))
+    executor = FetchExecutor(max_workers=2)
+    list(executor.run([("Asset", lambda: 1, ()), ("City", lambda: 2, ())]))
+
+    executor.print_report("Dados em lote", per_task=True)
+    assert messages[0].startswith("Dados em lote: 2 tarefas (0 com erro)") and "tarefas/s" in messages[0]
+    assert messages[1].startswith("Duração das tarefas: p50=")
+
+    messages.clear()
+    executor.print_report("Requisições")
+    assert messages[0].startswith("Requisições: 2 requisições") and messages[0].endswith("req/s")
+    assert messages[1].startswith("Latência: p50=")
+
+if __name__ == "__main__":
+    test_fetch_executor_ordem_e_limite_por_doctype()
+    test_fetch_executor_erro_vira_none()
+
+def test_fetch_executor_ordenado_nao_perde_tarefas_adiadas():
+    """Com o buffer cheio, a tarefa adiada que falta entregar ainda é iniciada."""
+    executor = FetchExecutor(max_workers=2, per_doctype_limit={"A": 1})
+    tasks = [("A", time.sleep, (0.2,)), ("A", time.sleep, (0.2,))]
+    tasks += [("B", lambda value: value, (index,)) for index in range(398)]
+    results = list(executor.run(tasks))
+    assert len(results) == 400
+    assert [args for _, args, _ in results[2:]] == [(index,) for index in range(398)]
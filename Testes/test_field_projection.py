@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes da projeção de campos (api_client_data.get_projected_fields): as colunas
+pedidas são as mesmas que process_fields_for_hierarchy considera.
+"""
+
+import os
+import sys
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api_client_data import get_projected_fields
+from json_to_entity_transformer import process_fields_for_hierarchy
+
+METADATA = {
+    "Contract": [
+        {"fieldname": "contract_number", "fieldtype": "Data", "label": "Número"},
+        {"fieldname": "hidden_field", "fieldtype": "Data", "hidden": 1},
+        {"fieldname": "f_total", "fieldtype": "Float"},
+        {"fieldname": "fm_valor", "fieldtype": "Currency"},
+        {"fieldname": "subsidiary", "fieldtype": "Link", "options": "Subsidiary"},
+        {"fieldname": "section", "fieldtype": "Section Break"},
+        {"fieldname": "items", "fieldtype": "Table", "options": "Contract Item"},
+        {"fieldname": "modified", "fieldtype": "Datetime"},
+    ],
+    "Contract Item": [
+        {"fieldname": "description", "fieldtype": "Data"},
+    ],
+    "Subsidiary": [
+        {"fieldname": "subsidiary_name", "fieldtype": "Data"},
+    ],
+}
+
+def test_projecao_segue_a_hierarquia():
+    """Ocultos, fórmulas, controle, layout e Table ficam fora; Links são mantidos."""
+    assert get_projected_fields(METADATA, "Contract") == ["name", "contract_number", "subsidiary"]
+    assert get_projected_fields(METADATA, "Contract Item", is_child=True) == \
+        ["name", "description", "parent", "idx"]
+    assert get_projected_fields(METADATA, "Desconhecido") is None
+
+    # Todo campo da hierarquia (exceto layout) está na projeção
+    nodes = process_fields_for_hierarchy(METADATA["Contract"], METADATA)
+    hierarchy_fieldnames = {node["fieldname"] for node in nodes if node["type"] != "doctype"}
+    assert hierarchy_fieldnames - {"section"} <= set(get_projected_fields(METADATA, "Contract"))
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do módulo hedging.py e do hedge no ArterisClient: cópia de requisições
+lentas, primeira resposta vence e limite da fração de cópias.
+"""
+
+import io
+import os
+import sys
+import threading
+import time
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+
+from arteris_client import ArterisClient
+from hedging import HedgePolicy
+
+def _response(status, body=b""):
+    response = requests.Response()
+    response.status_code = status
+    response.raw = io.BytesIO(body)
+    return response
+
+def _slow_first_call(slow_seconds):
+    """session.get falso: a primeira chamada de cada par demora `slow_seconds`."""
+    calls = []
+    lock = threading.Lock()
+
+    def get(*args, **kwargs):
+        with lock:
+            calls.append(time.monotonic())
+            slow = len(calls) == 1
+        if slow:
+            time.sleep(slow_seconds)
+            return _response(200, b"lenta")
+        return _response(200, b"rapida")
+    return get, calls
+
+def test_sem_medicoes_nao_ha_hedge():
+    """Antes de min_samples latências, a requisição segue sozinha."""
+    policy = HedgePolicy(min_samples=5)
+    assert policy.hedge_delay() is None
+    assert policy.run(lambda: "ok") == "ok"
+    assert policy.summary() == {"requests": 1, "hedges_sent": 0, "hedges_won": 0}
+
+def test_copia_vence_a_requisicao_lenta():
+    """Uma tentativa além do percentil ganha uma cópia e a primeira resposta é usada."""
+    policy = HedgePolicy(percentile=95, max_hedge_rate=1.0, min_samples=3, min_delay=0.01)
+    for latency in (0.01, 0.01, 0.02):
+        policy.record(latency)
+    client = ArterisClient("http://arteris.invalid/api/resource", "token x:y", hedge_policy=policy)
+    client.session.get, calls = _slow_first_call(0.5)
+
+    start = time.monotonic()
+    response = client.get("Asset/1", hedge=True)
+    assert response.content == b"rapida"
+    assert time.monotonic() - start < 0.4
+    assert len(calls) == 2
+    assert policy.summary() == {"requests": 1, "hedges_sent": 1, "hedges_won": 1}
+    client.close()
+
+def test_fracao_de_copias_e_limitada():
+    """Com max_hedge_rate, poucas requisições não podem gerar cópias."""
+    policy = HedgePolicy(max_hedge_rate=0.5, min_samples=1, min_delay=0.01)
+    policy.record(0.01)
+    client = ArterisClient("http://arteris.invalid/api/resource", "token x:y", hedge_policy=policy)
+    client.session.get, calls = _slow_first_call(0.1)
+
+    assert client.get("Asset/1", hedge=True).content == b"lenta" # 1 requisição: 0.5 cópia, nenhuma enviada
+    assert policy.summary()["hedges_sent"] == 0
+    assert client.get("Asset", hedge=False).status_code == 200 # sem hedge=True, a política não é usada
+    assert policy.summary()["requests"] == 1
+    client.close()
+
+def test_resposta_retentavel_nao_vence_a_corrida():
+    """Um 503 rápido da cópia não vence: a corrida espera o 200 da requisição original."""
+    policy = HedgePolicy(percentile=95, max_hedge_rate=1.0, min_samples=3, min_delay=0.01)
+    for latency in (0.01, 0.01, 0.02):
+        policy.record(latency)
+    client = ArterisClient("http://arteris.invalid/api/resource", "token x:y", hedge_policy=policy)
+    calls = []
+
+    def get(*args, **kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            time.sleep(0.2)
+            return _response(200, b"lenta")
+        return _response(503)
+    client.session.get = get
+
+    response = client.get("Asset/1", hedge=True)
+    assert response.status_code == 200 and response.content == b"lenta"
+    assert len(calls) == 2
+    assert policy.summary()["hedges_won"] == 0
+    assert client.retry_stats.summary()["retries"] == 0
+    client.close()
+
+def test_as_duas_falham_vale_a_original():
+    policy = HedgePolicy(max_hedge_rate=1.0, min_samples=1, min_delay=0.01)
+    policy.record(0.01)
+    calls = []
+
+    def send():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(0.05)
+            return _response(502)
+        return _response(503)
+    assert policy.run(send).status_code == 502
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do módulo incremental_sync.py contra o servidor simulado: marca d'água
+de 'modified', remoções, mudança de esquema e preservação da cópia local
+quando a sincronização completa falha.
+"""
+
+import copy
+import os
+import sys
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import requests
+
+import incremental_sync
+from arteris_client import ArterisClient
+from fetch_executor import FetchExecutor
+from get_docktypes import process_arteris_doctypes
+from incremental_sync import DocumentStore, sync_doctype
+from mock_frappe_server import start_mock_server
+
+DOCTYPE = "Contract Item"
+
+@pytest.fixture
+def server():
+    server = start_mock_server(scale=0.05, seed=7)
+    yield server
+    server.stop()
+
+@pytest.fixture
+def client(server):
+    client = ArterisClient(server.base_url, "token x:y")
+    yield client
+    client.close()
+
+@pytest.fixture
+def metadata(client):
+    return process_arteris_doctypes(client, executor=FetchExecutor(max_workers=4))[2]
+
+def _documents(store):
+    return {doc["key"]: doc["data"] for doc in store.iter_documents(DOCTYPE)}
+
+def test_marca_dagua_busca_apenas_os_alterados(server, client, metadata, tmp_path):
+    store = DocumentStore(str(tmp_path / "docs.sqlite"))
+    first = sync_doctype(client, store, DOCTYPE, metadata)
+    assert first["full"] and first["changed"] == len(server.tables[DOCTYPE])
+    watermark, _ = store.get_watermark(DOCTYPE)
+    assert watermark == max(row["modified"] for row in server.tables[DOCTYPE])
+
+    # Sem alterações: só os documentos com modified igual à marca d'água ('>=')
+    second = sync_doctype(client, store, DOCTYPE, metadata)
+    assert not second["full"] and second["changed"] == 1
+
+    row = server.tables[DOCTYPE][0]
+    row["descricao"] = "Alterado"
+    row["modified"] = "2099-01-01 00:00:00.000000"
+    third = sync_doctype(client, store, DOCTYPE, metadata)
+    assert third["changed"] == 2
+    assert _documents(store)[row["name"]]["descricao"] == "Alterado"
+    assert store.get_watermark(DOCTYPE)[0] == "2099-01-01 00:00:00.000000"
+
+def test_remocoes_e_ordem_do_servidor(server, client, metadata, tmp_path):
+    store = DocumentStore(str(tmp_path / "docs.sqlite"))
+    sync_doctype(client, store, DOCTYPE, metadata)
+    removed = server.tables[DOCTYPE].pop(3)
+    del server._by_name[DOCTYPE][removed["name"]]
+
+    result = sync_doctype(client, store, DOCTYPE, metadata)
+    assert result["deleted"] == 1
+    names = [doc["key"] for doc in store.iter_documents(DOCTYPE)]
+    assert removed["name"] not in names and len(names) == len(server.tables[DOCTYPE])
+
+def test_mudanca_de_esquema_refaz_a_sincronizacao(client, metadata, tmp_path):
+    store = DocumentStore(str(tmp_path / "docs.sqlite"))
+    sync_doctype(client, store, DOCTYPE, metadata)
+    changed_metadata = copy.deepcopy(metadata)
+    changed_metadata[DOCTYPE].append({"fieldname": "novo_campo", "label": "Novo", "fieldtype": "Data"})
+    result = sync_doctype(client, store, DOCTYPE, changed_metadata)
+    assert result["full"]
+    assert not sync_doctype(client, store, DOCTYPE, changed_metadata)["full"]
+
+def test_falha_na_sincronizacao_completa_mantem_a_copia(client, metadata, tmp_path, monkeypatch):
+    """Se a busca completa falhar, a cópia local e a marca d'água continuam as anteriores."""
+    store = DocumentStore(str(tmp_path / "docs.sqlite"))
+    sync_doctype(client, store, DOCTYPE, metadata)
+    before = _documents(store)
+    watermark = store.get_watermark(DOCTYPE)
+
+    def failing_iter_keys(*args, **kwargs):
+        raise requests.exceptions.ConnectionError("falha simulada")
+        yield
+
+    monkeypatch.setattr(incremental_sync, "iter_keys", failing_iter_keys)
+    changed_metadata = copy.deepcopy(metadata)
+    changed_metadata[DOCTYPE].append({"fieldname": "novo_campo", "label": "Novo", "fieldtype": "Data"})
+    assert sync_doctype(client, store, DOCTYPE, changed_metadata) is None
+    assert _documents(store) == before
+    assert store.get_watermark(DOCTYPE) == watermark
+
+    monkeypatch.undo()
+    assert sync_doctype(client, store, DOCTYPE, changed_metadata)["full"]
+    assert _documents(store) == before
+    assert not store.names(DOCTYPE, staging=True)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do módulo json_stream.py: decodificação do array 'data' em blocos de
+qualquer tamanho, incluindo caracteres multibyte divididos entre blocos.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from json_stream import iter_json_array
+
+def _chunks(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+def test_elementos_em_blocos_de_qualquer_tamanho():
+    """O resultado não depende de onde os blocos são cortados."""
+    payload = {
+        "meta": {"ignorado": [1, {"texto": "]}"}]},
+        "data": [{"name": "Medição ação \"1\" ]", "valor": 123456}, "chave", 42, None, True, {"itens": [{"a": "}"}]}],
+        "depois": 1,
+    }
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    for size in (1, 2, 3, 7, 64, len(body)):
+        assert list(iter_json_array(_chunks(body, size))) == payload["data"]
+
+    assert list(iter_json_array([b'{"data": null}'])) == []
+    assert list(iter_json_array([b'{"message": "ok"}'])) == []
+
+def test_corpo_invalido_ou_truncado():
+    """Corpo truncado ou que não é JSON gera JSONDecodeError, como response.json()."""
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array([b'{"data": [{"name": "a"}, {"na']))
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array([b'<html>Bad Gateway</html>']))
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do módulo log_config.py: destino das mensagens, modo silencioso,
+formatação preguiçosa e progresso amostrado.
+"""
+
+import contextlib
+import io
+import logging
+import os
+import sys
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from log_config import configure_logging, get_logger, ProgressLogger
+
+@pytest.fixture(autouse=True)
+def reset_logging():
+    configure_logging(level="INFO", quiet=False)
+    yield
+    configure_logging(level="INFO", quiet=False)
+
+class _CountingStr:
+    """Objeto que conta quantas vezes foi convertido em texto."""
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "valor"
+
+def test_escreve_no_stdout_atual():
+    """As mensagens seguem o sys.stdout do momento (ex: o redirecionamento do app.py)."""
+    logger = get_logger("teste")
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        logger.info("Mensagem %s", 1)
+    assert output.getvalue() == "Mensagem 1\n"
+
+def test_formatacao_preguicosa():
+    """Mensagens abaixo do nível não são formatadas."""
+    logger = get_logger("teste")
+    value = _CountingStr()
+    with contextlib.redirect_stdout(io.StringIO()):
+        logger.debug("Valor: %s", value)
+        assert value.calls == 0
+        configure_logging(level="DEBUG")
+        logger.debug("Valor: %s", value)
+    assert value.calls > 0
+
+def test_modo_silencioso():
+    """No modo silencioso só avisos, erros e o progresso são emitidos."""
+    configure_logging(quiet=True)
+    logger = get_logger("teste")
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        logger.info("informação")
+        logger.warning("aviso")
+        get_logger("progress").info("progresso")
+    assert output.getvalue().splitlines() == ["aviso", "progresso"]
+
+def test_progresso_amostrado():
+    """O progresso é emitido no máximo uma vez por intervalo, mais a linha final."""
+    records = []
+
+    class _Collect(logging.Handler):
+        def emit(self, record):
+            records.append(record.getMessage())
+
+    logger = logging.getLogger("teste_progresso")
+    logger.setLevel(logging.INFO)
+    logger.addHandler(_Collect())
+    progress = ProgressLogger("Documentos", total=1000, interval=3600, logger=logger)
+    for _ in range(1000):
+        progress.advance()
+    assert records == []
+    progress.finish()
+    assert len(records) == 1
+    assert records[0].startswith("Documentos: 1000/1000 docs (100%)")
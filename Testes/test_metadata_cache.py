@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do módulo metadata_cache.py: entradas desatualizadas pelo 'modified',
+pelo modo de busca, pelo TTL e por force_refresh; remoção de DocTypes.
+"""
+
+import os
+import sqlite3
+import sys
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+import metadata_cache
+from metadata_cache import MetadataCache
+
+DOCTYPES = [
+    {"name": "Asset", "istable": 0, "modified": "2025-04-01 12:00:00"},
+    {"name": "Asset Operator", "istable": 1, "modified": "2025-04-01 12:00:00"},
+]
+DOCFIELDS = {
+    "Asset": [{"fieldname": "descricao", "fieldtype": "Data"}],
+    "Asset Operator": [{"fieldname": "operador", "fieldtype": "Data"}],
+}
+
+def _cache(tmp_path, **kwargs):
+    cache = MetadataCache(str(tmp_path / "metadata.sqlite"), **kwargs)
+    cache.store(DOCTYPES, DOCFIELDS, "bulk")
+    return cache
+
+def test_entradas_validas_e_desatualizadas(tmp_path):
+    cache = _cache(tmp_path)
+    assert cache.stale_names(DOCTYPES, "bulk") == []
+    assert cache.load()["Asset Operator"]["istable"] == 1
+    assert cache.load()["Asset"]["docfields"] == DOCFIELDS["Asset"]
+
+    changed = [dict(DOCTYPES[0], modified="2025-05-01 08:00:00"), DOCTYPES[1],
+               {"name": "City", "istable": 0, "modified": None}]
+    assert cache.stale_names(changed, "bulk") == ["Asset", "City"]
+    assert cache.stale_names(DOCTYPES, "per_doctype") == ["Asset", "Asset Operator"] # outro modo
+    assert cache.stale_names(DOCTYPES, "bulk", force_refresh=True) == ["Asset", "Asset Operator"]
+
+def test_ttl(tmp_path):
+    assert _cache(tmp_path, ttl_seconds=-1).stale_names(DOCTYPES, "bulk") == ["Asset", "Asset Operator"]
+    assert _cache(tmp_path, ttl_seconds=None).stale_names(DOCTYPES, "bulk") == []
+
+def test_docfields_com_erro_nao_sao_gravados(tmp_path):
+    cache = MetadataCache(str(tmp_path / "metadata.sqlite"))
+    cache.store(DOCTYPES, {"Asset": None, "Asset Operator": DOCFIELDS["Asset Operator"]}, "bulk")
+    assert list(cache.load()) == ["Asset Operator"]
+
+def test_prune(tmp_path):
+    cache = _cache(tmp_path)
+    cache.prune(["Asset"])
+    assert list(cache.load()) == ["Asset"]
+
+def test_conexoes_sao_fechadas(tmp_path, monkeypatch):
+    """Nenhuma operação deixa a conexão SQLite aberta para o coletor de lixo."""
+    opened = []
+    connect = sqlite3.connect
+
+    def tracking_connect(*args, **kwargs):
+        opened.append(connect(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(metadata_cache.sqlite3, "connect", tracking_connect)
+    cache = _cache(tmp_path)
+    cache.stale_names(DOCTYPES, "bulk")
+    cache.prune(["Asset"])
+    assert len(opened) == 4
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError): # Cannot operate on a closed database
+            conn.execute("SELECT 1")
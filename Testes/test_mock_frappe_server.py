@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do módulo mock_frappe_server.py: endpoints do Frappe simulados, dados
+determinísticos e injeção de 429/5xx, usando o ArterisClient de verdade.
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from arteris_client import ArterisClient
+from retry_policy import RetryPolicy
+from fetch_executor import FetchExecutor
+from get_docktypes import process_arteris_doctypes
+from crawler import crawl_documents_per_key, crawl_documents_bulk
+from mock_frappe_server import start_mock_server, generate_arteris_dataset
+
+@pytest.fixture(scope="module")
+def server():
+    server = start_mock_server(scale=0.05, seed=7)
+    yield server
+    server.stop()
+
+def test_dados_deterministicos():
+    """A mesma semente gera os mesmos dados."""
+    assert generate_arteris_dataset(0.05, seed=3) == generate_arteris_dataset(0.05, seed=3)
+    assert generate_arteris_dataset(0.05, seed=3) != generate_arteris_dataset(0.05, seed=4)
+
+def test_listagem_filtros_e_paginacao(server):
+    """filters, fields, order_by, limit_start e limit_page_length seguem o Frappe."""
+    client = ArterisClient(server.base_url, "token x:y")
+    params = {"fields": json.dumps(["name", "codigo"]), "filters": json.dumps([["is_group", "=", 1]]),
+              "order_by": "name asc", "limit_page_length": 0}
+    groups = client.get("Contract Item", params=params).json()["data"]
+    assert groups and all(set(row) == {"name", "codigo"} and row["codigo"] == "0" for row in groups)
+    assert [row["name"] for row in groups] == sorted(row["name"] for row in groups)
+
+    page = client.get("Contract Item", params={"order_by": "name asc", "limit_start": 1,
+                                               "limit_page_length": 2}).json()["data"]
+    all_names = client.get("Contract Item", params={"order_by": "name asc", "limit_page_length": 0}).json()["data"]
+    assert page == all_names[1:3]
+    assert len(client.get("Contract Item").json()["data"]) == 20 # limite padrão do Frappe
+    assert client.get("Contract Item/nao-existe").status_code == 404
+
+    count = client.get(client.method_url("frappe.client.get_count"), params={"doctype": "Contract Item"})
+    assert count.json()["message"] == len(all_names)
+
+def test_busca_por_chave_e_em_lote_coincidem(server):
+    """Os documentos montados em lote são iguais aos GETs por documento."""
+    client = ArterisClient(server.base_url, "token x:y")
+    executor = FetchExecutor(max_workers=4)
+    with contextlib.redirect_stdout(io.StringIO()):
+        all_doctypes, child_parent_mapping, doctypes_with_fields = process_arteris_doctypes(client, executor=executor)
+        per_key = crawl_documents_per_key(client, all_doctypes, executor, page_size=50)
+        bulk = crawl_documents_bulk(client, all_doctypes, doctypes_with_fields, executor, page_size=50)
+    assert {"child": "Contract Item City", "parent": "Contract Item"} in child_parent_mapping
+    assert sorted(per_key, key=lambda d: (d["doctype"], d["key"])) == sorted(bulk, key=lambda d: (d["doctype"], d["key"]))
+
+def test_metadados_em_lote_e_por_doctype_coincidem():
+    """Os dois modos retornam os mesmos DocFields, inclusive uma tabela filha oculta."""
+    server = start_mock_server(scale=0.05, seed=7)
+    try:
+        for field in server.tables["DocField"]:
+            if field["parent"] == "Contract Item" and field["fieldname"] == "tabcidades":
+                field["hidden"] = 1
+        client = ArterisClient(server.base_url, "token x:y")
+        executor = FetchExecutor(max_workers=4)
+        with contextlib.redirect_stdout(io.StringIO()):
+            per_doctype = process_arteris_doctypes(client, executor=executor)
+            bulk = process_arteris_doctypes(client, bulk=True, executor=executor)
+        assert bulk[1] == per_doctype[1]
+        assert {"child": "Contract Item City", "parent": "Contract Item"} in bulk[1]
+        assert bulk[2] == per_doctype[2]
+        assert "fm_valor_medido" in [field["fieldname"] for field in bulk[2]["Contract"]]
+    finally:
+        server.stop()
+
+def test_falhas_injetadas_sao_repetidas():
+    """429 e 5xx injetados são repetidos pelo cliente até a resposta 200."""
+    server = start_mock_server(scale=0.05, seed=1, rate_429=0.3, error_rate=0.2, retry_after=0)
+    try:
+        client = ArterisClient(server.base_url, "token x:y",
+                               retry_policy=RetryPolicy(max_retries=20, backoff_base=0.001))
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(10):
+                assert client.get("Asset").status_code == 200
+        assert server.stats.get(429) and client.retry_stats.summary()["retries"] > 0
+    finally:
+        server.stop()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do módulo rate_limiter.py: ajuste AIMD do limite de concorrência,
+token bucket e limitador compartilhado por URL base.
+"""
+
+import os
+import sys
+import time
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from arteris_client import ArterisClient
+from rate_limiter import AdaptiveConcurrencyLimiter, TokenBucket, has_rate_limit_config, limiter_for
+
+def test_aimd_cresce_e_cai_pela_metade():
+    """O limite cresce com latência estável e cai pela metade em sobrecarga ou pico."""
+    limiter = AdaptiveConcurrencyLimiter(initial=4, max_limit=8, decrease_interval=0)
+    for _ in range(40):
+        limiter.acquire()
+        limiter.release(0.1)
+    assert int(limiter.limit) == 8
+
+    limiter.acquire()
+    limiter.release(0.1, overloaded=True)
+    assert limiter.limit == 4
+
+    limiter.acquire()
+    limiter.release(1.0) # 10x a latência de base
+    assert limiter.limit == 2
+    assert limiter.in_flight == 0
+
+def test_token_bucket_limita_a_taxa():
+    """Depois da rajada inicial, as fichas são liberadas na taxa configurada."""
+    bucket = TokenBucket(rate=100, burst=2)
+    start = time.monotonic()
+    for _ in range(7):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.04
+
+def test_limitador_compartilhado_por_url_base():
+    """Clientes do mesmo servidor dividem o limitador; a configuração é por URL base."""
+    config = {"https://a.example": {"max_concurrency": 3}}
+    first = limiter_for("https://a.example/api/resource", config=config)
+    assert limiter_for("https://a.example/outro", config=config) is first
+    assert first.concurrency.max_limit == 3
+    other = limiter_for("https://b.example/api/resource", config=config, max_concurrency=5)
+    assert other is not first and other.concurrency.max_limit == 5
+
+def test_comeca_no_limite_maximo():
+    """Sem sobrecarga, o limitador não reduz a concorrência configurada."""
+    assert AdaptiveConcurrencyLimiter(max_limit=8).limit == 8
+    assert AdaptiveConcurrencyLimiter(initial=2, max_limit=8).limit == 2
+
+def test_linha_de_base_por_classe_de_requisicao():
+    """Uma página em lote lenta não é pico em relação aos documentos individuais, e vice-versa."""
+    limiter = AdaptiveConcurrencyLimiter(max_limit=8, decrease_interval=0)
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release(0.05, request_class="document:Asset")
+        limiter.acquire()
+        limiter.release(2.0, request_class="list:Asset")
+    assert limiter.limit == 8 and limiter.decreases == 0
+
+    limiter.acquire()
+    limiter.release(0.5, request_class="document:Asset") # 10x a base dos documentos
+    assert limiter.limit == 4
+
+def test_limite_se_recupera_apos_mudanca_permanente_de_latencia():
+    """Com o servidor 10x mais lento para sempre, a base acompanha e o limite volta ao máximo."""
+    limiter = AdaptiveConcurrencyLimiter(max_limit=8, decrease_interval=0)
+    for _ in range(20):
+        limiter.acquire()
+        limiter.release(0.1)
+    for _ in range(300):
+        limiter.acquire()
+        limiter.release(1.0)
+    assert limiter.decreases > 0
+    assert limiter.limit == 8
+    assert limiter.baselines[None] > 0.5
+
+def test_limitador_opcional_no_cliente(monkeypatch):
+    """O limitador só é ativado com ARTERIS_API_RATE_LIMIT=1 ou ARTERIS_API_RATE."""
+    monkeypatch.setenv("ARTERIS_API_BASE_URL", "https://opcional.example/api/resource")
+    monkeypatch.setenv("ARTERIS_API_TOKEN", "token x:y")
+    monkeypatch.delenv("ARTERIS_API_RATE_LIMIT", raising=False)
+    monkeypatch.delenv("ARTERIS_API_RATE", raising=False)
+    client = ArterisClient.from_env(pool_size=8)
+    assert client.rate_limiter is None
+    client.close()
+
+    monkeypatch.setenv("ARTERIS_API_RATE_LIMIT", "1")
+    client = ArterisClient.from_env(pool_size=12)
+    assert client.rate_limiter.concurrency.limit == 12
+    client.close()
+
+    monkeypatch.delenv("ARTERIS_API_RATE_LIMIT")
+    monkeypatch.setenv("ARTERIS_API_RATE_LIMITS", '{"https://opcional.example": {"max_concurrency": 6}}')
+    client = ArterisClient.from_env(pool_size=12)
+    assert client.rate_limiter is not None
+    client.close()
+    assert not has_rate_limit_config("https://outro.example/api", config={"https://opcional.example": {}})
+    assert has_rate_limit_config("https://outro.example/api", config={"*": {}})
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do módulo response_cache.py integrado ao ArterisClient: revalidação
+com ETag, TTL para respostas sem validadores, modo offline e respostas lidas
+em streaming.
+"""
+
+import io
+import os
+import sys
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+
+from api_client_data import _stream_records
+from arteris_client import ArterisClient
+from response_cache import ResponseCache
+
+def _response(status, body=b"", headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response.raw = io.BytesIO(body)
+    return response
+
+def _client(cache, responses, sent_headers):
+    client = ArterisClient("http://arteris.invalid/api/resource", "token x:y", response_cache=cache)
+    def fake_get(url, params=None, headers=None, **kwargs):
+        sent_headers.append(headers or {})
+        return responses.pop(0)
+    client.session.get = fake_get
+    return client
+
+def test_revalidacao_com_etag_e_ttl(tmp_path):
+    """Com ETag o GET é condicional e o 304 usa o corpo do cache; sem ETag vale o TTL."""
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=3600)
+    sent = []
+    client = _client(cache, [
+        _response(200, b'{"data": [1]}', {"ETag": '"v1"'}),
+        _response(304),
+        _response(200, b'{"data": [2]}'),
+    ], sent)
+
+    assert client.get("Asset", params={"limit_page_length": 0}).json() == {"data": [1]}
+    assert client.get("Asset", params={"limit_page_length": 0}).json() == {"data": [1]}
+    assert sent[1]["If-None-Match"] == '"v1"'
+
+    assert client.get("City").json() == {"data": [2]}
+    assert client.get("City").json() == {"data": [2]} # dentro do TTL, sem requisição
+    assert len(sent) == 3
+    assert cache.summary()["revalidated"] == 1 and cache.summary()["hits"] == 1
+
+    offline = _client(ResponseCache(cache.path, offline=True), [], sent)
+    assert offline.get("City").json() == {"data": [2]}
+    assert offline.get("Contract").status_code == 504
+    assert len(sent) == 3
+
+def test_listagem_em_streaming_nao_e_lida_inteira(tmp_path):
+    """A listagem em streaming é copiada para o cache enquanto é decodificada e relida em streaming."""
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=3600)
+    body = ('{"data": [' + ", ".join(f'{{"name": "a{i}"}}' for i in range(2000)) + ']}').encode("utf-8")
+    sent = []
+    streamed = _response(200, body)
+    client = _client(cache, [streamed], sent)
+
+    records = list(_stream_records(client, "Asset", {"limit_page_length": 0}))
+    assert len(records) == 2000
+    assert streamed._content is False # o corpo nunca foi montado em memória
+    entry = cache.lookup(cache.request_url(client.url("Asset"), {"limit_page_length": 0}))
+    assert entry["body"] == b"" and open(entry["body_file"], "rb").read() == body
+
+    cached = client.get("Asset", params={"limit_page_length": 0}, stream=True)
+    assert cached._content is False
+    cached.close()
+    assert list(_stream_records(client, "Asset", {"limit_page_length": 0})) == records
+    offline = _client(ResponseCache(cache.path, offline=True), [], sent)
+    assert list(_stream_records(offline, "Asset", {"limit_page_length": 0})) == records
+    assert len(sent) == 1
+
+def test_streaming_interrompido_nao_gera_entrada(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=3600)
+    body = ('{"data": [' + ", ".join(f'{{"name": "a{i}"}}' for i in range(20000)) + ']}').encode("utf-8")
+    client = _client(cache, [_response(200, body)], [])
+    records = _stream_records(client, "Asset", {})
+    next(records)
+    records.close()
+    assert cache.lookup(cache.request_url(client.url("Asset"), {})) is None
+    assert os.listdir(cache.body_dir) == []
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do módulo retry_policy.py e das novas tentativas do ArterisClient:
+classificação das falhas, Retry-After e abertura do circuit breaker.
+"""
+
+import io
+import os
+import sys
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+
+from arteris_client import ArterisClient
+from retry_policy import RetryPolicy, CircuitBreaker, RetryStats, parse_retry_after
+
+def _response(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response.raw = io.BytesIO(b"")
+    return response
+
+def test_classificacao_e_retry_after():
+    """429/5xx e timeouts são retentáveis, 4xx é fatal e Retry-After é respeitado."""
+    assert RetryPolicy.classify(_response(200)) is None
+    assert RetryPolicy.classify(_response(429)) == "429"
+    assert RetryPolicy.classify(_response(502)) == "502"
+    assert RetryPolicy.classify(_response(404)) == "fatal"
+    assert RetryPolicy.classify(error=requests.exceptions.ReadTimeout()) == "timeout"
+    assert RetryPolicy.classify(error=requests.exceptions.ConnectionError()) == "connection"
+
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("abc") is None
+    policy = RetryPolicy(backoff_base=0.01, backoff_max=10)
+    assert policy.delay(1, _response(429, {"Retry-After": "2"})) == 2.0
+    assert policy.delay(1) <= 0.01
+
+def test_client_repete_e_desiste():
+    """O cliente repete falhas transitórias e conta as novas tentativas e desistências."""
+    client = ArterisClient("http://arteris.invalid/api/resource", "token x:y",
+                           retry_policy=RetryPolicy(max_retries=2, backoff_base=0))
+    statuses = iter([503, 429, 200, 500, 500, 500, 404])
+    client.session.get = lambda *args, **kwargs: _response(next(statuses))
+
+    assert client.get("Asset").status_code == 200
+    assert client.get("Asset").status_code == 500
+    assert client.get("Asset").status_code == 404
+    summary = client.retry_stats.summary()
+    assert summary["attempts"] == 7
+    assert summary["retries"] == 4
+    assert summary["retries_by_reason"] == {"503": 1, "429": 1, "500": 2}
+    assert summary["give_ups"] == 1
+    assert summary["fatal"] == 1
+
+def test_circuit_breaker_abre_com_taxa_de_erro():
+    """O circuito abre quando a taxa de falhas atinge o limite na janela."""
+    stats = RetryStats()
+    breaker = CircuitBreaker(window=10, threshold=0.5, min_requests=4, cooldown=0, stats=stats)
+    for failed in (False, True, False):
+        breaker.record(failed)
+    assert stats.breaker_trips == 0
+    breaker.record(True)
+    assert stats.breaker_trips == 1
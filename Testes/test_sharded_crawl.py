@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Testes do módulo sharded_crawl.py: divisão do intervalo de nomes UUIDv7 em
+faixas contíguas e sem sobreposição.
+"""
+
+import os
+import sys
+
+# Adicionar o diretório raiz ao path para importar o módulo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sharded_crawl import split_name_range, uuid7_timestamp, uuid7_prefix
+
+FIRST = "01967343-b7d4-7e20-8a6f-1c2d3e4f5a6b"
+LAST = "0196a000-0000-7000-8000-000000000000"
+
+def test_faixas_cobrem_todo_o_intervalo():
+    """As faixas são contíguas, com pontas abertas, e cada nome cai em exatamente uma."""
+    assert uuid7_timestamp(FIRST) == 0x01967343b7d4
+    assert uuid7_prefix(0x01967343b7d4) == "01967343-b7d4"
+
+    ranges = split_name_range(FIRST, LAST, 4)
+    assert len(ranges) == 4
+    assert ranges[0][0] is None and ranges[-1][1] is None
+    for (_, upper), (lower, _) in zip(ranges, ranges[1:]):
+        assert upper == lower
+
+    for name in (FIRST, LAST, "01968000-0000-7abc-8000-000000000000"):
+        matches = [r for r in ranges if (r[0] is None or name >= r[0]) and (r[1] is None or name < r[1])]
+        assert len(matches) == 1
+
+def test_nomes_que_nao_sao_uuid7_usam_uma_faixa():
+    """Nomes fora do padrão UUIDv7 não são divididos."""
+    assert split_name_range("CT-0001", "CT-0999", 4) == [(None, None)]
+    assert split_name_range(FIRST, FIRST, 4) == [(None, None)]
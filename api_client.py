@@ -1,84 +1,84 @@
 import requests
 import json
-def get_arteris_doctypes(api_base_url, api_token):
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+def get_arteris_doctypes(client):
     """
     Busca todos os DocTypes da API Arteris que pertencem ao módulo 'Arteris' e não são do tipo Child Item .
 
     Args:
-        api_base_url (str): A URL base da API de recursos (ex: 'https://host/api/resource').
-        api_token (str): O token de autorização no formato 'token key:secret'.
+        client (ArterisClient): Cliente HTTP compartilhado (sessão, autenticação e timeouts).
 
     Returns:
         list or None: Uma lista de dicionários, onde cada dicionário representa um DocType
                       encontrado (contendo pelo menos a chave 'name').
                       Retorna None em caso de erro na requisição ou na decodificação JSON.
     """
-    doctype_url = f"{api_base_url}/DocType"
+    doctype_url = client.url("DocType")
     params = {
         # Filtra para buscar apenas DocTypes do módulo específico 'Arteris' e que não são tabelas (Child Item)
         # "filters": json.dumps([["module", "=", "Arteris"],["istable","!=","1"],["name","like","%Meas%"]])
         # "filters": json.dumps([["module", "=", "Arteris"],["istable","!=","1"],["name","=","Asset"]])
         "filters": json.dumps([["module", "=", "Arteris"],["istable","!=","1"]])
     }
-    headers = {"Authorization": api_token}
 
     try:
-        print(f"Buscando DocTypes em: {doctype_url}")
-        response = requests.get(doctype_url, headers=headers, params=params, timeout=30)
+        logger.debug("Buscando DocTypes em: %s", doctype_url)
+        response = client.get("DocType", params=params)
         response.raise_for_status() # Lança HTTPError para respostas 4xx/5xx
         data = response.json()
-        print("Lista de DocTypes recebida com sucesso!")
+        logger.debug("Lista de DocTypes recebida com sucesso!")
         # Retorna diretamente a lista contida na chave 'data' da resposta JSON
         return data.get("data", [])
     except requests.exceptions.RequestException as e:
         # Captura erros de conexão, timeout, etc.
-        print(f"Erro ao buscar DocTypes da API: {e}")
+        logger.error("Erro ao buscar DocTypes da API: %s", e)
         return None
     except json.JSONDecodeError:
         # Captura erro se a resposta não for um JSON válido
-        print("Erro ao decodificar a resposta JSON dos DocTypes.")
+        logger.error("Erro ao decodificar a resposta JSON dos DocTypes.")
         return None
     
-def get_arteris_doctypes_child(api_base_url, api_token):
+def get_arteris_doctypes_child(client):
     """
     Busca todos os DocTypes da API Arteris que pertencem ao módulo 'Arteris' do tipo Child Item .
 
     Args:
-        api_base_url (str): A URL base da API de recursos (ex: 'https://host/api/resource').
-        api_token (str): O token de autorização no formato 'token key:secret'.
+        client (ArterisClient): Cliente HTTP compartilhado (sessão, autenticação e timeouts).
 
     Returns:
         list or None: Uma lista de dicionários, onde cada dicionário representa um DocType
                       encontrado (contendo pelo menos a chave 'name').
                       Retorna None em caso de erro na requisição ou na decodificação JSON.
     """
-    doctype_url = f"{api_base_url}/DocType"
+    doctype_url = client.url("DocType")
     params = {
         # Filtra para buscar apenas DocTypes do módulo específico 'Arteris' e que não são tabelas (Child Item)
         # "filters": json.dumps([["module", "=", "Arteris"],["istable","=","1"],["name","like","%Meas%"]])
         # "filters": json.dumps([["module", "=", "Arteris"],["istable","=","1"],["name","=","Asset Operator"]])
         "filters": json.dumps([["module", "=", "Arteris"],["istable","=","1"]])
     }
-    headers = {"Authorization": api_token}
 
     try:
-        print(f"Buscando DocTypes em: {doctype_url}")
-        response = requests.get(doctype_url, headers=headers, params=params, timeout=30)
+        logger.debug("Buscando DocTypes em: %s", doctype_url)
+        response = client.get("DocType", params=params)
         response.raise_for_status() # Lança HTTPError para respostas 4xx/5xx
         data = response.json()
-        print("Lista de DocTypes recebida com sucesso!")
+        logger.debug("Lista de DocTypes recebida com sucesso!")
         # Retorna diretamente a lista contida na chave 'data' da resposta JSON
         return data.get("data", [])
     except requests.exceptions.RequestException as e:
         # Captura erros de conexão, timeout, etc.
-        print(f"Erro ao buscar DocTypes da API: {e}")
+        logger.error("Erro ao buscar DocTypes da API: %s", e)
         return None
     except json.JSONDecodeError:
         # Captura erro se a resposta não for um JSON válido
-        print("Erro ao decodificar a resposta JSON dos DocTypes.")
+        logger.error("Erro ao decodificar a resposta JSON dos DocTypes.")
         return None    
 
-def get_docfields_for_doctype(api_base_url, api_token, doctype_name, child=False):
+def get_docfields_for_doctype(client, doctype_name, child=False):
     """
     Busca os DocFields (metadados dos campos) para um DocType específico.
 
@@ -86,8 +86,7 @@ def get_docfields_for_doctype(api_base_url, api_token, doctype_name, child=False
     seleciona apenas 'fieldname', 'label' e 'fieldtype'.
 
     Args:
-        api_base_url (str): A URL base da API de recursos.
-        api_token (str): O token de autorização.
+        client (ArterisClient): Cliente HTTP compartilhado (sessão, autenticação e timeouts).
         doctype_name (str): O nome do DocType para o qual buscar os campos.
 
     Returns:
@@ -96,7 +95,7 @@ def get_docfields_for_doctype(api_base_url, api_token, doctype_name, child=False
                       Retorna None em caso de erro na requisição ou na decodificação JSON.
                       Retorna uma lista vazia se nenhum campo for encontrado após os filtros.
     """
-    docfield_url = f"{api_base_url}/DocField"
+    docfield_url = client.url("DocField")
     params = {
         # Define quais campos do DocField queremos retornar
         # Se child=True adiciona "parent" aos fields
@@ -115,25 +114,126 @@ def get_docfields_for_doctype(api_base_url, api_token, doctype_name, child=False
     # # Se child adiciona "parent" aos fields
     # if child:
     #     params["fields"].append("parent")
-    print(f"{params}")
+    logger.debug("%s", params)
             
-    headers = {"Authorization": api_token}
 
     try:
-        print(f"Buscando DocFields para: {doctype_name}")
-        response = requests.get(docfield_url, headers=headers, params=params, timeout=30)
+        logger.debug("Buscando DocFields para: %s", doctype_name)
+        response = client.get("DocField", params=params)
         response.raise_for_status() # Lança HTTPError para respostas 4xx/5xx
         data = response.json()
         docfields = data.get("data", [])
-        print(f"DocFields para {doctype_name} recebidos com sucesso!")
-        print(f"\n{docfields}\n--------------------------------------")
+        logger.debug("DocFields para %s recebidos com sucesso!", doctype_name)
+        logger.debug("%s\n--------------------------------------", docfields)
         # Retorna a lista de campos da chave 'data'
         return data.get("data", [])
     except requests.exceptions.RequestException as e:
         # Captura erros de conexão, timeout, etc.
-        print(f"Erro ao buscar DocFields para {doctype_name}: {e}")
+        logger.error("Erro ao buscar DocFields para %s: %s", doctype_name, e)
         return None
     except json.JSONDecodeError:
         # Captura erro se a resposta não for um JSON válido
-        print(f"Erro ao decodificar a resposta JSON dos DocFields para {doctype_name}.")
+        logger.error("Erro ao decodificar a resposta JSON dos DocFields para %s.", doctype_name)
+        return None
+
+
+# Tipos de campo que nunca viram atributos nem relacionamentos (apenas layout)
+LAYOUT_FIELDTYPES = ["Section Break", "Column Break", "Tab Break"]
+
+def get_arteris_doctypes_all(client):
+    """
+    Busca, em uma única chamada, todos os DocTypes do módulo 'Arteris'
+    (normais e Child Item), incluindo 'istable' e 'modified' (usado para
+    validar o cache de metadados).
+
+    Args:
+        client (ArterisClient): Cliente HTTP compartilhado (sessão, autenticação e timeouts).
+
+    Returns:
+        list or None: Lista de dicionários com 'name', 'istable' e 'modified'.
+                      Retorna None em caso de erro na requisição ou na decodificação JSON.
+    """
+    doctype_url = client.url("DocType")
+    params = {
+        "fields": json.dumps(["name", "istable", "modified"]),
+        "filters": json.dumps([["module", "=", "Arteris"]]),
+        # 0 = sem limite; o padrão do Frappe (20) truncaria a lista
+        "limit_page_length": 0
+    }
+
+    try:
+        logger.debug("Buscando todos os DocTypes (com istable) em: %s", doctype_url)
+        response = client.get("DocType", params=params)
+        response.raise_for_status() # Lança HTTPError para respostas 4xx/5xx
+        data = response.json()
+        logger.debug("Lista de DocTypes recebida com sucesso!")
+        return data.get("data", [])
+    except requests.exceptions.RequestException as e:
+        logger.error("Erro ao buscar DocTypes da API: %s", e)
+        return None
+    except json.JSONDecodeError:
+        logger.error("Erro ao decodificar a resposta JSON dos DocTypes.")
         return None
+
+def get_docfields_bulk(client, doctype_names, page_size=1000, chunk_size=100):
+    """
+    Busca os DocFields de vários DocTypes de uma só vez, usando o filtro
+    'parent in [...]' com paginação, e agrupa o resultado por DocType no cliente.
+
+    Retorna o mesmo conjunto de campos de get_docfields_for_doctype: só as
+    quebras de seção/coluna/aba são excluídas no servidor. Campos ocultos e de
+    fórmula ('f_'/'fm_') são mantidos (ex: uma tabela filha oculta continua no
+    mapeamento child -> parent) e filtrados depois por is_hierarchy_field.
+
+    Args:
+        client (ArterisClient): Cliente HTTP compartilhado (sessão, autenticação e timeouts).
+        doctype_names (list): Nomes dos DocTypes cujos campos serão buscados.
+        page_size (int): Quantidade de DocFields por página.
+        chunk_size (int): Quantidade máxima de DocTypes por filtro 'in', para
+                          manter a URL da requisição em um tamanho seguro.
+
+    Returns:
+        dict or None: Dicionário {doctype_name: [docfields]} (inclui 'parent' em cada campo),
+                      com uma lista vazia para DocTypes sem campos.
+                      Retorna None em caso de erro na requisição ou na decodificação JSON.
+    """
+    grouped = {name: [] for name in doctype_names}
+
+    for start in range(0, len(doctype_names), chunk_size):
+        chunk = doctype_names[start:start + chunk_size]
+        filters = [
+            ["parent", "in", chunk],
+            ["fieldtype", "not in", LAYOUT_FIELDTYPES]
+        ]
+        limit_start = 0
+        while True:
+            params = {
+                "fields": json.dumps(["fieldname", "label", "fieldtype", "options", "hidden", "parent"]),
+                "filters": json.dumps(filters),
+                # Mantém a ordem dos campos no formulário
+                "order_by": "parent asc, idx asc",
+                "limit_start": limit_start,
+                "limit_page_length": page_size,
+                "parent": "DocType"
+            }
+            try:
+                logger.debug("Buscando DocFields em lote (%s DocTypes, início %s)", len(chunk), limit_start)
+                response = client.get("DocField", params=params)
+                response.raise_for_status() # Lança HTTPError para respostas 4xx/5xx
+                page = response.json().get("data", [])
+            except requests.exceptions.RequestException as e:
+                logger.error("Erro ao buscar DocFields em lote: %s", e)
+                return None
+            except json.JSONDecodeError:
+                logger.error("Erro ao decodificar a resposta JSON dos DocFields em lote.")
+                return None
+
+            for field in page:
+                grouped.setdefault(field.get("parent"), []).append(field)
+
+            if len(page) < page_size:
+                break
+            limit_start += page_size
+
+    logger.info("DocFields em lote recebidos para %s DocTypes.", len(grouped))
+    return grouped
@@ -1,37 +1,163 @@
 import requests
 import json
 
-def get_keys(api_base_url, api_token, doctype_name):
+from api_client import LAYOUT_FIELDTYPES
+from json_stream import iter_json_array, DEFAULT_STREAM_CHUNK_SIZE
+from hierarchy_fields import is_hierarchy_field
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Quantidade padrão de registros por página nas listagens
+DEFAULT_PAGE_SIZE = 1000
+# Quantidade máxima de pais por filtro 'parent in [...]' (mantém a URL em um tamanho seguro)
+DEFAULT_CHILD_CHUNK_SIZE = 100
+# Propriedades de controle do Frappe removidas dos documentos retornados
+PROPERTIES_TO_REMOVE = ['owner', 'creation', 'modified', 'modified_by', 'docstatus', 'idx', 'parentfield' , 'parenttype', 'is_group']
+
+def _keyset_params(fields, filters, page_size, parent_doctype, last_name):
+    """Monta os parâmetros de uma página da listagem com paginação por chave."""
+    fields = list(fields or ["name"])
+    if "name" not in fields and "*" not in fields:
+        fields.append("name") # Necessário para avançar o cursor
+    page_filters = list(filters or [])
+    if last_name is not None:
+        page_filters.append(["name", ">", last_name])
+    params = {
+        "fields": json.dumps(fields),
+        "filters": json.dumps(page_filters),
+        "order_by": "name asc",
+        "limit_page_length": page_size
+    }
+    if parent_doctype:
+        params["parent"] = parent_doctype
+    return params
+
+def _stream_records(client, doctype_name, params):
+    """
+    Faz o GET de uma página da listagem e entrega os registros à medida que são
+    decodificados do corpo da resposta (ver json_stream.iter_json_array), sem
+    montar a página inteira em memória.
+    """
+    response = client.get(doctype_name, params=params, stream=True)
+    try:
+        response.raise_for_status() # Lança HTTPError para respostas 4xx/5xx
+        yield from iter_json_array(response.iter_content(chunk_size=DEFAULT_STREAM_CHUNK_SIZE))
+    finally:
+        response.close() # Devolve a conexão ao pool mesmo se o consumidor parar antes do fim
+
+def iter_records(client, doctype_name, fields=None, filters=None, page_size=DEFAULT_PAGE_SIZE, parent_doctype=None):
+    """
+    Percorre os registros de um DocType com paginação por chave (keyset).
+
+    Cada página é pedida com o filtro 'name > último name visto', ordenada por
+    'name'. Diferente da paginação por offset (limit_start), o custo de cada
+    página no servidor não cresce com a posição na tabela. O corpo de cada
+    página é decodificado em streaming: cada registro é entregue assim que
+    chega, e a memória usada é proporcional a um registro, não a uma página.
+
+    Args:
+        client (ArterisClient): Cliente HTTP compartilhado (sessão, autenticação e timeouts).
+        doctype_name (str): O nome do DocType (ex: 'Asset').
+        fields (list, optional): Campos a retornar (padrão: apenas 'name').
+        filters (list, optional): Filtros adicionais no formato do Frappe.
+        page_size (int): Quantidade de registros por página.
+        parent_doctype (str, optional): DocType pai, exigido pelo Frappe ao listar
+                                        DocTypes do tipo Child Item.
+
+    Yields:
+        dict: Cada registro, em ordem crescente de 'name'.
+
+    Raises:
+        requests.exceptions.RequestException: Em caso de erro na requisição.
+        json.JSONDecodeError: Se a resposta não for um JSON válido.
+    """
+    last_name = None
+    while True:
+        params = _keyset_params(fields, filters, page_size, parent_doctype, last_name)
+        count = 0
+        for record in _stream_records(client, doctype_name, params):
+            count += 1
+            last_name = record["name"]
+            yield record
+        if count < page_size:
+            return
+
+def iter_pages(client, doctype_name, fields=None, filters=None, page_size=DEFAULT_PAGE_SIZE, parent_doctype=None):
+    """
+    Percorre os registros de um DocType agrupados por página (ver iter_records).
+
+    Útil quando o chamador precisa da página inteira (ex: buscar as tabelas
+    filhas com 'parent in [...]'); os argumentos são os mesmos de iter_records.
+
+    Yields:
+        list: Cada página (lista de registros), à medida que chega.
+
+    Raises:
+        requests.exceptions.RequestException: Em caso de erro na requisição.
+        json.JSONDecodeError: Se a resposta não for um JSON válido.
+    """
+    last_name = None
+    while True:
+        # A página é lida até o fim antes de ser entregue, liberando a conexão
+        page = list(_stream_records(
+            client, doctype_name, _keyset_params(fields, filters, page_size, parent_doctype, last_name)))
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        last_name = page[-1]["name"]
+
+def iter_keys(client, doctype_name, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Percorre as chaves (name) de um DocType com paginação por chave,
+    entregando-as assim que cada página chega.
+
+    Args:
+        client (ArterisClient): Cliente HTTP compartilhado (sessão, autenticação e timeouts).
+        doctype_name (str): O nome do DocType do qual buscar as chaves (ex: 'Asset').
+        page_size (int): Quantidade de chaves por página.
+
+    Yields:
+        str: Cada chave, em ordem crescente.
+
+    Raises:
+        requests.exceptions.RequestException: Em caso de erro na requisição.
+        json.JSONDecodeError: Se a resposta não for um JSON válido.
+    """
+    for record in iter_records(client, doctype_name, page_size=page_size):
+        yield record["name"]
+
+def get_keys(client, doctype_name, page_size=DEFAULT_PAGE_SIZE):
     """
     Busca as chaves de um DocType específico na API Arteris.
+
+    Todas as páginas são lidas (ver iter_keys), então DocTypes grandes não são
+    truncados pelo limite padrão de uma página do Frappe.
+
     Args:
-        api_base_url (str): A URL base da API de recursos (ex: 'https://host/api/resource').
-        api_token (str): O token de autorização no formato 'token key
+        client (ArterisClient): Cliente HTTP compartilhado (sessão, autenticação e timeouts).
         doctype_name (str): O nome do DocType do qual buscar as chaves (ex: 'Asset').
+        page_size (int): Quantidade de chaves por página.
     Returns:
         list or None: Uma lista de strings contendo os valores das chaves do DocType.
                       Retorna None em caso de erro na requisição ou na decodificação JSON.
     """
-    resource_url = f"{api_base_url}/{doctype_name}"
-    params = {}
-    headers = {"Authorization": api_token}
+    resource_url = client.url(doctype_name)
 
     try:
-        print(f"Buscando chaves para DocType '{doctype_name}' em: {resource_url}")
-        response = requests.get(resource_url, headers=headers, params=params, timeout=30)
-        response.raise_for_status() # Lança HTTPError para respostas 4xx/5xx
-        data = response.json()
-        keys = [item["name"] for item in data.get("data", [])]
-        print(f"Chaves para '{doctype_name}' recebidas com sucesso!\n{keys}")
-        # Retorna a lista de chaves contida na chave 'data' da resposta JSON
+        logger.debug("Buscando chaves para DocType '%s' em: %s", doctype_name, resource_url)
+        keys = list(iter_keys(client, doctype_name, page_size=page_size))
+        logger.debug("Chaves para '%s' recebidas com sucesso!\n%s", doctype_name, keys)
+        # Retorna a lista de chaves de todas as páginas
         return keys
     except requests.exceptions.RequestException as e:
         # Captura erros de conexão, timeout, etc.
-        print(f"Erro ao buscar chaves para {doctype_name}: {e}")
+        logger.error("Erro ao buscar chaves para %s: %s", doctype_name, e)
         return None
     except json.JSONDecodeError:
         # Captura erro se a resposta não for um JSON válido
-        print(f"Erro ao decodificar a resposta JSON das chaves para {doctype_name}.")
+        logger.error("Erro ao decodificar a resposta JSON das chaves para %s.", doctype_name)
         return None
 
 def remove_properties_recursively(data, properties_to_remove):
@@ -62,12 +188,11 @@ def remove_properties_recursively(data, properties_to_remove):
             
     return data
 
-def get_data_from_key(api_base_url, api_token, doctype_name, key):
+def get_data_from_key(client, doctype_name, key):
     """
     Busca os dados de um DocType específico na API Arteris usando uma chave.
     Args:
-        api_base_url (str): A URL base da API de recursos (ex: 'https://host/api/resource').
-        api_token (str): O token de autorização no formato 'token key
+        client (ArterisClient): Cliente HTTP compartilhado (sessão, autenticação e timeouts).
         doctype_name (str): O nome do DocType do qual buscar os dados (ex: 'Asset').
         key (str): A chave do DocType para buscar os dados.
     Returns:
@@ -75,35 +200,210 @@ def get_data_from_key(api_base_url, api_token, doctype_name, key):
         As seguintes propriedades são removidas do JSON retornado (incluindo em objetos aninhados):
         'owner', 'creation', 'modified', 'modified_by', 'docstatus', 'idx'
     """
-    resource_url = f"{api_base_url}/{doctype_name}/{key}"
+    resource_path = f"{doctype_name}/{key}"
+    resource_url = client.url(resource_path)
     params = {}
-    headers = {"Authorization": api_token}
 
     try:
-        print(f"Buscando dados para DocType '{doctype_name}' usando a chave '{key}' em: {resource_url}")
-        response = requests.get(resource_url, headers=headers, params=params, timeout=30)
+        logger.debug("Buscando dados para DocType '%s' usando a chave '%s' em: %s", doctype_name, key, resource_url)
+        # Busca de um documento: idempotente e curta, pode receber uma cópia (hedge) se demorar
+        response = client.get(resource_path, params=params, hedge=True)
         response.raise_for_status() # Lança HTTPError para respostas 4xx/5xx
         data = response.json()
         # Verifica se a resposta contém dados
         if "data" in data:
-            print(f"Dados para '{doctype_name}' com chave '{key}' recebidos com sucesso!")
+            logger.debug("Dados para '%s' com chave '%s' recebidos com sucesso!", doctype_name, key)
             
             # Remove as propriedades especificadas recursivamente
             data_filtered = data["data"]
-            properties_to_remove = ['owner', 'creation', 'modified', 'modified_by', 'docstatus', 'idx', 'parentfield' , 'parenttype', 'is_group']
-            
+
             # Aplica a remoção recursiva de propriedades
-            data_filtered = remove_properties_recursively(data_filtered, properties_to_remove)
+            data_filtered = remove_properties_recursively(data_filtered, PROPERTIES_TO_REMOVE)
             
             return data_filtered
         else:
-            print(f"Nenhum dado encontrado para '{doctype_name}' com chave '{key}'.")
+            logger.debug("Nenhum dado encontrado para '%s' com chave '%s'.", doctype_name, key)
             return None
     except requests.exceptions.RequestException as e:
         # Captura erros de conexão, timeout, etc.
-        print(f"Erro ao buscar chaves para {doctype_name}: {e}")
+        logger.error("Erro ao buscar chaves para %s: %s", doctype_name, e)
         return None
     except json.JSONDecodeError:
         # Captura erro se a resposta não for um JSON válido
-        print(f"Erro ao decodificar a resposta JSON das chaves para {doctype_name}.")
-        return None    
\ No newline at end of file
+        logger.error("Erro ao decodificar a resposta JSON das chaves para %s.", doctype_name)
+        return None
+
+def get_table_fields(doctypes_with_fields, doctype_name):
+    """
+    Lista os campos do tipo 'Table' de um DocType.
+
+    Args:
+        doctypes_with_fields (dict): Dicionário {doctype_name: fields_metadata_list}.
+        doctype_name (str): O nome do DocType.
+
+    Returns:
+        list: Tuplas (fieldname, child_doctype) na ordem dos metadados.
+    """
+    table_fields = []
+    for field in doctypes_with_fields.get(doctype_name) or []:
+        if field.get("fieldtype") == "Table" and field.get("fieldname") and field.get("options"):
+            table_fields.append((field["fieldname"], field["options"]))
+    return table_fields
+
+def get_link_fields(doctypes_with_fields, doctype_name):
+    """
+    Lista os campos do tipo 'Link' de um DocType.
+
+    Args:
+        doctypes_with_fields (dict): Dicionário {doctype_name: fields_metadata_list}.
+        doctype_name (str): O nome do DocType.
+
+    Returns:
+        list: Tuplas (fieldname, linked_doctype) na ordem dos metadados.
+    """
+    link_fields = []
+    for field in doctypes_with_fields.get(doctype_name) or []:
+        if field.get("fieldtype") == "Link" and field.get("fieldname") and field.get("options"):
+            link_fields.append((field["fieldname"], field["options"]))
+    return link_fields
+
+def get_projected_fields(doctypes_with_fields, doctype_name, is_child=False):
+    """
+    Lista as colunas de um DocType que a estrutura hierárquica realmente usa.
+
+    Usa o mesmo critério de process_fields_for_hierarchy (is_hierarchy_field):
+    campos ocultos, de fórmula e de controle ficam de fora. Campos Table e de
+    layout não são colunas da listagem e também são excluídos (as tabelas
+    filhas são buscadas à parte). Links são mantidos, pois o valor é a chave
+    do documento vinculado.
+
+    Args:
+        doctypes_with_fields (dict): Dicionário {doctype_name: fields_metadata_list}.
+        doctype_name (str): O nome do DocType.
+        is_child (bool): Se True, inclui 'parent' e 'idx', usados para remontar as tabelas filhas.
+
+    Returns:
+        list or None: Fieldnames para o parâmetro 'fields' da listagem, começando por 'name',
+                      ou None se não houver metadados do DocType (busca todas as colunas).
+    """
+    fields_metadata = doctypes_with_fields.get(doctype_name)
+    if not fields_metadata:
+        return None
+    fields = ["name"]
+    for field in fields_metadata:
+        if not is_hierarchy_field(field):
+            continue
+        if field.get("fieldtype") == "Table" or field.get("fieldtype") in LAYOUT_FIELDTYPES:
+            continue
+        if field["fieldname"] not in fields:
+            fields.append(field["fieldname"])
+    if is_child:
+        fields.extend(["parent", "idx"])
+    return fields
+
+def _clean_list_row(row, properties_to_remove):
+    """Remove de uma linha da listagem as propriedades de controle e as colunas internas ('_user_tags', ...)."""
+    for prop in list(row):
+        if prop in properties_to_remove or prop.startswith("_"):
+            del row[prop]
+    return row
+
+def iter_doctype_data_bulk(client, doctype_name, table_fields, filters=None, page_size=DEFAULT_PAGE_SIZE,
+                           child_chunk_size=DEFAULT_CHILD_CHUNK_SIZE, properties_to_remove=PROPERTIES_TO_REMOVE,
+                           fields=None, child_fields=None):
+    """
+    Carrega os documentos de um DocType em lote, sem uma requisição por documento.
+
+    Os registros pai são lidos pela listagem com fields=["*"] em páginas grandes.
+    Para cada página, cada tabela filha é buscada de uma vez com 'parent in [...]'
+    e as linhas são remontadas em memória dentro de cada documento, ordenadas
+    por 'idx', no mesmo formato retornado por get_data_from_key.
+
+    Args:
+        client (ArterisClient): Cliente HTTP compartilhado (sessão, autenticação e timeouts).
+        doctype_name (str): O nome do DocType (ex: 'Contract Measurement').
+        table_fields (list): Tuplas (fieldname, child_doctype) (ver get_table_fields).
+        filters (list, optional): Filtros adicionais aplicados aos registros pai.
+        page_size (int): Quantidade de registros por página.
+        child_chunk_size (int): Quantidade máxima de pais por filtro 'parent in [...]'.
+        properties_to_remove (list): Propriedades removidas de pais e filhos.
+        fields (list, optional): Colunas pedidas para os registros pai (padrão: ["*"]).
+        child_fields (dict, optional): {child_doctype: colunas} para as tabelas filhas;
+            DocTypes ausentes usam ["*"]. As colunas devem incluir 'parent' e 'idx'.
+
+    Yields:
+        dict: {"doctype": doctype_name, "key": name, "data": documento}, na ordem de 'name'.
+
+    Raises:
+        requests.exceptions.RequestException: Em caso de erro na requisição.
+        json.JSONDecodeError: Se a resposta não for um JSON válido.
+    """
+    child_fields = child_fields or {}
+    for page in iter_pages(client, doctype_name, fields or ["*"], filters, page_size):
+        names = [row["name"] for row in page]
+        # (parent, fieldname) -> linhas da tabela filha
+        child_rows = {}
+        for fieldname, child_doctype in table_fields:
+            for start in range(0, len(names), child_chunk_size):
+                child_filters = [
+                    ["parent", "in", names[start:start + child_chunk_size]],
+                    ["parenttype", "=", doctype_name],
+                    ["parentfield", "=", fieldname]
+                ]
+                for row in iter_records(client, child_doctype, child_fields.get(child_doctype) or ["*"],
+                                        child_filters, page_size,
+                                        parent_doctype=doctype_name):
+                    child_rows.setdefault((row.get("parent"), fieldname), []).append(row)
+
+        for row in page:
+            name = row["name"]
+            data = _clean_list_row(row, properties_to_remove)
+            if data.get("parent") is None:
+                data.pop("parent", None) # Coluna sem significado em documentos que não são filhos
+            data["doctype"] = doctype_name
+            for fieldname, child_doctype in table_fields:
+                rows = sorted(child_rows.get((name, fieldname), []), key=lambda r: r.get("idx") or 0)
+                for child in rows:
+                    _clean_list_row(child, properties_to_remove)
+                    child["doctype"] = child_doctype
+                data[fieldname] = rows
+            yield {"doctype": doctype_name, "key": name, "data": data}
+
+def get_doctype_data_bulk(client, doctype_name, doctypes_with_fields, page_size=DEFAULT_PAGE_SIZE,
+                          project_fields=False):
+    """
+    Busca todos os documentos de um DocType em lote (ver iter_doctype_data_bulk).
+
+    Args:
+        client (ArterisClient): Cliente HTTP compartilhado (sessão, autenticação e timeouts).
+        doctype_name (str): O nome do DocType (ex: 'Asset').
+        doctypes_with_fields (dict): Metadados {doctype_name: fields}, usados para
+                                     descobrir as tabelas filhas.
+        page_size (int): Quantidade de registros por página.
+        project_fields (bool): Se True, pede apenas as colunas usadas pela estrutura
+                               hierárquica (ver get_projected_fields) em vez de ["*"].
+
+    Returns:
+        list or None: Lista de {"doctype", "key", "data"}, no formato de all_doctype_data.
+                      Retorna None em caso de erro na requisição ou na decodificação JSON.
+    """
+    table_fields = get_table_fields(doctypes_with_fields, doctype_name)
+    fields, child_fields = None, None
+    if project_fields:
+        fields = get_projected_fields(doctypes_with_fields, doctype_name)
+        child_fields = {
+            child_doctype: get_projected_fields(doctypes_with_fields, child_doctype, is_child=True)
+            for _, child_doctype in table_fields
+        }
+    try:
+        logger.debug("Buscando documentos de '%s' em lote (%s tabelas filhas)", doctype_name, len(table_fields))
+        documents = list(iter_doctype_data_bulk(client, doctype_name, table_fields, page_size=page_size,
+                                                fields=fields, child_fields=child_fields))
+        logger.info("%s documentos de '%s' recebidos com sucesso!", len(documents), doctype_name)
+        return documents
+    except requests.exceptions.RequestException as e:
+        logger.error("Erro ao buscar documentos em lote para %s: %s", doctype_name, e)
+        return None
+    except json.JSONDecodeError:
+        logger.error("Erro ao decodificar a resposta JSON dos documentos de %s.", doctype_name)
+        return None
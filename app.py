@@ -1,6 +1,4 @@
 import os
-import json
-import io
 import sys
 from flask import Flask, render_template, jsonify, request
 from flask_socketio import SocketIO, emit
@@ -12,8 +10,13 @@ from flask_cors import CORS # Importar CORS
 # eventlet.monkey_patch() # REMOVIDO: Monkey-patching pode causar o RecursionError
 
 # Importa as funções dos módulos existentes
+from arteris_client import ArterisClient
 from get_docktypes import process_arteris_doctypes
-from api_client_data import get_keys, get_data_from_key
+from metadata_cache import MetadataCache, DEFAULT_TTL_SECONDS
+from response_cache import ResponseCache, DEFAULT_RESPONSE_TTL_SECONDS
+from fetch_executor import FetchExecutor
+from crawl_planner import plan_crawl, print_plan
+from log_config import configure_logging
 from json_to_entity_transformer import create_hierarchical_doctype_structure
 
 # Carrega variáveis de ambiente do arquivo .env
@@ -31,6 +34,32 @@ CORS(app, resources={r"/api/*": {"origins": "http://localhost:3000"}})
 # Variável global para armazenar o JSON gerado
 generated_json_data = None
 
+# Cliente HTTP compartilhado entre as gerações (mantém as conexões abertas)
+api_client_instance = None
+
+# Cache local de metadados, ativado pela variável ARTERIS_METADATA_CACHE (caminho do SQLite)
+metadata_cache = None
+if os.getenv("ARTERIS_METADATA_CACHE"):
+    metadata_cache = MetadataCache(
+        os.getenv("ARTERIS_METADATA_CACHE"),
+        ttl_seconds=float(os.getenv("ARTERIS_METADATA_TTL", DEFAULT_TTL_SECONDS)))
+
+# Cache local das respostas da API, ativado por ARTERIS_RESPONSE_CACHE (caminho do SQLite);
+# com ARTERIS_OFFLINE=1 as gerações usam apenas esse cache
+response_cache = None
+if os.getenv("ARTERIS_RESPONSE_CACHE"):
+    response_cache = ResponseCache(
+        os.getenv("ARTERIS_RESPONSE_CACHE"),
+        ttl_seconds=float(os.getenv("ARTERIS_RESPONSE_TTL", DEFAULT_RESPONSE_TTL_SECONDS)),
+        offline=os.getenv("ARTERIS_OFFLINE") == "1")
+
+def _get_api_client():
+    """Retorna o cliente HTTP compartilhado, criando-o na primeira chamada."""
+    global api_client_instance
+    if api_client_instance is None:
+        api_client_instance = ArterisClient.from_env(response_cache=response_cache)
+    return api_client_instance
+
 # --- Captura de Logs ---
 class SocketIOHandler:
     """Um manipulador para redirecionar prints para o Socket.IO."""
@@ -47,27 +76,34 @@ class SocketIOHandler:
 original_stdout = sys.stdout
 sys.stdout = SocketIOHandler()
 
+# Os loggers dos módulos escrevem no sys.stdout atual, ou seja, no handler acima;
+# com ARTERIS_QUIET=1 só avisos, erros e o progresso amostrado chegam ao navegador
+configure_logging()
+
 import traceback # Adicionar import no topo se não existir (já existe na linha 149, mas melhor garantir)
 
 # --- Função Auxiliar para Geração ---
-def _generate_entity_structure():
+def _generate_entity_structure(force_refresh=False):
     """
     Função auxiliar que encapsula a lógica de busca e transformação.
     Retorna a estrutura de entidades ou lança uma exceção em caso de erro.
+
+    Args:
+        force_refresh (bool): Ignora o cache de metadados (se ativo) e busca tudo novamente.
     """
     print("--- Iniciando Geração Interna ---")
-    # Obtém a URL base e o token das variáveis de ambiente
-    api_base_url = os.getenv("ARTERIS_API_BASE_URL")
-    api_token = os.getenv("ARTERIS_API_TOKEN")
+    # Obtém o cliente HTTP compartilhado (configurado pelas variáveis de ambiente)
+    client = _get_api_client()
 
-    if not api_base_url or not api_token:
+    if client is None:
         error_msg = "Erro: Variáveis de ambiente ARTERIS_API_BASE_URL ou ARTERIS_API_TOKEN não definidas."
         print(error_msg)
         raise ValueError(error_msg) # Lança exceção para ser capturada
 
     # --- Etapa 1: Processar DocTypes e Fields ---
     print("--- Buscando DocTypes e Fields ---")
-    all_doctypes, child_parent_mapping, doctypes_with_fields = process_arteris_doctypes(api_base_url, api_token)
+    all_doctypes, child_parent_mapping, doctypes_with_fields = process_arteris_doctypes(
+        client, cache=metadata_cache, force_refresh=force_refresh)
 
     if all_doctypes is None:
          error_msg = "Falha ao buscar DocTypes."
@@ -108,7 +144,8 @@ def get_generated_json():
 def api_generate_entity_structure():
     """Endpoint da API para gerar e retornar a estrutura de entidades."""
     try:
-        entity_structure = _generate_entity_structure()
+        # ?refresh=1 ignora o cache de metadados
+        entity_structure = _generate_entity_structure(force_refresh=request.args.get('refresh') == '1')
         # Retorna diretamente a lista de entidades
         return jsonify(entity_structure.get('entities', []))
     except ValueError as e: # Erro de configuração
@@ -133,7 +170,7 @@ def handle_disconnect():
     print("Cliente desconectado") # Isso também será enviado via Socket.IO
 
 @socketio.on('start_generation')
-def handle_start_generation(message): # message não é usado, mas mantido pela assinatura do evento
+def handle_start_generation(message): # message pode trazer {"force_refresh": true}
     """Inicia o processo de geração de entidades via Socket.IO."""
     global generated_json_data
     generated_json_data = None # Limpa o JSON anterior
@@ -142,7 +179,8 @@ def handle_start_generation(message): # message não é usado, mas mantido pela
 
     try:
         # Chama a função auxiliar refatorada
-        entity_structure = _generate_entity_structure()
+        force_refresh = bool(message.get('force_refresh')) if isinstance(message, dict) else False
+        entity_structure = _generate_entity_structure(force_refresh=force_refresh)
         generated_json_data = entity_structure # Armazena o JSON gerado globalmente
         print("\n--- Geração Concluída (via Socket.IO) ---")
         # Emite sucesso e opcionalmente os dados (decidi não enviar dados grandes via socket)
@@ -160,6 +198,37 @@ def handle_start_generation(message): # message não é usado, mas mantido pela
     finally:
         emit('generation_finished') # Sinaliza o fim, mesmo com erro
 
+@socketio.on('plan_crawl')
+def handle_plan_crawl(message): # message pode trazer {"mode": "per_key", "page_size": 500}
+    """
+    Estima o custo do crawl de documentos (contagens, requisições, bytes e tempo).
+    O plano é impresso no canal de log e enviado no evento 'crawl_plan'. Não há
+    ETA ao vivo aqui: o app não busca documentos (o ETA é do main.py --auto-plan).
+    """
+    emit('plan_started')
+    try:
+        client = _get_api_client()
+        if client is None:
+            raise ValueError("Erro: Variáveis de ambiente ARTERIS_API_BASE_URL ou ARTERIS_API_TOKEN não definidas.")
+        options = message if isinstance(message, dict) else {}
+        all_doctypes, _, doctypes_with_fields = process_arteris_doctypes(client, cache=metadata_cache)
+        if all_doctypes is None:
+            raise ConnectionError("Falha ao buscar DocTypes.")
+        executor = FetchExecutor(max_workers=int(os.getenv("ARTERIS_FETCH_MAX_WORKERS", 8)))
+        plan = plan_crawl(client, all_doctypes, doctypes_with_fields, executor,
+                          mode=options.get('mode', 'bulk'), page_size=options.get('page_size'))
+        print_plan(plan)
+        emit('crawl_plan', plan)
+    except (ValueError, ConnectionError) as e:
+        print(f"Erro durante o planejamento: {e}")
+        emit('generation_error', {'error': str(e)})
+    except Exception as e:
+        print(f"Erro inesperado durante o planejamento: {e}")
+        traceback.print_exc()
+        emit('generation_error', {'error': "Erro interno do servidor."})
+    finally:
+        emit('plan_finished')
+
 # --- Ponto de Entrada ---
 if __name__ == '__main__':
     print("Iniciando servidor Flask com Socket.IO (modo threading)...")
@@ -0,0 +1,360 @@
+import os
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import limiter_for, has_rate_limit_config
+from hedging import HedgePolicy, DEFAULT_MAX_HEDGE_RATE
+from crawl_deadline import DeadlineExceeded
+from retry_policy import RetryPolicy, CircuitBreaker, RetryStats, DEFAULT_MAX_RETRIES, DEFAULT_BREAKER_COOLDOWN
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Valores padrão usados quando não há configuração no .env
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 30
+
+class ArterisClient:
+    """
+    Cliente HTTP compartilhado para a API de recursos da Arteris.
+
+    Mantém uma única requests.Session (keep-alive) com um pool de conexões
+    configurável, o cabeçalho de autorização definido uma vez e timeouts padrão.
+    Falhas transitórias (timeouts, 429, 5xx) são repetidas com backoff exponencial
+    e um circuit breaker pausa as requisições quando a taxa de erro dispara.
+    Opcionalmente, um RateLimiter limita a taxa e ajusta a concorrência (AIMD)
+    e uma HedgePolicy envia cópias dos GETs lentos (get(..., hedge=True)).
+    Com self.deadline (CrawlDeadline), nenhuma requisição é iniciada depois do
+    prazo e o timeout de leitura não passa do tempo restante.
+    É usado por api_client e api_client_data no lugar dos pares
+    (api_base_url, api_token), evitando um novo handshake TCP+TLS por requisição.
+    """
+
+    def __init__(self, api_base_url, api_token, pool_size=DEFAULT_POOL_SIZE,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+                 retry_policy=None, circuit_breaker=None, rate_limiter=None, response_cache=None,
+                 hedge_policy=None, deadline=None):
+        """
+        Args:
+            api_base_url (str): A URL base da API de recursos (ex: 'https://host/api/resource').
+            api_token (str): O token de autorização no formato 'token key:secret'.
+            pool_size (int): Número máximo de conexões mantidas abertas por host.
+            connect_timeout (float): Timeout de conexão em segundos.
+            read_timeout (float): Timeout de leitura em segundos.
+            retry_policy (RetryPolicy, optional): Política de novas tentativas
+                (padrão: RetryPolicy()). Use RetryPolicy(max_retries=0) para desativar.
+            circuit_breaker (CircuitBreaker, optional): Circuit breaker compartilhado
+                (padrão: CircuitBreaker()); as aberturas são contadas em self.retry_stats.
+            rate_limiter (RateLimiter, optional): Limitador de taxa/concorrência
+                (normalmente compartilhado por URL base via limiter_for). None desativa.
+            response_cache (ResponseCache, optional): Cache em disco das respostas GET.
+            hedge_policy (HedgePolicy, optional): Política de hedge dos GETs feitos
+                com hedge=True. None desativa.
+            deadline (CrawlDeadline, optional): Prazo do crawl (normalmente definido só
+                para a fase de documentos).
+        """
+        self.api_base_url = api_base_url.rstrip("/")
+        self.api_token = api_token
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.retry_stats = RetryStats()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        if self.circuit_breaker.stats is None:
+            self.circuit_breaker.stats = self.retry_stats
+        self.rate_limiter = rate_limiter
+        self.response_cache = response_cache
+        self.hedge_policy = hedge_policy
+        self.deadline = deadline
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Authorization": api_token})
+
+    @classmethod
+    def from_env(cls, pool_size=None, response_cache=None, hedge_policy=None):
+        """
+        Cria o cliente a partir das variáveis de ambiente (.env).
+
+        Usa ARTERIS_API_BASE_URL e ARTERIS_API_TOKEN (obrigatórias) e, opcionalmente,
+        ARTERIS_API_POOL_SIZE, ARTERIS_API_CONNECT_TIMEOUT, ARTERIS_API_READ_TIMEOUT,
+        ARTERIS_API_MAX_RETRIES, ARTERIS_API_BREAKER_COOLDOWN e ARTERIS_API_RATE (req/s).
+        O limitador de taxa da URL base é opcional: é ativado com ARTERIS_API_RATE_LIMIT=1,
+        ao definir ARTERIS_API_RATE ou quando ARTERIS_API_RATE_LIMITS configura a URL base
+        (ver rate_limiter.load_rate_limit_config). Ativado, começa no tamanho do pool.
+        ARTERIS_API_HEDGE_PERCENTILE ativa o hedge das buscas de documentos (com a fração
+        máxima de cópias em ARTERIS_API_HEDGE_MAX_RATE).
+
+        Args:
+            pool_size (int, optional): Tamanho mínimo do pool de conexões; útil para
+                                       acompanhar o número de workers do executor.
+            response_cache (ResponseCache, optional): Cache em disco das respostas GET.
+            hedge_policy (HedgePolicy, optional): Política de hedge; tem prioridade
+                                                  sobre as variáveis de ambiente.
+
+        Returns:
+            ArterisClient or None: O cliente, ou None se URL ou token não estiverem definidos.
+        """
+        api_base_url = os.getenv("ARTERIS_API_BASE_URL")
+        api_token = os.getenv("ARTERIS_API_TOKEN")
+        if not api_base_url or not api_token:
+            return None
+        pool_size = max(int(os.getenv("ARTERIS_API_POOL_SIZE", DEFAULT_POOL_SIZE)), pool_size or 0)
+        rate_limiter = None
+        rate = os.getenv("ARTERIS_API_RATE")
+        if os.getenv("ARTERIS_API_RATE_LIMIT", "0") == "1" or rate or has_rate_limit_config(api_base_url):
+            rate_limiter = limiter_for(api_base_url, rate=float(rate) if rate else None,
+                                       max_concurrency=pool_size)
+        if hedge_policy is None and os.getenv("ARTERIS_API_HEDGE_PERCENTILE"):
+            hedge_policy = HedgePolicy(
+                percentile=float(os.getenv("ARTERIS_API_HEDGE_PERCENTILE")),
+                max_hedge_rate=float(os.getenv("ARTERIS_API_HEDGE_MAX_RATE", DEFAULT_MAX_HEDGE_RATE)),
+                max_workers=pool_size * 2)
+        return cls(
+            api_base_url,
+            api_token,
+            pool_size=pool_size,
+            connect_timeout=float(os.getenv("ARTERIS_API_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+            read_timeout=float(os.getenv("ARTERIS_API_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+            retry_policy=RetryPolicy(max_retries=int(os.getenv("ARTERIS_API_MAX_RETRIES", DEFAULT_MAX_RETRIES))),
+            circuit_breaker=CircuitBreaker(
+                cooldown=float(os.getenv("ARTERIS_API_BREAKER_COOLDOWN", DEFAULT_BREAKER_COOLDOWN))),
+            rate_limiter=rate_limiter,
+            response_cache=response_cache,
+            hedge_policy=hedge_policy,
+        )
+
+    def config(self):
+        """
+        Configuração serializável do cliente, para recriá-lo em outro processo
+        (ver from_config). Sessão, cache de respostas e contadores não são incluídos.
+
+        Returns:
+            dict: Parâmetros do cliente.
+        """
+        return {
+            "api_base_url": self.api_base_url,
+            "api_token": self.api_token,
+            "pool_size": self.pool_size,
+            "connect_timeout": self.timeout[0],
+            "read_timeout": self.timeout[1],
+            "max_retries": self.retry_policy.max_retries,
+            "rate_limited": self.rate_limiter is not None,
+            "hedge": ({"percentile": self.hedge_policy.percentile, "max_hedge_rate": self.hedge_policy.max_hedge_rate}
+                      if self.hedge_policy is not None else None),
+        }
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Cria um cliente a partir de config(); usado pelos processos do crawl em shards.
+
+        Cada processo tem sua própria sessão e seu próprio limitador de taxa.
+
+        Args:
+            config (dict): Dicionário retornado por ArterisClient.config().
+
+        Returns:
+            ArterisClient: O novo cliente.
+        """
+        config = dict(config)
+        max_retries = config.pop("max_retries", DEFAULT_MAX_RETRIES)
+        rate_limited = config.pop("rate_limited", False)
+        hedge = config.pop("hedge", None)
+        rate_limiter = None
+        if rate_limited:
+            rate_limiter = limiter_for(config["api_base_url"], max_concurrency=config.get("pool_size", DEFAULT_POOL_SIZE))
+        hedge_policy = None
+        if hedge:
+            hedge_policy = HedgePolicy(max_workers=config.get("pool_size", DEFAULT_POOL_SIZE) * 2, **hedge)
+        return cls(retry_policy=RetryPolicy(max_retries=max_retries), rate_limiter=rate_limiter,
+                   hedge_policy=hedge_policy, **config)
+
+    def url(self, path):
+        """Monta a URL completa de um recurso (ex: 'DocType' -> '<base>/DocType'); URLs absolutas são mantidas."""
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.api_base_url}/{path.lstrip('/')}"
+
+    def method_url(self, method_name):
+        """
+        Monta a URL de um método whitelisted do Frappe
+        (ex: 'frappe.client.get_count' -> '<host>/api/method/frappe.client.get_count').
+        """
+        root = self.api_base_url
+        if root.endswith("/api/resource"):
+            root = root[:-len("/api/resource")]
+        return f"{root}/api/method/{method_name}"
+
+    def get(self, path, params=None, timeout=None, hedge=False, **kwargs):
+        """
+        Executa um GET em um recurso da API usando a sessão compartilhada.
+
+        Com self.response_cache, a resposta pode vir do cache (entrada dentro do
+        TTL, revalidada por um 304 ou modo offline) e as respostas 200 são guardadas.
+        Falhas retentáveis são repetidas conforme self.retry_policy. Quando as
+        tentativas se esgotam, a última resposta é retornada (ou a última exceção
+        é relançada), então os chamadores continuam tratando o erro como antes.
+        Com hedge=True e self.hedge_policy, uma tentativa lenta ganha uma cópia e a
+        primeira resposta bem-sucedida vence (use apenas em GETs idempotentes e curtos, como o
+        de um documento).
+
+        Args:
+            path (str): Caminho relativo à URL base (ex: 'DocType' ou 'Asset/<name>').
+            params (dict, optional): Parâmetros de query string.
+            timeout (float or tuple, optional): Sobrescreve o timeout padrão.
+            hedge (bool): Permite o hedge desta requisição (ver HedgePolicy).
+
+        Returns:
+            requests.Response: A resposta (sem raise_for_status aplicado).
+        """
+        url = self.url(path)
+        cache = self.response_cache
+        if cache is None:
+            return self._send(path, url, params, timeout, hedge, **kwargs)
+
+        full_url = cache.request_url(url, params)
+        stream = kwargs.get("stream", False)
+        entry = cache.lookup(full_url)
+        if cache.offline:
+            if entry is None:
+                cache.count("offline_misses")
+                return cache.offline_miss(full_url)
+            cache.count("hits")
+            return cache.to_response(full_url, entry, stream=stream)
+        if entry is not None and cache.is_fresh(entry):
+            cache.count("hits")
+            return cache.to_response(full_url, entry, stream=stream)
+        if entry is not None:
+            headers = dict(kwargs.pop("headers", None) or {})
+            headers.update(cache.conditional_headers(entry))
+            kwargs["headers"] = headers
+
+        response = self._send(path, url, params, timeout, hedge, **kwargs)
+        if entry is not None and response.status_code == 304:
+            cache.touch(full_url)
+            cache.count("revalidated")
+            return cache.to_response(full_url, entry, stream=stream)
+        cache.count("misses")
+        if response.status_code == 200 and stream:
+            response = cache.store_streaming(full_url, response) # Guardada à medida que é lida
+        elif response.status_code == 200:
+            cache.store(full_url, response)
+        return response
+
+    def _send(self, path, url, params, timeout, hedge=False, **kwargs):
+        """
+        Executa o GET em `url` (já montada por get) com novas tentativas, circuit
+        breaker, limitador de taxa e hedge; `path` é usado nas mensagens e na
+        classe da requisição do limitador.
+        """
+        hedge_policy = self.hedge_policy if hedge else None
+
+        def send():
+            return self.session.get(url, params=params, timeout=attempt_timeout, **kwargs)
+
+        retry_number = 0
+        while True:
+            attempt_timeout = timeout or self.timeout
+            if self.deadline is not None:
+                remaining = self.deadline.remaining()
+                if remaining <= 0:
+                    raise DeadlineExceeded(f"Prazo do crawl esgotado; {path} não foi buscado.")
+                attempt_timeout = _cap_timeout(attempt_timeout, remaining)
+            self.circuit_breaker.before_request()
+            self.retry_stats.increment("attempts")
+            response, error = None, None
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = hedge_policy.run(send, self.retry_policy.classify) if hedge_policy is not None else send()
+            except requests.exceptions.RequestException as e:
+                error = e
+            latency = time.perf_counter() - start
+            reason = self.retry_policy.classify(response, error)
+            if self.rate_limiter is not None:
+                self.rate_limiter.release(latency, reason not in (None, "fatal"), _request_class(path))
+            if hedge_policy is not None and reason is None:
+                hedge_policy.record(latency)
+            self.circuit_breaker.record(reason not in (None, "fatal"))
+
+            if reason is None:
+                return response
+            if reason == "fatal":
+                self.retry_stats.increment("fatal")
+            elif retry_number < self.retry_policy.max_retries:
+                retry_number += 1
+                self.retry_stats.increment("retries", reason)
+                delay = self.retry_policy.delay(retry_number, response)
+                logger.warning("Falha retentável (%s) em %s; nova tentativa %s/%s em %.1fs.",
+                               reason, path, retry_number, self.retry_policy.max_retries, delay)
+                if response is not None:
+                    response.close()
+                if self.deadline is not None:
+                    delay = min(delay, max(0.0, self.deadline.remaining()))
+                time.sleep(delay)
+                continue
+            else:
+                self.retry_stats.increment("give_ups")
+                logger.error("Desistindo de %s após %s tentativas (%s).", path, retry_number + 1, reason)
+
+            if error is not None:
+                raise error
+            return response
+
+    def print_report(self):
+        """Imprime os contadores de novas tentativas, do limitador de taxa, do cache de respostas e do hedge."""
+        summary = self.retry_stats.summary()
+        reasons = ", ".join(f"{reason}: {count}" for reason, count in sorted(summary["retries_by_reason"].items()))
+        logger.info("Tentativas: %s, novas tentativas: %s%s, desistências: %s, erros fatais: %s, "
+                    "pausas do circuit breaker: %s", summary["attempts"], summary["retries"],
+                    f" ({reasons})" if reasons else "", summary["give_ups"], summary["fatal"], summary["breaker_trips"])
+        if self.rate_limiter is not None:
+            limits = self.rate_limiter.summary()
+            logger.info("Concorrência adaptativa: limite final %s (%s aumentos, %s reduções)",
+                        limits['limit'], limits['increases'], limits['decreases'])
+        if self.response_cache is not None:
+            counts = self.response_cache.summary()
+            offline = f", {counts['offline_misses']} ausentes (offline)" if self.response_cache.offline else ""
+            logger.info("Cache de respostas: %s hits, %s revalidadas (304), %s buscadas, %s gravadas%s",
+                        counts["hits"], counts["revalidated"], counts["misses"], counts["stored"], offline)
+        if self.hedge_policy is not None:
+            counts = self.hedge_policy.summary()
+            logger.info("Hedge: %s cópias enviadas em %s requisições, %s vencedoras",
+                        counts['hedges_sent'], counts['requests'], counts['hedges_won'])
+
+    def close(self):
+        """Fecha a sessão e libera as conexões do pool."""
+        if self.hedge_policy is not None:
+            self.hedge_policy.close()
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def _cap_timeout(timeout, limit):
+    """Limita o timeout (número ou tupla (conexão, leitura)) a `limit` segundos."""
+    if isinstance(timeout, tuple):
+        return tuple(min(value, limit) if value is not None else limit for value in timeout)
+    return min(timeout, limit) if timeout is not None else limit
+
+def _request_class(path):
+    """
+    Classe da requisição para a latência de base do limitador: a listagem de um
+    DocType ('Asset') e a busca de um documento ('Asset/<chave>') são separadas,
+    e cada DocType tem a sua (páginas em lote levam muito mais que um documento).
+    Métodos do Frappe (URLs de method_url, ex: get_count) têm a classe do método.
+    """
+    if path.startswith(("http://", "https://")):
+        _, marker, method_name = path.partition("/api/method/")
+        return f"method:{method_name}" if marker else "url"
+    doctype, _, key = path.partition("/")
+    return f"{'document' if key else 'list'}:{doctype}"
@@ -0,0 +1,234 @@
+"""
+Benchmark da camada de busca (api_client, api_client_data e process_arteris_doctypes).
+
+Sobe o servidor Frappe simulado (mock_frappe_server) no próprio processo, com
+latência configurável, e executa cada cenário para uma matriz de níveis de
+concorrência e tamanhos de página. Cada caso roda em um processo separado,
+para que o pico de memória (RSS) medido seja apenas o daquele caso.
+
+Para cada caso são registrados: requisições/s, documentos/s, latência
+p50/p95/p99 das requisições, bytes transferidos e pico de RSS. O resultado é
+gravado em JSON (com o commit atual) para comparar execuções entre commits:
+
+    python benchmark_fetch.py --concurrency 1,4,16 --page-sizes 100,1000 --latency 0.02
+    python benchmark_fetch.py --compare output/benchmark_fetch_anterior.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from arteris_client import ArterisClient
+from fetch_executor import FetchExecutor, percentile
+from get_docktypes import process_arteris_doctypes
+from crawler import crawl_documents_per_key, crawl_documents_bulk
+from mock_frappe_server import start_mock_server
+
+# Cenários: metadados por DocType, metadados em lote, documentos por chave e em lote
+SCENARIOS = ["metadata", "metadata_bulk", "per_key", "bulk"]
+PAGED_SCENARIOS = ["per_key", "bulk"] # Os de metadados não usam o tamanho de página
+
+DEFAULT_CONCURRENCY = [1, 4, 16]
+DEFAULT_PAGE_SIZES = [100, 1000]
+DEFAULT_BENCHMARK_PATH = os.path.join("output", "benchmark_fetch.json")
+
+def _peak_rss_bytes():
+    """Pico de RSS do processo atual (ru_maxrss é em KiB no Linux e em bytes no macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def run_benchmark_case(base_url, scenario, concurrency, page_size=None):
+    """
+    Executa um cenário contra o servidor em base_url e mede as requisições do cliente.
+
+    Os prints da busca são descartados durante a medição.
+
+    Args:
+        base_url (str): URL base da API (ex: MockFrappeServer.base_url).
+        scenario (str): Um dos SCENARIOS.
+        concurrency (int): Requisições simultâneas (max_workers e tamanho do pool).
+        page_size (int, optional): Registros por página (cenários de documentos).
+
+    Returns:
+        dict: Métricas do caso (ver o docstring do módulo).
+    """
+    client = ArterisClient(base_url, "token benchmark:benchmark", pool_size=concurrency)
+    executor = FetchExecutor(max_workers=concurrency)
+    latencies = []
+    transferred = [0]
+
+    def measure(response, *args, **kwargs):
+        # Content-Length: não consome o corpo (as listagens são lidas em streaming)
+        latencies.append(response.elapsed.total_seconds())
+        transferred[0] += int(response.headers.get("Content-Length") or 0)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        metadata = None
+        if scenario in PAGED_SCENARIOS:
+            # Metadados fora da medição: o cenário mede apenas os documentos
+            metadata = process_arteris_doctypes(client, executor=executor)
+        client.session.hooks["response"].append(measure)
+        start = time.perf_counter()
+        if scenario == "metadata":
+            documents = sum(len(fields or []) for fields in process_arteris_doctypes(client, executor=executor)[2].values())
+        elif scenario == "metadata_bulk":
+            documents = sum(len(fields or []) for fields in
+                            process_arteris_doctypes(client, bulk=True, executor=executor)[2].values())
+        elif scenario == "per_key":
+            documents = len(crawl_documents_per_key(client, metadata[0], executor, page_size=page_size))
+        elif scenario == "bulk":
+            documents = len(crawl_documents_bulk(client, metadata[0], metadata[2], executor, page_size=page_size))
+        else:
+            raise ValueError(f"Cenário desconhecido: {scenario}")
+        elapsed = time.perf_counter() - start
+    client.close()
+
+    latencies.sort()
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "page_size": page_size,
+        "seconds": round(elapsed, 4),
+        "requests": len(latencies),
+        "documents": documents,
+        "requests_per_second": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "documents_per_second": round(documents / elapsed, 2) if elapsed else None,
+        "bytes": transferred[0],
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "latency_p99": percentile(latencies, 99),
+        "peak_rss_bytes": _peak_rss_bytes(),
+    }
+
+def benchmark_matrix(scenarios, concurrency_levels, page_sizes):
+    """Lista os casos (cenário, concorrência, tamanho de página) da matriz."""
+    cases = []
+    for scenario in scenarios:
+        for concurrency in concurrency_levels:
+            for page_size in (page_sizes if scenario in PAGED_SCENARIOS else [None]):
+                cases.append((scenario, concurrency, page_size))
+    return cases
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(scenarios=SCENARIOS, concurrency_levels=DEFAULT_CONCURRENCY, page_sizes=DEFAULT_PAGE_SIZES,
+                   scale=1.0, latency=0.01, latency_jitter=0.0, seed=0, isolate=True):
+    """
+    Sobe o servidor simulado e executa a matriz de casos.
+
+    Args:
+        scenarios (list): Cenários a executar (ver SCENARIOS).
+        concurrency_levels (list): Níveis de concorrência.
+        page_sizes (list): Tamanhos de página (apenas cenários de documentos).
+        scale (float): Escala do conjunto de dados sintético.
+        latency (float): Latência injetada por requisição, em segundos.
+        latency_jitter (float): Variação aleatória da latência.
+        seed (int): Semente dos dados e da latência.
+        isolate (bool): Executa cada caso em um processo novo (pico de RSS por caso).
+
+    Returns:
+        dict: {"commit", "created_at", "python", "platform", "config", "results"}.
+    """
+    server = start_mock_server(scale=scale, seed=seed, latency=latency, latency_jitter=latency_jitter)
+    results = []
+    try:
+        for scenario, concurrency, page_size in benchmark_matrix(scenarios, concurrency_levels, page_sizes):
+            if isolate:
+                with ProcessPoolExecutor(max_workers=1) as pool:
+                    result = pool.submit(run_benchmark_case, server.base_url, scenario, concurrency, page_size).result()
+            else:
+                result = run_benchmark_case(server.base_url, scenario, concurrency, page_size)
+            results.append(result)
+            print(f"{scenario:<14} concorrência {concurrency:>3} página {page_size or '-':>5}: "
+                  f"{result['requests_per_second']} req/s, {result['documents_per_second']} docs/s, "
+                  f"p95 {(result['latency_p95'] or 0) * 1000:.1f}ms, {result['bytes'] / 1e6:.2f} MB, "
+                  f"RSS {result['peak_rss_bytes'] / 1e6:.0f} MB")
+    finally:
+        server.stop()
+    return {
+        "commit": _git_commit(),
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"scale": scale, "latency": latency, "latency_jitter": latency_jitter, "seed": seed},
+        "results": results,
+    }
+
+def compare_results(current, previous):
+    """
+    Compara os documentos/s de duas execuções, caso a caso.
+
+    Args:
+        current (dict): Resultado de run_benchmarks.
+        previous (dict): Resultado anterior (ex: lido do JSON de outro commit).
+
+    Returns:
+        list: Tuplas (cenário, concorrência, página, docs/s anterior, docs/s atual, variação %).
+    """
+    before = {(r["scenario"], r["concurrency"], r["page_size"]): r for r in previous.get("results", [])}
+    rows = []
+    for result in current["results"]:
+        old = before.get((result["scenario"], result["concurrency"], result["page_size"]))
+        if old is None or not old.get("documents_per_second"):
+            continue
+        change = 100.0 * (result["documents_per_second"] - old["documents_per_second"]) / old["documents_per_second"]
+        rows.append((result["scenario"], result["concurrency"], result["page_size"],
+                     old["documents_per_second"], result["documents_per_second"], round(change, 1)))
+    return rows
+
+def _int_list(value):
+    return [int(item) for item in value.split(",") if item.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da camada de busca contra o servidor Frappe simulado.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Cenários separados por vírgula (padrão: {','.join(SCENARIOS)}).")
+    parser.add_argument("--concurrency", type=_int_list, default=DEFAULT_CONCURRENCY,
+                        help="Níveis de concorrência (padrão: 1,4,16).")
+    parser.add_argument("--page-sizes", type=_int_list, default=DEFAULT_PAGE_SIZES,
+                        help="Tamanhos de página (padrão: 100,1000).")
+    parser.add_argument("--scale", type=float, default=1.0, help="Escala do conjunto de dados sintético.")
+    parser.add_argument("--latency", type=float, default=0.01, help="Latência injetada por requisição (s).")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="Variação aleatória da latência (s).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=DEFAULT_BENCHMARK_PATH, help="Arquivo JSON do resultado.")
+    parser.add_argument("--compare", default=None, help="JSON de uma execução anterior para comparar.")
+    args = parser.parse_args(argv)
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Cenários desconhecidos: {', '.join(unknown)}")
+
+    report = run_benchmarks(scenarios, args.concurrency, args.page_sizes, scale=args.scale,
+                            latency=args.latency, latency_jitter=args.latency_jitter, seed=args.seed)
+    directory = os.path.dirname(args.output)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    print(f"Resultado salvo em {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        print(f"\n--- Comparação com {previous.get('commit') or args.compare} (docs/s) ---")
+        for scenario, concurrency, page_size, before, after, change in compare_results(report, previous):
+            print(f"{scenario:<14} concorrência {concurrency:>3} página {page_size or '-':>5}: "
+                  f"{before} -> {after} ({change:+.1f}%)")
+
+if __name__ == "__main__":
+    main()
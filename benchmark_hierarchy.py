@@ -0,0 +1,124 @@
+"""
+Benchmark da criação da estrutura hierárquica (create_hierarchical_doctype_structure).
+
+Gera um esquema sintético com milhares de DocTypes, em que parte dos campos são
+Links para um pequeno conjunto de DocTypes populares (como Work Role, City ou
+Contract Item no módulo Arteris), e mede a criação da estrutura com e sem a
+memoização dos DocTypes vinculados. As duas estruturas devem ser idênticas.
+
+    python benchmark_hierarchy.py --doctypes 2000 --links 8
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+from json_to_entity_transformer import create_hierarchical_doctype_structure
+
+DEFAULT_BENCHMARK_PATH = os.path.join("output", "benchmark_hierarchy.json")
+FIELD_TYPES = ["Data", "Int", "Currency", "Date", "Check", "Small Text", "Select", "Float"]
+
+def generate_synthetic_schema(doctypes=2000, fields=20, links=8, popular=50, tables=2, seed=0):
+    """
+    Gera metadados sintéticos de DocTypes.
+
+    Args:
+        doctypes (int): Quantidade de DocTypes principais.
+        fields (int): Campos comuns por DocType.
+        links (int): Campos Link por DocType, para um dos DocTypes populares.
+        popular (int): Quantidade de DocTypes populares (destinos dos Links).
+        tables (int): Tabelas filhas por DocType principal (cada uma é um DocType).
+        seed (int): Semente do gerador.
+
+    Returns:
+        tuple: (doctypes_with_fields, child_parent_mapping), no formato de process_arteris_doctypes.
+    """
+    rng = random.Random(seed)
+
+    def make_fields(prefix, count):
+        return [{"fieldname": f"{prefix}_campo_{index}", "label": f"Campo {index} ({prefix})",
+                 "fieldtype": rng.choice(FIELD_TYPES)} for index in range(count)]
+
+    popular_names = [f"Popular {index}" for index in range(popular)]
+    doctypes_with_fields = {name: make_fields(f"p{index}", fields) for index, name in enumerate(popular_names)}
+    child_parent_mapping = []
+    for index in range(doctypes):
+        name = f"DocType {index}"
+        doctype_fields = make_fields(f"d{index}", fields)
+        for link in range(links):
+            doctype_fields.append({"fieldname": f"link_{link}", "label": f"Vínculo {link}",
+                                   "fieldtype": "Link", "options": rng.choice(popular_names)})
+        for table in range(tables):
+            child_name = f"{name} Item {table}"
+            doctype_fields.append({"fieldname": f"itens_{table}", "label": f"Itens {table}",
+                                   "fieldtype": "Table", "options": child_name})
+            doctypes_with_fields[child_name] = make_fields(f"d{index}t{table}", fields // 2) + [
+                {"fieldname": "link_0", "label": "Vínculo", "fieldtype": "Link", "options": rng.choice(popular_names)}]
+            child_parent_mapping.append({"child": child_name, "parent": name})
+        doctypes_with_fields[name] = doctype_fields
+    return doctypes_with_fields, child_parent_mapping
+
+def _build(doctypes_with_fields, child_parent_mapping, memoize_links):
+    # A criação da estrutura acrescenta um mapeamento implícito: cada execução usa uma cópia
+    start = time.perf_counter()
+    structure = create_hierarchical_doctype_structure(
+        doctypes_with_fields, list(child_parent_mapping), memoize_links=memoize_links)
+    return time.perf_counter() - start, structure
+
+def run_benchmark(doctypes=2000, fields=20, links=8, popular=50, tables=2, seed=0, repeat=3):
+    """
+    Mede a criação da estrutura com e sem memoização (melhor de `repeat` execuções).
+
+    Returns:
+        dict: {"config", "seconds_without_memo", "seconds_with_memo", "speedup", "identical", "bytes"}.
+    """
+    doctypes_with_fields, child_parent_mapping = generate_synthetic_schema(
+        doctypes, fields, links, popular, tables, seed)
+    timings = {}
+    outputs = {}
+    for memoize_links in (False, True):
+        best = None
+        for _ in range(max(1, repeat)):
+            elapsed, structure = _build(doctypes_with_fields, child_parent_mapping, memoize_links)
+            best = elapsed if best is None else min(best, elapsed)
+        timings[memoize_links] = best
+        outputs[memoize_links] = json.dumps(structure, ensure_ascii=False)
+    return {
+        "config": {"doctypes": doctypes, "fields": fields, "links": links, "popular": popular,
+                   "tables": tables, "seed": seed, "repeat": repeat,
+                   "total_doctypes": len(doctypes_with_fields)},
+        "seconds_without_memo": round(timings[False], 4),
+        "seconds_with_memo": round(timings[True], 4),
+        "speedup": round(timings[False] / timings[True], 2) if timings[True] else None,
+        "identical": outputs[False] == outputs[True],
+        "bytes": len(outputs[True].encode("utf-8")),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da criação da estrutura hierárquica de DocTypes.")
+    parser.add_argument("--doctypes", type=int, default=2000, help="DocTypes principais (padrão: 2000).")
+    parser.add_argument("--fields", type=int, default=20, help="Campos comuns por DocType (padrão: 20).")
+    parser.add_argument("--links", type=int, default=8, help="Campos Link por DocType (padrão: 8).")
+    parser.add_argument("--popular", type=int, default=50, help="DocTypes destino dos Links (padrão: 50).")
+    parser.add_argument("--tables", type=int, default=2, help="Tabelas filhas por DocType (padrão: 2).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções por variante (vale a melhor).")
+    parser.add_argument("--output", default=DEFAULT_BENCHMARK_PATH, help="Arquivo JSON do resultado.")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.doctypes, args.fields, args.links, args.popular, args.tables,
+                           args.seed, args.repeat)
+    print(f"{report['config']['total_doctypes']} DocTypes: sem memoização {report['seconds_without_memo']}s, "
+          f"com memoização {report['seconds_with_memo']}s ({report['speedup']}x), "
+          f"estruturas idênticas: {'sim' if report['identical'] else 'NÃO'}")
+    directory = os.path.dirname(args.output)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    print(f"Resultado salvo em {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Formato compacto da estrutura hierárquica de DocTypes, com referências ($ref).
+
+Na estrutura de create_hierarchical_doctype_structure, o mesmo DocType aparece
+em vários pontos (a tabela filha compartilhada por vários pais, o DocType
+vinculado por vários Links). O json.dump repete a subárvore inteira em cada
+ocorrência. No formato compacto, cada DocType é gravado uma única vez em
+"definitions", e as ocorrências viram {"$ref": id}:
+
+    {
+        "format": "arteris-hierarchy-ref",
+        "version": 1,
+        "definitions": {"Contract": {"key": ..., "children": [..., {"$ref": "Contract Item"}]}, ...},
+        "roots": [{"$ref": "Contract"}, ...]
+    }
+
+As definições não guardam o 'path': ele depende da ocorrência e é recalculado
+ao expandir (como em add_paths_recursively). DocTypes com o mesmo nome e
+conteúdo diferente (ex: a visão de um Link, sem os relacionamentos aninhados)
+recebem ids com sufixo ("Contract#2").
+
+load_hierarchy lê os dois formatos; no compacto, as referências só são
+expandidas quando os filhos de um nó são acessados.
+"""
+
+import json
+from collections.abc import Mapping
+
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+COMPACT_FORMAT = "arteris-hierarchy-ref"
+COMPACT_VERSION = 1
+REF_KEY = "$ref"
+
+def compact_hierarchy(structure):
+    """
+    Converte a estrutura hierárquica para o formato compacto.
+
+    Args:
+        structure (dict): Estrutura retornada por create_hierarchical_doctype_structure.
+
+    Returns:
+        dict: A estrutura no formato compacto (ver o docstring do módulo).
+    """
+    definitions = {}
+    ids_by_signature = {}
+    ids_by_node = {} # id(nó) -> id da definição (nós compartilhados são compactados uma vez)
+
+    def define(node):
+        if id(node) in ids_by_node:
+            return ids_by_node[id(node)]
+        definition = {}
+        for name, value in node.items():
+            if name == "path":
+                continue
+            if name == "children" and isinstance(value, list):
+                value = [{REF_KEY: define(child)} if child.get("type") == "doctype"
+                         else {k: v for k, v in child.items() if k != "path"}
+                         for child in value if isinstance(child, dict)]
+            definition[name] = value
+        signature = json.dumps(definition, sort_keys=True, ensure_ascii=False)
+        ref = ids_by_signature.get(signature)
+        if ref is None:
+            base = str(node.get("description") or node.get("key"))
+            ref, suffix = base, 1
+            while ref in definitions:
+                suffix += 1
+                ref = f"{base}#{suffix}"
+            definitions[ref] = definition
+            ids_by_signature[signature] = ref
+        ids_by_node[id(node)] = ref
+        return ref
+
+    roots = [{REF_KEY: define(entity)} for entity in structure.get("entities", []) if isinstance(entity, dict)]
+    return {"format": COMPACT_FORMAT, "version": COMPACT_VERSION, "definitions": definitions, "roots": roots}
+
+def is_compact_hierarchy(data):
+    return isinstance(data, dict) and data.get("format") == COMPACT_FORMAT
+
+class LazyHierarchyNode(Mapping):
+    """
+    Nó da estrutura hierárquica no formato aninhado, expandido sob demanda.
+
+    Tem as mesmas chaves dos nós de create_hierarchical_doctype_structure
+    (key, description, fieldname, type, children, path). Os filhos só são
+    montados no primeiro acesso a "children".
+    """
+
+    def __init__(self, definitions, ref, path=None):
+        self._definitions = definitions
+        self._definition = definitions[ref]
+        self.ref = ref
+        self.path = path
+        self._children = None
+
+    def _child_path(self, child_key):
+        return f"{self.path or self._definition.get('key')}.{child_key}"
+
+    def _expand_children(self):
+        children = []
+        for child in self._definition.get("children", []):
+            if REF_KEY in child:
+                ref = child[REF_KEY]
+                child_key = self._definitions[ref].get("key")
+                children.append(LazyHierarchyNode(self._definitions, ref,
+                                                  self._child_path(child_key) if child_key else None))
+            else:
+                child = dict(child)
+                if child.get("key"):
+                    child["path"] = self._child_path(child["key"])
+                children.append(child)
+        return children
+
+    def __getitem__(self, name):
+        if name == "children" and "children" in self._definition:
+            if self._children is None:
+                self._children = self._expand_children()
+            return self._children
+        if name == "path" and self.path is not None:
+            return self.path
+        return self._definition[name]
+
+    def __iter__(self):
+        yield from self._definition
+        if self.path is not None:
+            yield "path"
+
+    def __len__(self):
+        return len(self._definition) + (self.path is not None)
+
+    def __repr__(self):
+        return f"LazyHierarchyNode({self.ref!r}, path={self.path!r})"
+
+    def to_dict(self):
+        """Expande o nó e todos os descendentes em dicts comuns."""
+        node = {}
+        for name in self:
+            value = self[name]
+            if name == "children":
+                value = [child.to_dict() if isinstance(child, LazyHierarchyNode) else child for child in value]
+            node[name] = value
+        return node
+
+def load_hierarchy(source):
+    """
+    Lê a estrutura hierárquica no formato aninhado ou compacto.
+
+    Args:
+        source (str or dict): Caminho do arquivo JSON ou os dados já lidos.
+
+    Returns:
+        dict: {"entities": [...]}; no formato compacto, as entidades são
+              LazyHierarchyNode (expandidos sob demanda). None em caso de erro.
+    """
+    data = source
+    if isinstance(source, str):
+        try:
+            with open(source, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (IOError, json.JSONDecodeError) as e:
+            logger.error("Erro ao ler a estrutura hierárquica %s: %s", source, e)
+            return None
+    if not is_compact_hierarchy(data):
+        return data
+    if data.get("version") != COMPACT_VERSION:
+        logger.error("Erro: versão %s do formato compacto não suportada.", data.get("version"))
+        return None
+    definitions = data.get("definitions", {})
+    return {"entities": [LazyHierarchyNode(definitions, root[REF_KEY]) for root in data.get("roots", [])]}
+
+def expand_hierarchy(source):
+    """
+    Lê a estrutura (aninhada ou compacta) e a expande inteira em dicts comuns.
+
+    Returns:
+        dict: {"entities": [...]} no formato de create_hierarchical_doctype_structure, ou None.
+    """
+    hierarchy = load_hierarchy(source)
+    if hierarchy is None:
+        return None
+    return {"entities": [entity.to_dict() if isinstance(entity, LazyHierarchyNode) else entity
+                         for entity in hierarchy.get("entities", [])]}
+
+def save_compact_hierarchy(structure, path):
+    """
+    Grava a estrutura no formato compacto.
+
+    Returns:
+        bool: True se o arquivo foi gravado.
+    """
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(compact_hierarchy(structure), f, indent=4, ensure_ascii=False)
+    except IOError as e:
+        logger.error("Erro ao salvar a estrutura compacta %s: %s", path, e)
+        return False
+    return True
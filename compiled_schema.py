@@ -0,0 +1,143 @@
+"""
+Índice compilado da estrutura hierárquica de DocTypes.
+
+Os transformadores de dados (data_to_engine_entities_v2/v4) precisam das
+mesmas consultas sobre a estrutura gerada por create_hierarchical_doctype_structure:
+DocType -> key, (entidade, fieldname) -> (label, tipo), filho -> pai, etc.
+CompiledSchema percorre a estrutura uma única vez e guarda essas consultas em
+dicionários; o objeto pode ser reutilizado por vários transformadores e
+enviado a outros processos (é picklable).
+"""
+
+from api_client_data import get_table_fields
+from json_to_entity_transformer import create_hierarchical_doctype_structure
+
+class CompiledSchema:
+    """
+    Consultas O(1) sobre a estrutura hierárquica de DocTypes.
+
+    Atributos:
+        hierarchy (dict): A estrutura original ({"entities": [...]}).
+        doctype_to_key (dict): Nome do DocType -> key (ex: "Contract Item" -> "Contract_Item").
+        key_to_doctype (dict): key -> nome do DocType.
+        attributes (dict): (key da entidade, fieldname) -> (label, tipo).
+        child_to_parent (dict): DocType filho (tabela) -> DocType pai
+                                (apenas quando o mapeamento filho-pai é informado).
+        table_fields (dict): (DocType pai, fieldname da tabela) -> DocType filho
+                             (apenas quando os metadados são informados).
+        nodes (dict): path (ex: "Contract.Contract_Item.valor") -> nó da estrutura.
+    """
+
+    def __init__(self, hierarchy, doctypes_with_fields=None, child_parent_mapping=None):
+        """
+        Args:
+            hierarchy (dict): Estrutura retornada por create_hierarchical_doctype_structure.
+            doctypes_with_fields (dict, optional): Metadados {doctype_name: fields}, usados
+                                                   para o mapa de campos Table.
+            child_parent_mapping (list, optional): Lista de dicts {"child", "parent"}.
+                Na estrutura, as tabelas filhas e os Links são nós doctype iguais; por
+                isso a relação filho -> pai vem do mapeamento.
+        """
+        self.hierarchy = hierarchy
+        self.doctype_to_key = {}
+        self.key_to_doctype = {}
+        self.attributes = {}
+        self.child_to_parent = {}
+        self.table_fields = {}
+        self.nodes = {}
+
+        entities = hierarchy.get("entities", []) if isinstance(hierarchy, dict) else []
+        self._index_doctypes(entities)
+        self._index_attributes(entities)
+        for entity in entities:
+            self._index_nodes(entity, "")
+        for mapping in child_parent_mapping or []:
+            if isinstance(mapping, dict) and mapping.get("child") and mapping.get("parent"):
+                self.child_to_parent.setdefault(mapping["child"], mapping["parent"])
+        for doctype_name in doctypes_with_fields or {}:
+            for fieldname, child_doctype in get_table_fields(doctypes_with_fields, doctype_name):
+                self.table_fields[(doctype_name, fieldname)] = child_doctype
+
+    @classmethod
+    def from_metadata(cls, doctypes_with_fields, child_parent_mapping):
+        """Gera a estrutura hierárquica a partir dos metadados e a compila."""
+        child_parent_mapping = list(child_parent_mapping or [])
+        hierarchy = create_hierarchical_doctype_structure(doctypes_with_fields, child_parent_mapping)
+        return cls(hierarchy, doctypes_with_fields, child_parent_mapping)
+
+    def _index_doctypes(self, entities):
+        # Busca em largura pelos nós doctype; a primeira ocorrência de cada key prevalece
+        pending = list(entities)
+        processed_keys = set()
+        while pending:
+            entity_def = pending.pop(0)
+            description = entity_def.get("description")
+            key = entity_def.get("key")
+            if key in processed_keys:
+                continue
+            processed_keys.add(key)
+            if description and key:
+                self.doctype_to_key[description] = key
+                self.key_to_doctype[key] = description
+            pending.extend(child for child in entity_def.get("children", []) if child.get("type") == "doctype")
+
+    def _index_attributes(self, entities):
+        # Percurso em profundidade; uma ocorrência posterior do mesmo campo substitui a anterior
+        for entity_def in entities:
+            entity_key = entity_def.get("key")
+            if not entity_key:
+                continue
+            for child in entity_def.get("children", []):
+                fieldname = child.get("fieldname")
+                label = child.get("key")
+                if not fieldname or not label:
+                    continue
+                if child.get("type") != "doctype":
+                    self.attributes[(entity_key, fieldname)] = (label, child.get("type"))
+                elif "children" in child:
+                    self._index_attributes([child])
+
+    def _index_nodes(self, node, parent_path):
+        # Mesmo caminho de add_paths_recursively: keys separadas por '.' a partir da raiz
+        key = node.get("key")
+        if not key:
+            return
+        path = f"{parent_path}.{key}" if parent_path else key
+        self.nodes[path] = node
+        for child in node.get("children", []):
+            self._index_nodes(child, path)
+
+    def entity_key(self, doctype_name):
+        """key da entidade de um DocType, ou None se ele não estiver na estrutura."""
+        return self.doctype_to_key.get(doctype_name)
+
+    def doctype_name(self, entity_key):
+        """Nome do DocType de uma key, ou None."""
+        return self.key_to_doctype.get(entity_key)
+
+    def attribute(self, entity_key, fieldname):
+        """(label, tipo) de um campo da entidade, ou None se ele não estiver na estrutura."""
+        return self.attributes.get((entity_key, fieldname))
+
+    def parent_of(self, child_doctype):
+        """DocType pai de uma tabela filha, ou None."""
+        return self.child_to_parent.get(child_doctype)
+
+    def table_child(self, doctype_name, fieldname):
+        """DocType filho de um campo Table, ou None."""
+        return self.table_fields.get((doctype_name, fieldname))
+
+    def node(self, path):
+        """Nó da estrutura no caminho informado, ou None."""
+        return self.nodes.get(path)
+
+def compile_schema(schema_or_hierarchy):
+    """
+    Aceita uma estrutura hierárquica ou um CompiledSchema já compilado.
+
+    Returns:
+        CompiledSchema: O próprio objeto, ou a estrutura compilada.
+    """
+    if isinstance(schema_or_hierarchy, CompiledSchema):
+        return schema_or_hierarchy
+    return CompiledSchema(schema_or_hierarchy)
@@ -0,0 +1,175 @@
+"""
+Checkpoints do crawl de documentos.
+
+Guarda em disco, à medida que o crawl avança:
+- state.json: modo do crawl e DocTypes concluídos;
+- documents.jsonl: documentos já buscados (uma linha JSON por documento);
+- failed_keys.jsonl: chaves cuja busca falhou, para nova tentativa isolada.
+
+Uma execução com --resume recarrega esses arquivos e busca apenas o que falta:
+a listagem de chaves é refeita e as chaves já presentes em documents.jsonl são
+puladas. Não há um cursor de "última chave": os documentos terminam fora de
+ordem no executor, então uma chave menor que a última gravada pode ainda faltar.
+"""
+
+import json
+import os
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Diretório padrão dos arquivos de checkpoint
+DEFAULT_CHECKPOINT_DIR = os.path.join("output", "checkpoint")
+
+class CrawlCheckpoint:
+    """Progresso persistente de um crawl de documentos."""
+
+    def __init__(self, directory=DEFAULT_CHECKPOINT_DIR, mode="per_key", resume=False, save_every=100):
+        """
+        Args:
+            directory (str): Diretório dos arquivos de checkpoint.
+            mode (str): Modo do crawl ('per_key' ou 'bulk'); um checkpoint de outro modo não é retomado.
+            resume (bool): Se True, continua do checkpoint existente; caso contrário, começa do zero.
+            save_every (int): A cada quantos documentos o state.json é regravado.
+        """
+        self.directory = directory
+        self.mode = mode
+        self.save_every = save_every
+        self.state_path = os.path.join(directory, "state.json")
+        self.documents_path = os.path.join(directory, "documents.jsonl")
+        self.failed_path = os.path.join(directory, "failed_keys.jsonl")
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.completed_doctypes = set()
+        self._documents = {}  # (doctype, key) -> documento, na ordem em que foram gravados
+        self._failed = {}     # (doctype, key) -> None, na ordem em que falharam
+        self._unsaved = 0
+
+        if resume and self._load():
+            logger.info("Checkpoint retomado: %s documentos, %s DocTypes concluídos, %s chaves com falha.",
+                        len(self._documents), len(self.completed_doctypes), len(self._failed))
+        else:
+            self.reset()
+
+    def _load(self):
+        """Carrega o checkpoint do disco. Retorna False se não houver checkpoint compatível."""
+        if not os.path.exists(self.state_path):
+            logger.info("Nenhum checkpoint encontrado; iniciando do zero.")
+            return False
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("mode") != self.mode:
+            logger.warning("Checkpoint existente é do modo '%s', não '%s'; iniciando do zero.",
+                        state.get('mode'), self.mode)
+            return False
+        self.completed_doctypes = set(state.get("completed_doctypes", []))
+        for doc in self._read_jsonl(self.documents_path):
+            self._documents[(doc["doctype"], doc["key"])] = doc
+        for entry in self._read_jsonl(self.failed_path):
+            item = (entry["doctype"], entry["key"])
+            if entry.get("resolved"):
+                self._failed.pop(item, None)
+            else:
+                self._failed[item] = None
+        # Uma falha já resolvida por um documento gravado depois não conta mais
+        for item in list(self._failed):
+            if item in self._documents:
+                del self._failed[item]
+        return True
+
+    @staticmethod
+    def _read_jsonl(path):
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Última linha cortada por uma interrupção no meio da gravação
+                    continue
+
+    def reset(self):
+        """Descarta o checkpoint atual e começa um novo."""
+        self.completed_doctypes = set()
+        self._documents = {}
+        self._failed = {}
+        for path in (self.documents_path, self.failed_path):
+            open(path, "w", encoding="utf-8").close()
+        self.save()
+
+    def save(self):
+        """Grava o state.json de forma atômica (arquivo temporário + rename)."""
+        state = {
+            "mode": self.mode,
+            "completed_doctypes": sorted(self.completed_doctypes),
+        }
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+        self._unsaved = 0
+
+    def _append(self, path, entries):
+        with open(path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def is_fetched(self, doctype, key):
+        return (doctype, key) in self._documents
+
+    def is_completed(self, doctype):
+        return doctype in self.completed_doctypes
+
+    def record_documents(self, documents):
+        """Grava documentos buscados ({"doctype", "key", "data"})."""
+        documents = list(documents)
+        if not documents:
+            return
+        self._append(self.documents_path, documents)
+        resolved = []
+        for doc in documents:
+            item = (doc["doctype"], doc["key"])
+            self._documents[item] = doc
+            if item in self._failed:
+                del self._failed[item]
+                resolved.append({"doctype": item[0], "key": item[1], "resolved": True})
+        self._append(self.failed_path, resolved)
+        self._unsaved += len(documents)
+        if self._unsaved >= self.save_every:
+            self.save()
+
+    def record_failure(self, doctype, key):
+        """Registra uma chave cuja busca falhou."""
+        if (doctype, key) not in self._failed:
+            self._failed[(doctype, key)] = None
+            self._append(self.failed_path, [{"doctype": doctype, "key": key}])
+
+    def mark_completed(self, doctype):
+        """Marca um DocType como concluído (todas as chaves processadas)."""
+        self.completed_doctypes.add(doctype)
+        self.save()
+
+    def failed_keys(self):
+        """Retorna a lista de (doctype, key) que falharam e ainda não foram recuperados."""
+        return list(self._failed)
+
+    def documents(self, doctype_names):
+        """
+        Monta all_doctype_data com os documentos do checkpoint.
+
+        Args:
+            doctype_names (list): DocTypes na ordem desejada (a de all_doctypes).
+
+        Returns:
+            list: Documentos agrupados por DocType e, dentro de cada um, ordenados pela chave
+                (a mesma ordem da listagem por 'name'), independentemente da ordem de gravação.
+        """
+        by_doctype = {}
+        for (doctype, _), doc in self._documents.items():
+            by_doctype.setdefault(doctype, []).append(doc)
+        output = []
+        for doctype in doctype_names:
+            output.extend(sorted(by_doctype.get(doctype, []), key=lambda doc: doc["key"]))
+        return output
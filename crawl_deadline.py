@@ -0,0 +1,156 @@
+"""
+Prazo global do crawl de documentos e manifesto da saída parcial.
+
+- CrawlDeadline: prazo em segundos (menos uma reserva para gravar as saídas).
+  O FetchExecutor não inicia novas tarefas quando o tempo restante não cobre a
+  duração típica de uma tarefa, e o ArterisClient não inicia novas requisições
+  depois do prazo (nem espera por respostas além dele).
+- prioritize_doctypes: ordena os DocTypes por importância configurada, para
+  que os mais importantes sejam buscados primeiro.
+- CrawlManifest: situação de cada DocType na saída (complete, partial, missing).
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+
+from fetch_executor import percentile
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Valores padrão do prazo e do manifesto
+DEFAULT_DEADLINE_RESERVE_SECONDS = 30
+DEFAULT_MANIFEST_PATH = os.path.join("output", "crawl_manifest.json")
+TASK_ESTIMATE_PERCENTILE = 95
+TASK_ESTIMATE_WINDOW = 200
+
+# Situações de um DocType no manifesto
+COMPLETE = "complete"
+PARTIAL = "partial"
+MISSING = "missing"
+
+class DeadlineExceeded(requests.exceptions.RequestException):
+    """Requisição não iniciada porque o prazo do crawl terminou."""
+
+class CrawlDeadline:
+    """Prazo do crawl, com a estimativa da duração das tarefas em andamento."""
+
+    def __init__(self, seconds, reserve_seconds=DEFAULT_DEADLINE_RESERVE_SECONDS, started_at=None):
+        """
+        Args:
+            seconds (float): Tempo total disponível, contado a partir de started_at.
+            reserve_seconds (float): Parte final do prazo reservada para transformar e gravar as saídas.
+            started_at (float, optional): Instante inicial (time.monotonic()); padrão: agora.
+        """
+        self.started_at = time.monotonic() if started_at is None else started_at
+        self.seconds = seconds
+        self.reserve_seconds = reserve_seconds
+        self.ends_at = self.started_at + max(0.0, seconds - reserve_seconds)
+        self._durations = deque(maxlen=TASK_ESTIMATE_WINDOW)
+        self._lock = threading.Lock()
+        self.skipped_tasks = 0
+
+    def remaining(self):
+        """Segundos até o fim do prazo do crawl (negativo se já passou)."""
+        return self.ends_at - time.monotonic()
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def record(self, duration):
+        """Registra a duração de uma tarefa concluída."""
+        with self._lock:
+            self._durations.append(duration)
+
+    def task_estimate(self):
+        """Duração típica (p95) das tarefas recentes; 0 enquanto não houver medições."""
+        with self._lock:
+            durations = sorted(self._durations)
+        return percentile(durations, TASK_ESTIMATE_PERCENTILE) or 0.0
+
+    def allows_new_task(self):
+        """True se o tempo restante cobre uma nova tarefa."""
+        return self.remaining() > self.task_estimate()
+
+    def skip(self, count=1):
+        with self._lock:
+            self.skipped_tasks += count
+
+def load_doctype_priorities(path=None):
+    """
+    Lê a importância de cada DocType: {doctype: prioridade}, maior primeiro.
+
+    Usa o arquivo JSON `path` ou, se não for informado, o JSON da variável
+    ARTERIS_DOCTYPE_PRIORITIES (ex: '{"Contract": 10, "Asset": 5}').
+
+    Returns:
+        dict: As prioridades (vazio se não houver configuração ou em caso de erro).
+    """
+    try:
+        if path:
+            with open(path, "r", encoding="utf-8") as f:
+                priorities = json.load(f)
+        else:
+            priorities = json.loads(os.getenv("ARTERIS_DOCTYPE_PRIORITIES") or "{}")
+    except (IOError, json.JSONDecodeError) as e:
+        logger.error("Erro ao ler as prioridades dos DocTypes: %s", e)
+        return {}
+    if not isinstance(priorities, dict):
+        logger.warning("Aviso: As prioridades dos DocTypes devem ser um objeto JSON {doctype: prioridade}.")
+        return {}
+    return priorities
+
+def prioritize_doctypes(all_doctypes, priorities):
+    """
+    Ordena os DocTypes por prioridade (maior primeiro); DocTypes sem prioridade
+    ficam com 0 e a ordem original é mantida entre prioridades iguais.
+
+    Returns:
+        list: Os DocTypes reordenados.
+    """
+    return sorted(all_doctypes, key=lambda doctype: -float(priorities.get(doctype.get("name"), 0)))
+
+class CrawlManifest:
+    """Situação de cada DocType na saída do crawl (complete, partial ou missing)."""
+
+    def __init__(self, doctype_names):
+        self.doctypes = {name: {"status": MISSING, "documents": 0, "expected": None} for name in doctype_names}
+
+    def set(self, doctype_name, status, documents=0, expected=None):
+        self.doctypes[doctype_name] = {"status": status, "documents": documents, "expected": expected}
+
+    def is_complete(self):
+        return all(entry["status"] == COMPLETE for entry in self.doctypes.values())
+
+    def to_dict(self, deadline=None):
+        """
+        Returns:
+            dict: {"complete", "deadline_seconds", "elapsed_seconds", "skipped_tasks", "doctypes"}.
+        """
+        manifest = {"complete": self.is_complete()}
+        if deadline is not None:
+            manifest["deadline_seconds"] = deadline.seconds
+            manifest["elapsed_seconds"] = round(time.monotonic() - deadline.started_at, 3)
+            manifest["skipped_tasks"] = deadline.skipped_tasks
+        manifest["doctypes"] = self.doctypes
+        return manifest
+
+    def write(self, path=DEFAULT_MANIFEST_PATH, deadline=None):
+        """Grava o manifesto em JSON. Retorna False em caso de erro."""
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(deadline), f, indent=4, ensure_ascii=False)
+        except IOError as e:
+            logger.error("Erro ao salvar o manifesto %s: %s", path, e)
+            return False
+        counts = {}
+        for entry in self.doctypes.values():
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        logger.info("Manifesto salvo em %s: %s completos, %s parciais, %s ausentes.",
+                    path, counts.get(COMPLETE, 0), counts.get(PARTIAL, 0), counts.get(MISSING, 0))
+        return True
@@ -0,0 +1,275 @@
+"""
+Planejamento do crawl de documentos: contagem, estimativa de custo e ETA.
+
+Antes de buscar os documentos, conta os registros de cada DocType (e das
+suas tabelas filhas) com frappe.client.get_count e lê uma pequena amostra
+para medir o tamanho médio de um registro e a latência. Com isso estima a
+quantidade de requisições, os bytes transferidos e o tempo total com a
+concorrência configurada, e sugere o tamanho de página e a quantidade de
+shards por DocType. Durante o crawl, EtaReporter registra o progresso e o
+tempo restante. O ETA existe apenas na linha de comando (main.py --auto-plan):
+o app.py não busca documentos e só expõe o plano (evento 'crawl_plan').
+"""
+
+import json
+import math
+import threading
+import time
+
+import requests
+
+from api_client_data import get_table_fields, DEFAULT_CHILD_CHUNK_SIZE
+from log_config import get_logger, format_duration
+
+logger = get_logger(__name__)
+
+# Parâmetros da estimativa
+SAMPLE_SIZE = 20
+TARGET_PAGE_BYTES = 4 * 1024 * 1024 # Tamanho alvo do corpo de uma página
+MIN_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 10000
+DEFAULT_LATENCY = 0.5 # Usada quando a amostra não pôde ser medida
+DEFAULT_RECORD_BYTES = 2048
+
+def get_doctype_count(client, doctype_name, filters=None):
+    """
+    Conta os registros de um DocType com frappe.client.get_count.
+
+    Args:
+        client (ArterisClient): Cliente HTTP compartilhado.
+        doctype_name (str): O nome do DocType.
+        filters (list, optional): Filtros no formato do Frappe.
+
+    Returns:
+        int or None: A quantidade de registros, ou None em caso de erro.
+    """
+    params = {"doctype": doctype_name}
+    if filters:
+        params["filters"] = json.dumps(filters)
+    try:
+        response = client.get(client.method_url("frappe.client.get_count"), params=params)
+        response.raise_for_status() # Lança HTTPError para respostas 4xx/5xx
+        return int(response.json().get("message") or 0)
+    except requests.exceptions.RequestException as e:
+        logger.error("Erro ao contar os registros de %s: %s", doctype_name, e)
+        return None
+    except (json.JSONDecodeError, TypeError, ValueError):
+        logger.error("Erro ao decodificar a contagem de %s.", doctype_name)
+        return None
+
+def sample_doctype(client, doctype_name, sample_size=SAMPLE_SIZE):
+    """
+    Lê uma pequena página com fields=["*"] para medir o tamanho médio de um
+    registro e a latência de uma listagem.
+
+    Returns:
+        tuple or None: (bytes por registro, latência em segundos), ou None em caso de erro.
+    """
+    params = {"fields": json.dumps(["*"]), "limit_page_length": sample_size}
+    try:
+        response = client.get(doctype_name, params=params)
+        response.raise_for_status() # Lança HTTPError para respostas 4xx/5xx
+        records = response.json().get("data", [])
+    except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+        logger.error("Erro ao ler a amostra de %s: %s", doctype_name, e)
+        return None
+    if not records:
+        return None
+    return len(response.content) / len(records), response.elapsed.total_seconds()
+
+def _measure_doctype(client, doctype_name, doctypes_with_fields):
+    """Conta o DocType e as linhas de cada tabela filha e lê a amostra."""
+    count = get_doctype_count(client, doctype_name)
+    if count is None:
+        return None
+    child_rows = {}
+    for fieldname, child_doctype in get_table_fields(doctypes_with_fields, doctype_name):
+        rows = get_doctype_count(client, child_doctype,
+                                 [["parenttype", "=", doctype_name], ["parentfield", "=", fieldname]]) if count else 0
+        child_rows[fieldname] = rows or 0
+    sample = sample_doctype(client, doctype_name) if count else None
+    return {"count": count, "child_rows": child_rows, "sample": sample}
+
+def choose_page_size(record_bytes):
+    """Tamanho de página para que o corpo fique perto de TARGET_PAGE_BYTES (múltiplo de 100)."""
+    page_size = int(TARGET_PAGE_BYTES / max(record_bytes, 1))
+    page_size = max(MIN_PAGE_SIZE, min(MAX_PAGE_SIZE, page_size))
+    return max(MIN_PAGE_SIZE, page_size // 100 * 100)
+
+def plan_crawl(client, all_doctypes, doctypes_with_fields, executor, mode="bulk", page_size=None,
+               child_chunk_size=DEFAULT_CHILD_CHUNK_SIZE, max_shards=None):
+    """
+    Monta o plano do crawl de documentos.
+
+    Args:
+        client (ArterisClient): Cliente HTTP compartilhado.
+        all_doctypes (list): DocTypes retornados por process_arteris_doctypes.
+        doctypes_with_fields (dict): Metadados {doctype_name: fields}.
+        executor (FetchExecutor): Executor usado nas contagens (e cuja concorrência é considerada).
+        mode (str): 'bulk' (listagem em lote) ou 'per_key' (um GET por documento).
+        page_size (int, optional): Tamanho de página; se None, é escolhido pelo tamanho dos registros.
+        child_chunk_size (int): Quantidade de pais por filtro 'parent in [...]' no modo bulk.
+        max_shards (int, optional): Máximo de shards por DocType (padrão: executor.max_workers).
+
+    Returns:
+        dict: {"mode", "concurrency", "page_size", "doctypes": [...], "totals": {...}}.
+              Cada DocType tem count, child_rows, requests, bytes, serial_seconds e shards.
+    """
+    concurrency = executor.max_workers
+    max_shards = max_shards or concurrency
+    doctype_names = [doctype.get("name") for doctype in all_doctypes if doctype.get("name")]
+
+    logger.info("--- Planejando o crawl: contando %s DocTypes ---", len(doctype_names))
+    tasks = [(name, _measure_doctype, (client, name, doctypes_with_fields)) for name in doctype_names]
+    measures = {name: result for name, _, result in executor.run(tasks, ordered=True)}
+
+    # Tamanho médio de registro e latência ponderados pela quantidade de registros
+    samples = [(m["count"], m["sample"]) for m in measures.values() if m and m["sample"]]
+    total_sampled = sum(count for count, _ in samples)
+    record_bytes = (sum(count * s[0] for count, s in samples) / total_sampled) if total_sampled else DEFAULT_RECORD_BYTES
+    latency = (sum(s[1] for _, s in samples) / len(samples)) if samples else DEFAULT_LATENCY
+    page_size = page_size or choose_page_size(record_bytes)
+
+    doctypes = []
+    for name in doctype_names:
+        measure = measures.get(name)
+        if measure is None:
+            doctypes.append({"doctype": name, "count": None})
+            continue
+        count = measure["count"]
+        child_rows = sum(measure["child_rows"].values())
+        doctype_bytes = measure["sample"][0] if measure["sample"] else record_bytes
+        listing_pages = count // page_size + 1
+        if mode == "per_key":
+            requests_count = listing_pages + count
+            # A listagem é sequencial; os GETs por documento são divididos entre os workers
+            serial_seconds = listing_pages * latency + count * latency / concurrency
+        else:
+            child_requests = sum(
+                max(math.ceil(count / child_chunk_size), math.ceil(rows / page_size))
+                for rows in measure["child_rows"].values()
+            )
+            requests_count = listing_pages + child_requests
+            serial_seconds = requests_count * latency
+        doctypes.append({
+            "doctype": name,
+            "count": count,
+            "child_rows": child_rows,
+            "requests": requests_count,
+            "bytes": int((count + child_rows) * doctype_bytes),
+            "serial_seconds": serial_seconds,
+        })
+
+    planned = [d for d in doctypes if d["count"] is not None]
+    total_requests = sum(d["requests"] for d in planned)
+    balanced_seconds = total_requests * latency / concurrency
+    for d in planned:
+        # DocTypes que sozinhos passariam do tempo balanceado são divididos em shards (modo bulk)
+        shards = 1
+        if mode == "bulk" and balanced_seconds > 0 and d["count"] > page_size:
+            shards = max(1, min(max_shards, math.ceil(d["serial_seconds"] / balanced_seconds)))
+        d["shards"] = shards
+    wall_seconds = max([balanced_seconds] + [d["serial_seconds"] / d["shards"] for d in planned])
+
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "page_size": page_size,
+        "record_bytes": record_bytes,
+        "latency": latency,
+        "doctypes": doctypes,
+        "totals": {
+            "documents": sum(d["count"] for d in planned),
+            "child_rows": sum(d["child_rows"] for d in planned),
+            "requests": total_requests,
+            "bytes": sum(d["bytes"] for d in planned),
+            "wall_seconds": wall_seconds,
+        },
+    }
+
+def print_plan(plan):
+    """Imprime o plano do crawl (usado pelo --plan e pelo app.py)."""
+    logger.info("--- Plano do crawl (%s, %s requisições simultâneas, página de %s registros) ---",
+                plan['mode'], plan['concurrency'], plan['page_size'])
+    for d in plan["doctypes"]:
+        if d["count"] is None:
+            logger.info("%s: contagem indisponível", d['doctype'])
+            continue
+        shards = f", {d['shards']} shards" if d.get("shards", 1) > 1 else ""
+        logger.info("%s: %s documentos, %s linhas filhas, %s requisições, %.1f MB%s",
+                    d['doctype'], d['count'], d['child_rows'], d['requests'], d['bytes'] / 1e6, shards)
+    totals = plan["totals"]
+    logger.info("Total: %s documentos, %s requisições, %.1f MB, tempo estimado %s (latência média %.0fms)",
+                totals['documents'], totals['requests'], totals['bytes'] / 1e6,
+                format_duration(totals['wall_seconds']), plan['latency'] * 1000)
+
+class EtaReporter:
+    """
+    Imprime periodicamente o progresso do crawl e o tempo restante estimado.
+
+    O progresso é medido pelas requisições HTTP feitas pelo cliente
+    (client.retry_stats.attempts) em relação ao total previsto no plano.
+    """
+
+    def __init__(self, client, expected_requests, interval=10.0, emit=None):
+        """
+        Args:
+            client (ArterisClient): Cliente cujas requisições são contadas.
+            expected_requests (int): Total de requisições previsto (plan['totals']['requests']).
+            interval (float): Segundos entre as mensagens.
+            emit (callable, optional): Função que recebe a mensagem (padrão: o logger de progresso).
+        """
+        self.client = client
+        self.expected_requests = max(1, expected_requests)
+        self.interval = interval
+        self.emit = emit or get_logger("progress").info
+        self._stop = threading.Event()
+        self._thread = None
+        self._baseline = 0
+        self._started_at = None
+
+    def progress(self):
+        """
+        Returns:
+            dict: done, expected, percent, rate (req/s) e eta_seconds (None sem dados suficientes).
+        """
+        done = self.client.retry_stats.summary()["attempts"] - self._baseline
+        elapsed = time.monotonic() - self._started_at
+        rate = done / elapsed if elapsed > 0 else 0.0
+        remaining = max(0, self.expected_requests - done)
+        return {
+            "done": done,
+            "expected": self.expected_requests,
+            "percent": min(100.0, 100.0 * done / self.expected_requests),
+            "rate": rate,
+            "eta_seconds": remaining / rate if rate > 0 else None,
+        }
+
+    def _report(self):
+        progress = self.progress()
+        eta = format_duration(progress["eta_seconds"]) if progress["eta_seconds"] is not None else "--"
+        self.emit(f"Progresso: {progress['done']}/{progress['expected']} requisições "
+                  f"({progress['percent']:.0f}%), {progress['rate']:.1f} req/s, ETA {eta}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._report()
+
+    def start(self):
+        self._baseline = self.client.retry_stats.summary()["attempts"]
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._report()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,279 @@
+"""
+Fase de documentos do crawl: busca os dados de todos os DocTypes e devolve a
+lista all_doctype_data ({"doctype", "key", "data"}) usada pelos transformadores.
+"""
+
+import json
+import logging
+from collections import Counter
+from api_client_data import (
+    get_keys, get_data_from_key, get_doctype_data_bulk, get_table_fields, get_link_fields, DEFAULT_PAGE_SIZE
+)
+from crawl_deadline import COMPLETE, PARTIAL, MISSING
+from log_config import get_logger, ProgressLogger
+
+logger = get_logger(__name__)
+
+def _update_manifest(manifest, doctype_names, documents, expected, completed=()):
+    """
+    Registra no manifesto a situação de cada DocType a partir dos documentos obtidos.
+
+    Args:
+        manifest (CrawlManifest): Manifesto a atualizar.
+        doctype_names (list): DocTypes do crawl.
+        documents (list): all_doctype_data retornado pelo crawl.
+        expected (dict): {doctype: quantidade esperada}; DocTypes ausentes não foram listados.
+        completed (iterable): DocTypes sabidamente completos (ex: concluídos no checkpoint).
+    """
+    counts = Counter(document["doctype"] for document in documents)
+    completed = set(completed)
+    for doctype_name in doctype_names:
+        fetched = counts.get(doctype_name, 0)
+        total = fetched if doctype_name in completed else expected.get(doctype_name)
+        if total is None:
+            status = MISSING
+        elif fetched >= total:
+            status = COMPLETE
+        else:
+            status = PARTIAL if fetched else MISSING
+        manifest.set(doctype_name, status, documents=fetched, expected=total)
+
+def crawl_documents_per_key(client, all_doctypes, executor, page_size=DEFAULT_PAGE_SIZE, checkpoint=None,
+                            manifest=None):
+    """
+    Busca as chaves de cada DocType e depois cada documento individualmente
+    (uma requisição GET /{doctype}/{key} por documento).
+
+    Args:
+        client (ArterisClient): Cliente HTTP compartilhado.
+        all_doctypes (list): DocTypes retornados por process_arteris_doctypes.
+        executor (FetchExecutor): Executor que limita as requisições simultâneas.
+        page_size (int): Quantidade de chaves por página na listagem.
+        checkpoint (CrawlCheckpoint, optional): Checkpoint para gravar o progresso;
+            DocTypes concluídos e documentos já buscados nele são pulados.
+        manifest (CrawlManifest, optional): Recebe a situação de cada DocType
+            (completo, parcial ou ausente) comparando os documentos com as chaves listadas.
+
+    Returns:
+        list: all_doctype_data.
+    """
+    doctype_names = [doctype.get("name") for doctype in all_doctypes if doctype.get("name")]
+    pending_doctypes = [name for name in doctype_names
+                        if checkpoint is None or not checkpoint.is_completed(name)]
+
+    # --- Carregar as chaves (name) por DocType ---
+    logger.info("--- Carregando as chaves (name) dos DocTypes ---")
+    doctypes_with_keys = []
+    # Busca as chaves de todos os DocTypes em paralelo (sempre na ordem de all_doctypes)
+    key_tasks = [(name, get_keys, (client, name, page_size)) for name in pending_doctypes]
+    for doctype_name, _, keys in executor.run(key_tasks, ordered=True):
+        doctypes_with_keys.append({"doctype": doctype_name, "keys": keys})
+    logger.info("%s DocTypes com %s chaves.", len(doctypes_with_keys),
+                sum(len(d["keys"] or []) for d in doctypes_with_keys))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("--- DocTypes com suas respectivas chaves ---\n%s",
+                     json.dumps(doctypes_with_keys, indent=4, ensure_ascii=False))
+
+    # --- Carregar dados dos DocTypes com base nas chaves ---
+    logger.info("--- Carregando dados dos DocTypes com base nas chaves ---")
+    all_doctype_data = []
+    data_tasks = []
+    remaining = {} # doctype -> chaves ainda não processadas nesta execução
+    for doctype in doctypes_with_keys:
+        doctype_name = doctype.get("doctype")
+        keys = doctype.get("keys")
+        if keys:
+            for key in keys:
+                if checkpoint is not None and checkpoint.is_fetched(doctype_name, key):
+                    continue
+                data_tasks.append((doctype_name, get_data_from_key, (client, doctype_name, key)))
+                remaining[doctype_name] = remaining.get(doctype_name, 0) + 1
+        else:
+            logger.warning("Aviso: Nenhuma chave encontrada para o DocType %s.", doctype_name)
+        # Listagem com erro (None) não conclui o DocType: ele será listado de novo ao retomar
+        if checkpoint is not None and keys is not None and not remaining.get(doctype_name):
+            checkpoint.mark_completed(doctype_name)
+
+    progress = ProgressLogger("Documentos", total=len(data_tasks))
+    for doctype_name, (_, _, key), data in executor.run(data_tasks):
+        progress.advance()
+        if data:
+            document = {"doctype": doctype_name, "key": key, "data": data}
+            if checkpoint is not None:
+                checkpoint.record_documents([document])
+            else:
+                all_doctype_data.append(document)
+        else:
+            logger.error("Erro ao buscar dados para %s com chave %s.", doctype_name, key)
+            if checkpoint is not None:
+                checkpoint.record_failure(doctype_name, key)
+        if checkpoint is not None:
+            remaining[doctype_name] -= 1
+            if not remaining[doctype_name]:
+                checkpoint.mark_completed(doctype_name)
+    progress.finish()
+
+    if checkpoint is not None:
+        checkpoint.save()
+        all_doctype_data = checkpoint.documents(doctype_names)
+    if manifest is not None:
+        expected = {d["doctype"]: len(d["keys"]) for d in doctypes_with_keys if d["keys"] is not None}
+        _update_manifest(manifest, doctype_names, all_doctype_data, expected,
+                         completed=set(doctype_names) - set(pending_doctypes))
+    return all_doctype_data
+
+def retry_failed_keys(client, all_doctypes, executor, checkpoint):
+    """
+    Busca novamente apenas as chaves registradas como falha no checkpoint.
+
+    Args:
+        client (ArterisClient): Cliente HTTP compartilhado.
+        all_doctypes (list): DocTypes retornados por process_arteris_doctypes.
+        executor (FetchExecutor): Executor que limita as requisições simultâneas.
+        checkpoint (CrawlCheckpoint): Checkpoint retomado com as falhas anteriores.
+
+    Returns:
+        list: all_doctype_data com os documentos do checkpoint (incluindo os recuperados).
+    """
+    failed = checkpoint.failed_keys()
+    logger.info("--- Repetindo %s chaves com falha ---", len(failed))
+    tasks = [(doctype_name, get_data_from_key, (client, doctype_name, key)) for doctype_name, key in failed]
+    recovered = 0
+    for doctype_name, (_, _, key), data in executor.run(tasks):
+        if data:
+            checkpoint.record_documents([{"doctype": doctype_name, "key": key, "data": data}])
+            recovered += 1
+        else:
+            logger.error("Erro ao buscar dados para %s com chave %s.", doctype_name, key)
+    checkpoint.save()
+    logger.info("%s de %s chaves recuperadas; %s ainda com falha.",
+                recovered, len(failed), len(checkpoint.failed_keys()))
+    return checkpoint.documents([doctype.get("name") for doctype in all_doctypes if doctype.get("name")])
+
+def crawl_documents_bulk(client, all_doctypes, doctypes_with_fields, executor, page_size=DEFAULT_PAGE_SIZE,
+                         checkpoint=None, project_fields=False, manifest=None):
+    """
+    Busca os documentos de cada DocType em lote: páginas da listagem com
+    fields=["*"] e tabelas filhas com 'parent in [...]', sem uma requisição
+    por documento. Os DocTypes são processados em paralelo pelo executor.
+
+    Args:
+        client (ArterisClient): Cliente HTTP compartilhado.
+        all_doctypes (list): DocTypes retornados por process_arteris_doctypes.
+        doctypes_with_fields (dict): Metadados {doctype_name: fields}.
+        executor (FetchExecutor): Executor que limita as requisições simultâneas.
+        page_size (int): Quantidade de registros por página.
+        checkpoint (CrawlCheckpoint, optional): Checkpoint para gravar o progresso por
+            DocType; DocTypes já concluídos nele não são buscados de novo.
+        project_fields (bool): Se True, pede apenas as colunas usadas pela estrutura hierárquica.
+        manifest (CrawlManifest, optional): Recebe a situação de cada DocType; em lote
+            um DocType é completo (todas as páginas lidas) ou ausente.
+
+    Returns:
+        list: all_doctype_data, na ordem de all_doctypes e, dentro de cada DocType, de 'name'.
+    """
+    logger.info("--- Carregando dados dos DocTypes em lote ---")
+    doctype_names = [doctype.get("name") for doctype in all_doctypes if doctype.get("name")]
+    all_doctype_data = []
+    fetched_doctypes = set()
+    tasks = [
+        (name, get_doctype_data_bulk, (client, name, doctypes_with_fields, page_size, project_fields))
+        for name in doctype_names if checkpoint is None or not checkpoint.is_completed(name)
+    ]
+    progress = ProgressLogger("Documentos")
+    for doctype_name, _, documents in executor.run(tasks, ordered=True):
+        if documents is None:
+            logger.error("Erro ao buscar dados em lote para %s.", doctype_name)
+            continue
+        progress.advance(len(documents))
+        if not documents:
+            logger.warning("Aviso: Nenhum documento encontrado para o DocType %s.", doctype_name)
+        fetched_doctypes.add(doctype_name)
+        if checkpoint is not None:
+            # Grava o DocType inteiro de uma vez: um DocType parcial é refeito ao retomar
+            checkpoint.record_documents(documents)
+            checkpoint.mark_completed(doctype_name)
+        else:
+            all_doctype_data.extend(documents)
+    progress.finish()
+
+    if checkpoint is not None:
+        all_doctype_data = checkpoint.documents(doctype_names)
+        fetched_doctypes.update(name for name in doctype_names if checkpoint.is_completed(name))
+    if manifest is not None:
+        _update_manifest(manifest, doctype_names, all_doctype_data, {}, completed=fetched_doctypes)
+    return all_doctype_data
+
+def _document_references(doctypes_with_fields, doctype_name, data):
+    """
+    Lista os documentos referenciados por um documento: os destinos dos campos
+    Link dele e das linhas de suas tabelas filhas.
+
+    Returns:
+        list: Tuplas (doctype, name), apenas de DocTypes presentes nos metadados.
+    """
+    references = []
+    rows = [(doctype_name, data)]
+    for fieldname, child_doctype in get_table_fields(doctypes_with_fields, doctype_name):
+        rows.extend((child_doctype, row) for row in data.get(fieldname) or [] if isinstance(row, dict))
+    for row_doctype, row in rows:
+        for fieldname, linked_doctype in get_link_fields(doctypes_with_fields, row_doctype):
+            value = row.get(fieldname)
+            # Links para DocTypes fora do módulo (User, Web Page, ...) não são seguidos
+            if value and linked_doctype in doctypes_with_fields:
+                references.append((linked_doctype, value))
+    return references
+
+def crawl_documents_scoped(client, roots, all_doctypes, doctypes_with_fields, executor, max_depth=None):
+    """
+    Busca apenas os documentos alcançáveis a partir de documentos raiz, seguindo
+    as tabelas filhas (que vêm dentro do documento) e os campos Link.
+
+    A busca é feita em largura, um nível por vez em paralelo pelo executor; cada
+    documento é buscado uma única vez, mesmo que seja referenciado várias vezes.
+
+    Args:
+        client (ArterisClient): Cliente HTTP compartilhado.
+        roots (list): Tuplas (doctype, name) dos documentos raiz.
+        all_doctypes (list): DocTypes retornados por process_arteris_doctypes (definem a ordem da saída).
+        doctypes_with_fields (dict): Metadados {doctype_name: fields}, com as 'options' de Link e Table.
+        executor (FetchExecutor): Executor que limita as requisições simultâneas.
+        max_depth (int, optional): Quantos níveis de Link seguir a partir das raízes
+            (0 busca só as raízes; None não limita).
+
+    Returns:
+        list: all_doctype_data, agrupado na ordem de all_doctypes e, dentro de cada
+              DocType, na ordem em que os documentos foram alcançados.
+    """
+    logger.info("--- Carregando documentos alcançáveis a partir de %s raízes ---", len(roots))
+    seen = set()
+    frontier = []
+    for root in roots:
+        if root not in seen:
+            seen.add(root)
+            frontier.append(root)
+
+    documents = []
+    depth = 0
+    while frontier:
+        logger.info("Nível %s: %s documentos", depth, len(frontier))
+        tasks = [(doctype_name, get_data_from_key, (client, doctype_name, key)) for doctype_name, key in frontier]
+        next_frontier = []
+        for doctype_name, (_, _, key), data in executor.run(tasks, ordered=True):
+            if not data:
+                logger.error("Erro ao buscar dados para %s com chave %s.", doctype_name, key)
+                continue
+            documents.append({"doctype": doctype_name, "key": key, "data": data})
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for reference in _document_references(doctypes_with_fields, doctype_name, data):
+                if reference not in seen:
+                    seen.add(reference)
+                    next_frontier.append(reference)
+        frontier = next_frontier
+        depth += 1
+
+    order = {doctype.get("name"): index for index, doctype in enumerate(all_doctypes)}
+    documents.sort(key=lambda document: order.get(document["doctype"], len(order))) # sort estável
+    logger.info("%s documentos alcançados em %s níveis.", len(documents), depth)
+    return documents
@@ -1,59 +1,15 @@
 # data_to_engine_entities_v2.py
-import logging
 import json # Adicionado para o exemplo de uso
-from typing import Dict, List, Any, Tuple
-import os
-
-# Configuração básica de logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+from typing import Dict, List, Any, Union
 
-def _extract_mappings_from_hierarchy(entities: List[Dict[str, Any]]) -> Tuple[Dict[Tuple[str, str], str], Dict[Tuple[str, str], str]]:
-    """
-    Extrai recursivamente mapeamentos da estrutura hierárquica:
-    1. Tipos de atributos: (entity_key, fieldname) -> attribute_type
-    2. Labels de atributos: (entity_key, fieldname) -> attribute_label (key da hierarquia)
-
-    Args:
-        entities (List[Dict[str, Any]]): Lista de definições de entidades.
+from compiled_schema import CompiledSchema, compile_schema
+import os
 
-    Returns:
-        Tuple[Dict[Tuple[str, str], str], Dict[Tuple[str, str], str]]:
-            - Mapa de tipos de atributos.
-            - Mapa de labels de atributos.
-    """
-    attribute_type_map = {}
-    fieldname_to_label_map = {}
+from log_config import get_logger
 
-    for entity_def in entities:
-        entity_key = entity_def.get('key')
-        if not entity_key:
-            continue
+logger = get_logger(__name__)
 
-        logger.debug(f"Extracting mappings for entity: {entity_key}")
-        for child_attr in entity_def.get('children', []):
-            child_fieldname = child_attr.get('fieldname')
-            child_type = child_attr.get('type')
-            child_label = child_attr.get('key') # Usar 'key' da hierarquia como label
-
-            if child_fieldname and child_label: # Precisa de ambos para mapear
-                if child_type != 'doctype':
-                    # É um atributo direto
-                    attribute_type_map[(entity_key, child_fieldname)] = child_type
-                    fieldname_to_label_map[(entity_key, child_fieldname)] = child_label
-                    logger.debug(f"  Mapped attribute: ({entity_key}, {child_fieldname}) -> Type: {child_type}, Label: {child_label}")
-                elif child_type == 'doctype' and 'children' in child_attr:
-                    # É um doctype filho, chama recursivamente
-                    logger.debug(f"  Found child doctype: {child_label}. Recursing.")
-                    # Passa a definição do doctype filho em uma lista
-                    nested_types, nested_labels = _extract_mappings_from_hierarchy([child_attr])
-                    attribute_type_map.update(nested_types)
-                    fieldname_to_label_map.update(nested_labels)
-
-    return attribute_type_map, fieldname_to_label_map
-
-
-def get_data_engine_hierarquical(output_data: List[Dict[str, Any]], output_hierarchical: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+def get_data_engine_hierarquical(output_data: List[Dict[str, Any]], output_hierarchical: Union[Dict[str, Any], CompiledSchema]) -> Dict[str, List[Dict[str, Any]]]:
     """
     Transforma os dados da API Arteris (formato output_data) para o formato
     engine_entities, utilizando a estrutura hierárquica (output_hierarchical)
@@ -62,8 +18,8 @@ def get_data_engine_hierarquical(output_data: List[Dict[str, Any]], output_hiera
     Args:
         output_data (List[Dict[str, Any]]): Lista de dicionários contendo os dados
                                              extraídos (similar a output_data.json).
-        output_hierarchical (Dict[str, Any]): Dicionário contendo a estrutura hierárquica
-                                              das entidades (similar a output_hierarchical.json).
+        output_hierarchical (Dict[str, Any] or CompiledSchema): Dicionário contendo a estrutura hierárquica
+                                              das entidades, ou a mesma estrutura já compilada (similar a output_hierarchical.json).
 
     Returns:
         Dict[str, List[Dict[str, Any]]]: Dicionário no formato {"entities": [...]}.
@@ -74,55 +30,21 @@ def get_data_engine_hierarquical(output_data: List[Dict[str, Any]], output_hiera
     if not isinstance(output_data, list):
         logger.error("Formato inválido para output_data. Esperava uma lista.")
         return {"entities": []}
-    if not isinstance(output_hierarchical, dict) or 'entities' not in output_hierarchical:
+    if not isinstance(output_hierarchical, CompiledSchema) and (
+            not isinstance(output_hierarchical, dict) or 'entities' not in output_hierarchical):
         logger.error("Formato inválido para output_hierarchical. Esperava um dicionário com a chave 'entities'.")
         return {"entities": []}
 
-    hierarchical_entities = output_hierarchical.get('entities', [])
-
     # --- Pré-processamento ---
-    logger.info("Criando mapas de lookup a partir da estrutura hierárquica.")
+    # Mapas da estrutura hierárquica, compilados uma única vez (ver compiled_schema.py)
+    schema = compile_schema(output_hierarchical)
 
     # 1. Mapa: Descrição do DocType -> Chave/Entity Type (ex: "Contract Measurement" -> "Contract_Measurement")
-    doctype_description_to_key_map: Dict[str, str] = {}
-    # 2. Mapa: (Entity Type Key, Field Name) -> Tipo do Atributo
-    attribute_type_map: Dict[Tuple[str, str], str] = {}
-    # 3. Mapa: (Entity Type Key, Field Name) -> Label do Atributo (key da hierarquia)
-    fieldname_to_label_map: Dict[Tuple[str, str], str] = {}
-    # 4. Mapa: ID do Item -> DocType (ex: "019678b6-..." -> "Contract Measurement")
+    doctype_description_to_key_map = schema.doctype_to_key
+    # 2. Mapa: (Entity Type Key, Field Name) -> (Label do Atributo, Tipo do Atributo)
+    attribute_map = schema.attributes
+    # 3. Mapa: ID do Item -> DocType (ex: "019678b6-..." -> "Contract Measurement")
     id_to_doctype_map: Dict[str, str] = {}
-    # 5. Mapa: Chave/Entity Type -> Descrição do DocType (inverso do 1, para achar nome do pai)
-    doctype_key_to_description_map: Dict[str, str] = {}
-
-
-    # Preenche doctype_description_to_key_map e doctype_key_to_description_map
-    entities_to_process = list(hierarchical_entities) # Copia para poder modificar
-    processed_keys = set() # Para evitar loops infinitos em estruturas recursivas (se houver)
-
-    while entities_to_process:
-        entity_def = entities_to_process.pop(0)
-        description = entity_def.get('description')
-        key = entity_def.get('key')
-
-        if key in processed_keys:
-            continue
-        processed_keys.add(key)
-
-        if description and key:
-            doctype_description_to_key_map[description] = key
-            doctype_key_to_description_map[key] = description
-            logger.debug(f"Mapeado doctype: '{description}' <-> '{key}'")
-
-        # Adiciona filhos à lista para processamento
-        children = entity_def.get('children', [])
-        entities_to_process.extend([child for child in children if child.get('type') == 'doctype'])
-
-
-    # Preenche attribute_type_map e fieldname_to_label_map usando a função auxiliar
-    attribute_type_map, fieldname_to_label_map = _extract_mappings_from_hierarchy(hierarchical_entities)
-    logger.info(f"Mapa de tipos de atributos: {attribute_type_map}")
-    logger.info(f"Mapa de labels de atributos: {fieldname_to_label_map}")
-
 
     # Preenche id_to_doctype_map
     items_to_process = list(output_data)
@@ -139,7 +61,7 @@ def get_data_engine_hierarquical(output_data: List[Dict[str, Any]], output_hiera
         doctype = item.get('doctype')
         if doctype:
             id_to_doctype_map[item_id] = doctype
-            logger.debug(f"Mapeado ID->Doctype: '{item_id}' -> '{doctype}'")
+            logger.debug("Mapeado ID->Doctype: '%s' -> '%s'", item_id, doctype)
 
         # Processa também os itens dentro das tabelas filhas (listas de dicionários)
         item_data = item.get('data', {})
@@ -159,7 +81,8 @@ def get_data_engine_hierarquical(output_data: List[Dict[str, Any]], output_hiera
                              items_to_process.append(simulated_item)
 
 
-    logger.info(f"Mapas criados: {len(doctype_description_to_key_map)} doctypes desc->key, {len(doctype_key_to_description_map)} doctypes key->desc, {len(attribute_type_map)} atributos tipados, {len(fieldname_to_label_map)} labels mapeados, {len(id_to_doctype_map)} IDs mapeados.")
+    logger.info("Mapas criados: %s doctypes desc->key, %s atributos mapeados, %s IDs mapeados.",
+                len(doctype_description_to_key_map), len(attribute_map), len(id_to_doctype_map))
 
     # --- Lógica de Transformação Principal ---
     logger.info("Iniciando processamento dos itens de dados.")
@@ -175,7 +98,7 @@ def get_data_engine_hierarquical(output_data: List[Dict[str, Any]], output_hiera
         doctype_desc = item.get('doctype') # Descrição como "Contract Measurement"
 
         if not item_id or not doctype_desc:
-            logger.warning(f"Item ignorado por falta de ID ou doctype: {item}")
+            logger.warning("Item ignorado por falta de ID ou doctype: %s", item)
             continue
 
         if item_id in processed_ids_main_loop:
@@ -185,10 +108,11 @@ def get_data_engine_hierarquical(output_data: List[Dict[str, Any]], output_hiera
         # Obter a chave/entity_type (ex: "Contract_Measurement")
         entity_type = doctype_description_to_key_map.get(doctype_desc)
         if not entity_type:
-            logger.warning(f"Não foi possível encontrar a chave para o doctype '{doctype_desc}'. Item ID: {item_id}")
+            logger.warning("Não foi possível encontrar a chave para o doctype '%s'. Item ID: %s",
+                           doctype_desc, item_id)
             continue
 
-        logger.debug(f"Processando item ID: {item_id}, Doctype: {doctype_desc}, Entity Type: {entity_type}")
+        logger.debug("Processando item ID: %s, Doctype: %s, Entity Type: %s", item_id, doctype_desc, entity_type)
 
         current_attributes = []
 
@@ -204,11 +128,13 @@ def get_data_engine_hierarquical(output_data: List[Dict[str, Any]], output_hiera
                         "value": parent_id,
                         "type": "string" # Assume-se que IDs de relação são strings
                     })
-                    logger.debug(f"  Adicionado atributo pai: {parent_entity_type} -> {parent_id}")
+                    logger.debug("  Adicionado atributo pai: %s -> %s", parent_entity_type, parent_id)
                 else:
-                    logger.warning(f"  Não foi possível encontrar a chave para o doctype pai '{parent_doctype_desc}' do item {item_id}")
+                    logger.warning("  Não foi possível encontrar a chave para o doctype pai '%s' do item %s",
+                                   parent_doctype_desc, item_id)
             else:
-                logger.warning(f"  Não foi possível encontrar o doctype para o parent ID '{parent_id}' do item {item_id}")
+                logger.warning("  Não foi possível encontrar o doctype para o parent ID '%s' do item %s",
+                               parent_id, item_id)
 
         # Iterar sobre os campos de dados para criar atributos
         for field_name, field_value in item_data.items():
@@ -222,29 +148,31 @@ def get_data_engine_hierarquical(output_data: List[Dict[str, Any]], output_hiera
             attribute_key = field_name # Padrão é o fieldname
 
             lookup_key = (entity_type, field_name)
+            mapped = attribute_map.get(lookup_key)
 
             # Buscar label no mapa
-            if lookup_key in fieldname_to_label_map:
-                attribute_key = fieldname_to_label_map[lookup_key]
-                logger.debug(f"  Label para {lookup_key} encontrado: {attribute_key}")
+            if mapped:
+                attribute_key = mapped[0]
+                logger.debug("  Label para %s encontrado: %s", lookup_key, attribute_key)
             else:
-                logger.debug(f"  Label para {lookup_key} não encontrado, usando fieldname: {field_name}")
+                logger.debug("  Label para %s não encontrado, usando fieldname: %s", lookup_key, field_name)
 
             # Buscar tipo no mapa
-            if lookup_key in attribute_type_map:
-                attribute_type = attribute_type_map[lookup_key]
+            if mapped:
+                attribute_type = mapped[1]
                 # Ajustar tipos numéricos
                 if attribute_type in ['numeric', 'integer', 'float', 'currency']:
                      attribute_type = 'number'
                 # Outros tipos ('date', 'datetime', 'boolean', 'string') mantidos
-                logger.debug(f"  Tipo para {lookup_key} encontrado: {attribute_type_map[lookup_key]} (usado como: {attribute_type})")
+                logger.debug("  Tipo para %s encontrado: %s (usado como: %s)",
+                             lookup_key, mapped[1], attribute_type)
             else:
                 # Inferir tipo básico se não encontrado
                 if isinstance(field_value, (int, float)):
                     attribute_type = "number"
                 elif isinstance(field_value, bool):
                     attribute_type = "boolean"
-                logger.debug(f"  Tipo para {lookup_key} não encontrado, inferido como {attribute_type}")
+                logger.debug("  Tipo para %s não encontrado, inferido como %s", lookup_key, attribute_type)
 
 
             current_attributes.append({
@@ -252,7 +180,7 @@ def get_data_engine_hierarquical(output_data: List[Dict[str, Any]], output_hiera
                 "value": field_value,
                 "type": attribute_type
             })
-            logger.debug(f"  Adicionado atributo: {attribute_key} -> {field_value} (Tipo: {attribute_type})")
+            logger.debug("  Adicionado atributo: %s -> %s (Tipo: %s)", attribute_key, field_value, attribute_type)
 
         # Criar a entidade final
         engine_entity = {
@@ -277,7 +205,7 @@ def get_data_engine_hierarquical(output_data: List[Dict[str, Any]], output_hiera
                               items_to_process_main.insert(0, simulated_item)
 
 
-    logger.info(f"Transformação v2 concluída. {len(engine_entities)} entidades geradas.")
+    logger.info("Transformação v2 concluída. %s entidades geradas.", len(engine_entities))
     return {"entities": engine_entities}
 
 # Exemplo de uso (opcional, para teste)
@@ -298,11 +226,11 @@ if __name__ == '__main__':
         output_filename = 'engine_entities_output_v2.json'
         with open(output_filename, 'w', encoding='utf-8') as f:
             json.dump(transformed_entities, f, indent=4, ensure_ascii=False)
-        logger.info(f"Resultado da transformação v2 salvo em {output_filename}")
+        logger.info("Resultado da transformação v2 salvo em %s", output_filename)
 
     except FileNotFoundError:
         logger.error("Arquivos de exemplo (output_data.json, output_hierarchical.json) não encontrados. Crie-os ou ajuste o caminho.")
     except json.JSONDecodeError:
         logger.error("Erro ao decodificar JSON dos arquivos de exemplo.")
     except Exception as e:
-        logger.error(f"Erro inesperado durante o exemplo de uso: {e}", exc_info=True)
\ No newline at end of file
+        logger.error("Erro inesperado durante o exemplo de uso: %s", e, exc_info=True)
\ No newline at end of file
@@ -0,0 +1,387 @@
+"""
+Crawl distribuído: coordenador e workers compartilhando uma fila em SQLite.
+
+O coordenador divide cada DocType em faixas de nomes (ver sharded_crawl) e
+grava uma tarefa (DocType, faixa) por faixa em um arquivo SQLite acessível
+por todos os nós. Qualquer quantidade de workers pega tarefas com um lease de
+tempo limitado, busca os documentos, grava-os no mesmo arquivo e confirma a
+tarefa. Se um worker morrer, o lease expira e a tarefa volta a ficar disponível
+(até DEFAULT_MAX_ATTEMPTS vezes).
+
+O arquivo é reaproveitado entre execuções: cada reset() do coordenador grava um
+novo run_id nas configurações e nas tarefas, e os workers só pegam tarefas da
+execução atual, relendo as configurações quando o run_id muda.
+
+O arquivo usa o journal de rollback (journal_mode=DELETE), não o WAL: o WAL
+depende de memória compartilhada em um único host. Com workers em várias
+máquinas, a exclusão mútua depende dos locks de arquivo (POSIX) do sistema de
+arquivos compartilhado; em NFS eles costumam ser pouco confiáveis (leases
+perdidos ou arquivo corrompido). Nesse caso, use um sistema de arquivos com
+locks confiáveis ou mantenha coordenador e workers na mesma máquina.
+"""
+
+import contextlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from sharded_crawl import fetch_name_range, plan_name_ranges
+from api_client_data import DEFAULT_PAGE_SIZE
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Valores padrão da fila
+DEFAULT_QUEUE_PATH = os.path.join("output", "crawl_queue.sqlite")
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_POLL_SECONDS = 2.0
+DEFAULT_STALL_LEASES = 3 # Leases seguidos sem progresso até o coordenador desistir
+
+class WorkQueue:
+    """
+    Fila de tarefas com lease e armazenamento de documentos em um arquivo SQLite.
+
+    Estados de uma tarefa: 'pending' -> 'leased' -> 'done' (ou 'failed' após
+    DEFAULT_MAX_ATTEMPTS tentativas). Uma tarefa 'leased' com lease vencido é
+    tratada como 'pending' por lease(), ou marcada como 'failed' se já usou
+    todas as tentativas (ex: uma faixa que derruba o worker toda vez).
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """
+        Args:
+            path (str): Caminho do arquivo SQLite compartilhado.
+            max_attempts (int): Tentativas por tarefa antes de marcá-la como 'failed'.
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=DELETE") # Ver o docstring do módulo
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                " id INTEGER PRIMARY KEY,"
+                " doctype TEXT NOT NULL,"
+                " lower TEXT,"
+                " upper TEXT,"
+                " status TEXT NOT NULL,"
+                " lease_owner TEXT,"
+                " lease_expires REAL,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " error TEXT,"
+                " run_id TEXT)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(tasks)")}
+            if "run_id" not in columns: # Filas criadas antes do run_id
+                conn.execute("ALTER TABLE tasks ADD COLUMN run_id TEXT")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " doctype TEXT NOT NULL,"
+                " name TEXT NOT NULL,"
+                " data TEXT NOT NULL,"
+                " PRIMARY KEY (doctype, name))"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # Uma conexão por operação; o timeout espera locks de outros processos/nós
+        # (confirmada ou desfeita ao sair do bloco e sempre fechada)
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def reset(self, tasks, settings):
+        """
+        Substitui a fila por novas tarefas de uma nova execução e limpa os documentos.
+
+        Args:
+            tasks (list): Tuplas (doctype, início, fim).
+            settings (dict): Parâmetros repassados aos workers (metadados, page_size, ...).
+
+        Returns:
+            str: O run_id da nova execução (gravado nas configurações e nas tarefas).
+        """
+        run_id = uuid.uuid4().hex
+        settings = dict(settings, run_id=run_id)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM tasks")
+            conn.execute("DELETE FROM documents")
+            conn.execute("DELETE FROM settings")
+            conn.executemany("INSERT INTO tasks (doctype, lower, upper, status, run_id) VALUES (?, ?, ?, 'pending', ?)",
+                             [(doctype, lower, upper, run_id) for doctype, lower, upper in tasks])
+            conn.executemany("INSERT INTO settings (key, value) VALUES (?, ?)",
+                             [(key, json.dumps(value)) for key, value in settings.items()])
+            conn.execute("COMMIT")
+        return run_id
+
+    def settings(self):
+        """Retorna os parâmetros gravados pelo coordenador (incluindo o run_id da execução)."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT key, value FROM settings").fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def lease(self, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """
+        Reserva a próxima tarefa pendente (ou com lease vencido) da execução atual.
+
+        Leases vencidos de tarefas que já usaram max_attempts tentativas são
+        marcados como 'failed' em vez de voltarem à fila.
+
+        Returns:
+            dict or None: {"id", "doctype", "lower", "upper", "attempts", "run_id"}, ou None se não
+                          houver tarefa disponível.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE tasks SET status = 'failed', lease_owner = NULL, lease_expires = NULL,"
+                " error = COALESCE(error, 'Lease expirado após a última tentativa')"
+                " WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?", (now, self.max_attempts)
+            )
+            run_id = conn.execute("SELECT value FROM settings WHERE key = 'run_id'").fetchone()
+            run_id = json.loads(run_id[0]) if run_id is not None else None
+            row = conn.execute(
+                "SELECT id, doctype, lower, upper, attempts FROM tasks"
+                " WHERE run_id IS ? AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?))"
+                " ORDER BY id LIMIT 1", (run_id, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1"
+                " WHERE id = ?", (worker_id, now + lease_seconds, row[0])
+            )
+            conn.execute("COMMIT")
+        task_id, doctype, lower, upper, attempts = row
+        return {"id": task_id, "doctype": doctype, "lower": lower, "upper": upper, "attempts": attempts + 1,
+                "run_id": run_id}
+
+    def renew(self, task_id, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Estende o lease de uma tarefa. Retorna False se o lease já não pertence ao worker."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (time.time() + lease_seconds, task_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def ack(self, task_id, worker_id, documents):
+        """
+        Grava os documentos da tarefa e a marca como concluída, na mesma transação.
+
+        Returns:
+            bool: False se o lease foi perdido (a tarefa é de outro worker ou já foi concluída);
+                  nesse caso nada é gravado.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            owner = conn.execute(
+                "SELECT lease_owner FROM tasks WHERE id = ? AND status = 'leased'", (task_id,)
+            ).fetchone()
+            if owner is None or owner[0] != worker_id:
+                conn.execute("ROLLBACK")
+                return False
+            conn.executemany(
+                "INSERT OR REPLACE INTO documents (doctype, name, data) VALUES (?, ?, ?)",
+                [(doc["doctype"], doc["key"], json.dumps(doc["data"], ensure_ascii=False)) for doc in documents]
+            )
+            conn.execute(
+                "UPDATE tasks SET status = 'done', lease_owner = NULL, lease_expires = NULL, error = NULL"
+                " WHERE id = ?", (task_id,)
+            )
+            conn.execute("COMMIT")
+        return True
+
+    def fail(self, task_id, worker_id, error):
+        """Devolve a tarefa à fila, ou a marca como 'failed' se as tentativas se esgotaram."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,"
+                " lease_owner = NULL, lease_expires = NULL, error = ?"
+                " WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (self.max_attempts, str(error), task_id, worker_id)
+            )
+
+    def counts(self):
+        """Retorna {status: quantidade} das tarefas."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+        return dict(rows)
+
+    def progress(self):
+        """
+        Retorna um marcador do progresso da fila: as contagens por status e o lease
+        mais recente (renovado pelos workers enquanto processam uma tarefa).
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status ORDER BY status").fetchall()
+            latest_lease = conn.execute("SELECT MAX(lease_expires) FROM tasks WHERE status = 'leased'").fetchone()[0]
+        return tuple(rows), latest_lease
+
+    def is_finished(self):
+        """True quando não há tarefas pendentes nem em andamento."""
+        counts = self.counts()
+        return not counts.get("pending") and not counts.get("leased")
+
+    def documents(self, doctype_names):
+        """
+        Monta all_doctype_data com os documentos gravados pelos workers.
+
+        Args:
+            doctype_names (list): DocTypes na ordem desejada (a de all_doctypes).
+
+        Returns:
+            list: Documentos agrupados por DocType e ordenados por 'name'.
+        """
+        output = []
+        with self._connect() as conn:
+            for doctype_name in doctype_names:
+                rows = conn.execute(
+                    "SELECT name, data FROM documents WHERE doctype = ? ORDER BY name", (doctype_name,)
+                ).fetchall()
+                output.extend({"doctype": doctype_name, "key": name, "data": json.loads(data)} for name, data in rows)
+        return output
+
+def run_coordinator(client, all_doctypes, doctypes_with_fields, queue, shards=1, page_size=DEFAULT_PAGE_SIZE,
+                    project_fields=False, sharded_doctypes=None, poll_seconds=DEFAULT_POLL_SECONDS,
+                    lease_seconds=DEFAULT_LEASE_SECONDS, stall_leases=DEFAULT_STALL_LEASES):
+    """
+    Planeja as tarefas, grava-as na fila e aguarda os workers concluírem.
+
+    Args:
+        client (ArterisClient): Cliente usado para descobrir os intervalos de nomes.
+        all_doctypes (list): DocTypes retornados por process_arteris_doctypes.
+        doctypes_with_fields (dict): Metadados {doctype_name: fields}, repassados aos workers.
+        queue (WorkQueue): Fila compartilhada.
+        shards (int): Quantidade de faixas por DocType.
+        page_size (int): Quantidade de registros por página.
+        project_fields (bool): Se True, os workers pedem apenas as colunas usadas pela estrutura hierárquica.
+        sharded_doctypes (list, optional): DocTypes divididos em faixas (padrão: todos).
+        poll_seconds (float): Intervalo entre as verificações de progresso.
+        lease_seconds (float): Duração do lease usada pelos workers.
+        stall_leases (float): O coordenador desiste se a fila ficar stall_leases * lease_seconds
+                              sem progresso (nenhuma tarefa concluída, devolvida ou com lease renovado).
+
+    Returns:
+        list or None: all_doctype_data, na ordem de all_doctypes e, dentro de cada DocType, de 'name';
+                      None se a fila parar de progredir (ex: nenhum worker em execução).
+    """
+    doctype_names = [doctype.get("name") for doctype in all_doctypes if doctype.get("name")]
+    plan = plan_name_ranges(client, doctype_names, shards, sharded_doctypes)
+    tasks = [(doctype_name, lower, upper) for doctype_name, ranges in plan.items() for lower, upper in ranges]
+    queue.reset(tasks, {
+        "doctypes_with_fields": doctypes_with_fields,
+        "page_size": page_size,
+        "project_fields": project_fields,
+    })
+    logger.info("--- Coordenador: %s tarefas gravadas em %s; aguardando os workers ---", len(tasks), queue.path)
+
+    last_counts = None
+    last_progress = None
+    last_progress_at = time.monotonic()
+    stall_seconds = stall_leases * lease_seconds
+    while not queue.is_finished():
+        counts = queue.counts()
+        if counts != last_counts:
+            logger.info("Tarefas: %s concluídas, %s em andamento, %s pendentes, %s com falha",
+                        counts.get('done', 0), counts.get('leased', 0), counts.get('pending', 0),
+                        counts.get('failed', 0))
+            last_counts = counts
+        progress = queue.progress()
+        if progress != last_progress:
+            last_progress = progress
+            last_progress_at = time.monotonic()
+        elif time.monotonic() - last_progress_at > stall_seconds:
+            logger.error("Erro: a fila %s ficou %.0fs sem progresso; há workers em execução?",
+                         queue.path, stall_seconds)
+            return None
+        time.sleep(poll_seconds)
+
+    counts = queue.counts()
+    if counts.get("failed"):
+        logger.warning("Aviso: %s tarefas falharam após %s tentativas; os documentos dessas faixas estão ausentes.",
+                       counts['failed'], queue.max_attempts)
+    return queue.documents(doctype_names)
+
+def run_worker(client, queue, worker_id=None, lease_seconds=DEFAULT_LEASE_SECONDS,
+               poll_seconds=DEFAULT_POLL_SECONDS, wait_for_tasks=True):
+    """
+    Consome tarefas da fila até ela terminar.
+
+    O lease é renovado em segundo plano enquanto a tarefa é processada, então
+    tarefas longas não expiram; apenas workers que morreram perdem o lease.
+
+    Args:
+        client (ArterisClient): Cliente HTTP do worker.
+        queue (WorkQueue): Fila compartilhada.
+        worker_id (str, optional): Identificador do worker (padrão: host:pid).
+        lease_seconds (float): Duração do lease de uma tarefa.
+        poll_seconds (float): Espera quando não há tarefa disponível.
+        wait_for_tasks (bool): Se True, espera o coordenador criar a fila (ou uma nova execução,
+                               se a execução gravada já terminou) em vez de sair logo.
+
+    Returns:
+        int: Quantidade de tarefas concluídas por este worker.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    settings = queue.settings()
+    # Uma fila sem execução ou com a execução anterior já terminada: o coordenador ainda não fez o reset()
+    while wait_for_tasks and (not settings or queue.is_finished()):
+        time.sleep(poll_seconds)
+        settings = queue.settings()
+
+    logger.info("--- Worker %s consumindo tarefas de %s ---", worker_id, queue.path)
+    completed = 0
+    while True:
+        task = queue.lease(worker_id, lease_seconds)
+        if task is None:
+            if queue.is_finished():
+                break
+            time.sleep(poll_seconds) # Tarefas em andamento em outros workers podem voltar à fila
+            continue
+        if task["run_id"] != settings.get("run_id"):
+            settings = queue.settings() # Nova execução do coordenador: metadados e page_size podem ter mudado
+        doctypes_with_fields = settings.get("doctypes_with_fields", {})
+        page_size = settings.get("page_size", DEFAULT_PAGE_SIZE)
+        project_fields = settings.get("project_fields", False)
+
+        stop_renewal = threading.Event()
+        def renew_lease(task_id=task["id"]):
+            while not stop_renewal.wait(lease_seconds / 3):
+                if not queue.renew(task_id, worker_id, lease_seconds):
+                    return
+        renewal = threading.Thread(target=renew_lease, daemon=True)
+        renewal.start()
+        try:
+            documents = fetch_name_range(client, task["doctype"], doctypes_with_fields,
+                                         task["lower"], task["upper"], page_size, project_fields)
+        finally:
+            stop_renewal.set()
+            renewal.join()
+
+        label = f"{task['doctype']} [{task['lower']}, {task['upper']})"
+        if documents is None:
+            queue.fail(task["id"], worker_id, "Erro ao buscar a faixa")
+            logger.warning("Tarefa %s (%s) falhou na tentativa %s.", task['id'], label, task['attempts'])
+        elif queue.ack(task["id"], worker_id, documents):
+            completed += 1
+            logger.info("Tarefa %s (%s) concluída: %s documentos.", task['id'], label, len(documents))
+        else:
+            logger.info("Tarefa %s (%s) descartada: o lease expirou e ela foi assumida por outro worker.",
+                        task['id'], label)
+    logger.info("Worker %s finalizado: %s tarefas concluídas.", worker_id, completed)
+    return completed
@@ -0,0 +1,247 @@
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Valores padrão do executor
+DEFAULT_MAX_WORKERS = 8
+
+def percentile(sorted_values, pct):
+    """
+    Calcula o percentil (método nearest-rank) de uma lista já ordenada.
+
+    Args:
+        sorted_values (list): Valores em ordem crescente.
+        pct (float): Percentil desejado, entre 0 e 100.
+
+    Returns:
+        float or None: O valor do percentil, ou None se a lista estiver vazia.
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+class FetchStats:
+    """Acumula contagens e latências das requisições executadas pelo FetchExecutor."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = None
+        self.finished_at = None
+        self.count = 0
+        self.errors = 0
+        self.latencies = []
+        self.per_doctype = {}
+
+    def start(self):
+        """Marca o início da medição (apenas na primeira chamada)."""
+        with self._lock:
+            if self.started_at is None:
+                self.started_at = time.perf_counter()
+
+    def record(self, doctype, latency, error=False):
+        """Registra a conclusão de uma tarefa."""
+        with self._lock:
+            now = time.perf_counter()
+            if self.started_at is None:
+                self.started_at = now - latency
+            self.finished_at = now
+            self.count += 1
+            if error:
+                self.errors += 1
+            self.latencies.append(latency)
+            self.per_doctype[doctype] = self.per_doctype.get(doctype, 0) + 1
+
+    def summary(self):
+        """
+        Resume as estatísticas acumuladas.
+
+        Returns:
+            dict: count, errors, elapsed (s), throughput (req/s) e p50/p95/p99 (s).
+        """
+        with self._lock:
+            latencies = sorted(self.latencies)
+            elapsed = (self.finished_at - self.started_at) if self.count else 0.0
+            return {
+                "count": self.count,
+                "errors": self.errors,
+                "elapsed": elapsed,
+                "throughput": (self.count / elapsed) if elapsed > 0 else 0.0,
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "per_doctype": dict(self.per_doctype),
+            }
+
+class FetchExecutor:
+    """
+    Executor de buscas com concorrência limitada, baseado em threads.
+
+    Limita o número de requisições em andamento (max_workers), opcionalmente
+    limita quantas requisições de um mesmo DocType rodam ao mesmo tempo
+    (per_doctype_limit) e entrega os resultados na ordem de entrada ou na
+    ordem de conclusão. As latências são acumuladas em self.stats.
+    Com self.deadline (CrawlDeadline), novas tarefas deixam de ser iniciadas
+    quando o tempo restante não cobre a duração típica de uma tarefa.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, per_doctype_limit=None, ordered=True, deadline=None):
+        """
+        Args:
+            max_workers (int): Número máximo de requisições simultâneas.
+            per_doctype_limit (int or dict, optional): Limite de requisições simultâneas
+                por DocType. Um int vale para todos; um dict {doctype: limite} define
+                limites individuais (DocTypes ausentes ficam sem limite próprio).
+            ordered (bool): Se True, os resultados são entregues na ordem das tarefas.
+            deadline (CrawlDeadline, optional): Prazo para iniciar novas tarefas.
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.per_doctype_limit = per_doctype_limit
+        self.ordered = ordered
+        self.stats = FetchStats()
+        self.deadline = deadline
+
+    def _limit_for(self, doctype):
+        if isinstance(self.per_doctype_limit, dict):
+            limit = self.per_doctype_limit.get(doctype)
+        else:
+            limit = self.per_doctype_limit
+        return None if limit is None else max(1, int(limit))
+
+    def _timed_call(self, doctype, func, args):
+        start = time.perf_counter()
+        try:
+            result = func(*args)
+            error = result is None
+        except Exception as e:
+            logger.error("Erro inesperado ao buscar dados de %s: %s", doctype, e)
+            result = None
+            error = True
+        elapsed = time.perf_counter() - start
+        self.stats.record(doctype, elapsed, error)
+        if self.deadline is not None:
+            self.deadline.record(elapsed)
+        return result
+
+    def run(self, tasks, ordered=None):
+        """
+        Executa as tarefas e entrega os resultados conforme ficam prontos.
+
+        As tarefas são consumidas sob demanda do iterável, então listas muito
+        grandes (ou geradores) não são materializadas de uma só vez.
+
+        Args:
+            tasks (iterable): Tuplas (doctype, func, args); func(*args) é chamada em uma thread.
+            ordered (bool, optional): Sobrescreve a ordem de entrega definida no construtor.
+
+        Yields:
+            tuple: (doctype, args, resultado). Exceções viram resultado None.
+                   Tarefas não iniciadas por causa do prazo não são entregues.
+        """
+        ordered = self.ordered if ordered is None else ordered
+        self.stats.start()
+        task_iter = iter(tasks)
+        exhausted = False
+        deferred = deque() # Tarefas aguardando vaga no limite do seu DocType
+        in_flight = {}     # future -> (índice, tarefa)
+        running = {}       # doctype -> requisições em andamento
+        buffered = {}      # índice -> resultado (apenas no modo ordenado)
+        next_index = 0
+        next_to_yield = 0
+
+        def has_room(doctype):
+            limit = self._limit_for(doctype)
+            return limit is None or running.get(doctype, 0) < limit
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                # Preenche as vagas livres, priorizando tarefas adiadas
+                while len(in_flight) < self.max_workers:
+                    if (self.deadline is not None and (not exhausted or deferred)
+                            and not self.deadline.allows_new_task()):
+                        # Prazo: descarta as tarefas que ainda não começaram
+                        skipped = len(deferred) + sum(1 for _ in task_iter)
+                        deferred.clear()
+                        exhausted = True
+                        self.deadline.skip(skipped)
+                        logger.warning("Prazo do crawl: %s tarefas não iniciadas.", skipped)
+                        break
+                    # Tarefas adiadas já foram lidas e sempre podem começar (a próxima a ser
+                    # entregue pode estar entre elas)
+                    task = None
+                    for i, (index, candidate) in enumerate(deferred):
+                        if has_room(candidate[0]):
+                            task = (index, candidate)
+                            del deferred[i]
+                            break
+                    if task is None:
+                        # Não lê além de um limite de tarefas adiadas para manter a memória limitada
+                        if exhausted or len(deferred) >= self.max_workers * 4:
+                            break
+                        # No modo ordenado, espera a tarefa atrasada antes de acumular muitos
+                        # resultados (sem nada em andamento, a leitura continua)
+                        if ordered and in_flight and len(buffered) >= self.max_workers * 16:
+                            break
+                        try:
+                            candidate = next(task_iter)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        index = next_index
+                        next_index += 1
+                        if not has_room(candidate[0]):
+                            deferred.append((index, candidate))
+                            continue
+                        task = (index, candidate)
+
+                    index, (doctype, func, args) = task
+                    running[doctype] = running.get(doctype, 0) + 1
+                    future = pool.submit(self._timed_call, doctype, func, args)
+                    in_flight[future] = task
+
+                if not in_flight:
+                    break
+
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, (doctype, func, args) = in_flight.pop(future)
+                    running[doctype] -= 1
+                    item = (doctype, args, future.result())
+                    if ordered:
+                        buffered[index] = item
+                    else:
+                        yield item
+
+                while ordered and next_to_yield in buffered:
+                    yield buffered.pop(next_to_yield)
+                    next_to_yield += 1
+
+            # Tarefas adiadas descartadas pelo prazo deixam lacunas na ordem
+            for index in sorted(buffered):
+                yield buffered[index]
+
+    def print_report(self, title="Busca", per_task=False):
+        """
+        Imprime throughput e percentis de latência acumulados.
+
+        Args:
+            title (str): Título do relatório.
+            per_task (bool): Se True, os números são apresentados como tarefas e
+                duração das tarefas, e não como requisições. Usado quando uma
+                tarefa faz várias requisições (ex.: a carga em lote, com uma
+                tarefa por DocType).
+        """
+        summary = self.stats.summary()
+        unit, rate_unit, latency = (("tarefas", "tarefas/s", "Duração das tarefas") if per_task
+                                    else ("requisições", "req/s", "Latência"))
+        if not summary["count"]:
+            logger.info("%s: nenhuma %s executada.", title, "tarefa" if per_task else "requisição")
+            return
+        logger.info("%s: %s %s (%s com erro) em %.2fs - %.1f %s", title, summary['count'], unit,
+                    summary['errors'], summary['elapsed'], summary['throughput'], rate_unit)
+        logger.info("%s: p50=%.0fms p95=%.0fms p99=%.0fms", latency,
+                    summary['p50'] * 1000, summary['p95'] * 1000, summary['p99'] * 1000)
@@ -1,62 +1,169 @@
 import api_client # Importa o módulo api_client
+from fetch_executor import FetchExecutor
+from log_config import get_logger
 
-def process_arteris_doctypes(api_base_url, api_token): # Renomeia a função
+logger = get_logger(__name__)
+
+# Versão do conjunto de DocFields gravado no cache de metadados: entradas de versões
+# anteriores (o modo em lote filtrava campos ocultos e de fórmula) são buscadas de novo
+METADATA_FIELDS_VERSION = 2
+
+def process_arteris_doctypes(client, bulk=False, executor=None, cache=None, force_refresh=False): # Renomeia a função
+    """
+    Busca os DocTypes do módulo Arteris, seus DocFields e o mapeamento child -> parent.
+
+    Args:
+        client (ArterisClient): Cliente HTTP compartilhado da API Arteris.
+        bulk (bool): Se True, usa o modo em lote (uma listagem de DocTypes e
+                     DocFields paginados com 'parent in [...]') em vez de uma
+                     chamada por DocType.
+        executor (FetchExecutor, optional): Executor usado para buscar os DocFields
+                     de cada DocType em paralelo. Se None, as buscas são sequenciais.
+        cache (MetadataCache, optional): Cache local de metadados. Quando informado,
+                     uma única listagem de DocTypes (com 'modified') decide quais
+                     DocFields precisam ser buscados; os demais vêm do cache.
+        force_refresh (bool): Ignora o cache e busca novamente todos os DocFields.
+
+    Returns:
+        tuple: (all_doctypes, child_parent_mapping, doctypes_with_fields) ou
+               (None, None, None) em caso de falha.
+    """
+    if executor is None:
+        executor = FetchExecutor(max_workers=1)
+    if bulk or cache is not None:
+        return _process_arteris_doctypes_from_listing(client, bulk, executor, cache, force_refresh)
 
     # Lista para armazenar os DocTypes e seus campos
     doctypes_with_fields = {}
 
     # --- Etapa 1: Buscar DocTypes ---
-    print("--- Etapa 1: Buscando DocTypes ---")
+    logger.info("--- Etapa 1: Buscando DocTypes ---")
     # Chama a função de api_client
-    all_doctypes = api_client.get_arteris_doctypes(api_base_url, api_token)
+    all_doctypes = api_client.get_arteris_doctypes(client)
     if all_doctypes is None:
-        print("Não foi possível obter a lista de DocTypes. Encerrando.")
+        logger.error("Não foi possível obter a lista de DocTypes. Encerrando.")
         return None, None, None # Retorna None para indicar falha
-    print(f"Encontrados {len(all_doctypes)} DocTypes no módulo Arteris.")
+    logger.info("Encontrados %s DocTypes no módulo Arteris.", len(all_doctypes))
 
     # --- Etapa 1.1: Buscar DocFields para cada DocType ---
-    print("\n--- Etapa 2: Buscando DocFields ---")
+    logger.info("--- Etapa 2: Buscando DocFields ---")
 
-    for doc in all_doctypes:
-        doctype_name = doc.get("name")
-        if doctype_name:
-            # Chama a função de api_client
-            docfields = api_client.get_docfields_for_doctype(api_base_url, api_token, doctype_name)
-            if docfields is not None:
-                doctypes_with_fields[doctype_name] = docfields
-            else:
-                print(f"Erro ao buscar DocFields para {doctype_name}. Marcando como None.")
-                doctypes_with_fields[doctype_name] = None # Marca erro
-        else:
-            print("Aviso: Encontrado DocType sem nome.")
-    print("Busca de DocFields concluída.")    
+    _fetch_docfields(client, executor, all_doctypes, doctypes_with_fields, child=False)
+    logger.info("Busca de DocFields concluída.")
 
-    print("--- Etapa 2: Buscando DocTypes Child ---")
+    logger.info("--- Etapa 2: Buscando DocTypes Child ---")
     # Chama a função de api_client
-    all_doctypes_child = api_client.get_arteris_doctypes_child(api_base_url, api_token)
+    all_doctypes_child = api_client.get_arteris_doctypes_child(client)
     if all_doctypes_child is None:
-        print("Não foi possível obter a lista de DocTypes Child. Encerrando.")
+        logger.error("Não foi possível obter a lista de DocTypes Child. Encerrando.")
         return None, None, None # Retorna None para indicar falha
-    print(f"Encontrados {len(all_doctypes_child)} DocTypes Child no módulo Arteris.")
+    logger.info("Encontrados %s DocTypes Child no módulo Arteris.", len(all_doctypes_child))
 
     # --- Etapa 2.1: Buscar DocFields para cada DocType Child---
-    print("\n--- Etapa 2: Buscando DocFields Child ---")
-    for doc in all_doctypes_child:
+    logger.info("--- Etapa 2: Buscando DocFields Child ---")
+    _fetch_docfields(client, executor, all_doctypes_child, doctypes_with_fields, child=True)
+    logger.info("Busca de DocFields Child concluída.")
+
+    # --- Etapa 3: Localizar os "Parents" ---
+    child_parent_mapping = _build_child_parent_mapping(doctypes_with_fields)
+
+    # Retorna os resultados
+    return all_doctypes, child_parent_mapping, doctypes_with_fields
+
+def _fetch_docfields(client, executor, doctypes, doctypes_with_fields, child):
+    """
+    Busca os DocFields de cada DocType da lista através do executor e grava o
+    resultado em doctypes_with_fields (None marca erro), na ordem da lista.
+    """
+    tasks = []
+    for doc in doctypes:
         doctype_name = doc.get("name")
         if doctype_name:
-            # Chama a função de api_client
-            docfields = api_client.get_docfields_for_doctype(api_base_url, api_token, doctype_name, True)
-            if docfields is not None:
-                doctypes_with_fields[doctype_name] = docfields
-            else:
-                print(f"Erro ao buscar DocFields para {doctype_name}. Marcando como None.")
-                doctypes_with_fields[doctype_name] = None # Marca erro
+            tasks.append((doctype_name, api_client.get_docfields_for_doctype, (client, doctype_name, child)))
+        else:
+            logger.warning("Aviso: Encontrado DocType sem nome.")
+
+    for doctype_name, _, docfields in executor.run(tasks, ordered=True):
+        if docfields is not None:
+            doctypes_with_fields[doctype_name] = docfields
         else:
-            print("Aviso: Encontrado DocType sem nome.")
-    print("Busca de DocFields Child concluída.")    
+            logger.error("Erro ao buscar DocFields para %s. Marcando como None.", doctype_name)
+            doctypes_with_fields[doctype_name] = None # Marca erro
+
+def _process_arteris_doctypes_from_listing(client, bulk, executor, cache, force_refresh):
+    """
+    Variante de process_arteris_doctypes baseada em uma única listagem de todos
+    os DocTypes (com 'istable' e 'modified'). Os DocFields são buscados em lote
+    ('parent in [...]') ou por DocType, e apenas para os DocTypes ausentes ou
+    desatualizados no cache (todos, se não houver cache).
+    """
+    mode = "bulk" if bulk else "per_doctype"
+    cache_mode = f"{mode}/v{METADATA_FIELDS_VERSION}"
+
+    # --- Etapa 1: Buscar todos os DocTypes (normais e Child) ---
+    logger.info("--- Etapa 1: Buscando DocTypes (listagem única) ---")
+    doctypes = api_client.get_arteris_doctypes_all(client)
+    if doctypes is None:
+        logger.error("Não foi possível obter a lista de DocTypes. Encerrando.")
+        return None, None, None
+    doctypes = [d for d in doctypes if d.get("name")]
+
+    all_doctypes = [{"name": d["name"]} for d in doctypes if not d.get("istable")]
+    child_names = [d["name"] for d in doctypes if d.get("istable")]
+    parent_names = [d["name"] for d in all_doctypes]
+    logger.info("Encontrados %s DocTypes e %s DocTypes Child no módulo Arteris.", len(parent_names), len(child_names))
+
+    # --- Etapa 2: Buscar DocFields (apenas os desatualizados, se houver cache) ---
+    if cache is not None:
+        to_fetch = cache.stale_names(doctypes, cache_mode, force_refresh)
+        logger.info("Cache de metadados: %s DocTypes válidos, %s a buscar.",
+                    len(doctypes) - len(to_fetch), len(to_fetch))
+    else:
+        to_fetch = [d["name"] for d in doctypes]
+
+    logger.info("--- Etapa 2: Buscando DocFields (%s) ---", mode)
+    fetched = {}
+    if to_fetch and bulk:
+        fetched = api_client.get_docfields_bulk(client, to_fetch)
+        if fetched is None:
+            logger.error("Não foi possível obter os DocFields em lote. Encerrando.")
+            return None, None, None
+    elif to_fetch:
+        fetch_set = set(to_fetch)
+        _fetch_docfields(client, executor, [{"name": n} for n in parent_names if n in fetch_set], fetched, child=False)
+        _fetch_docfields(client, executor, [{"name": n} for n in child_names if n in fetch_set], fetched, child=True)
+
+    if cache is not None:
+        cache.store(doctypes, fetched, cache_mode)
+        cache.prune(d["name"] for d in doctypes)
+        cached = cache.load()
+        for name in parent_names + child_names:
+            if name not in fetched and name in cached:
+                fetched[name] = cached[name]["docfields"]
+
+    # Mantém a mesma ordem e formato do modo por DocType: primeiro os DocTypes,
+    # depois os Child, e 'parent' presente apenas nos campos dos Child.
+    doctypes_with_fields = {}
+    for doctype_name in parent_names:
+        docfields = fetched.get(doctype_name, [])
+        doctypes_with_fields[doctype_name] = None if docfields is None else [
+            {k: v for k, v in f.items() if k != "parent"} for f in docfields
+        ]
+    for doctype_name in child_names:
+        doctypes_with_fields[doctype_name] = fetched.get(doctype_name, [])
+    logger.info("Busca de DocFields concluída.")
 
     # --- Etapa 3: Localizar os "Parents" ---
-    print("\n--- Etapa 3: Localizando os 'Parents' ---")
+    child_parent_mapping = _build_child_parent_mapping(doctypes_with_fields)
+
+    return all_doctypes, child_parent_mapping, doctypes_with_fields
+
+def _build_child_parent_mapping(doctypes_with_fields):
+    """
+    Monta a lista de mapeamentos {"child": ..., "parent": ...} a partir dos campos
+    do tipo 'Table' de cada DocType.
+    """
+    logger.info("--- Etapa 3: Localizando os 'Parents' ---")
     child_parent_mapping = [] # Lista para mapear child -> parent
 
     # Itera sobre cada DocType que pode ser um "Parent"
@@ -78,10 +185,9 @@ def process_arteris_doctypes(api_base_url, api_token): # Renomeia a função
                         "parent": doctype_name
                     }
                 )
-    print("Mapeamento Child-Parent concluído.")
+    logger.info("Mapeamento Child-Parent concluído.")
     # Criar um dicionário para mapeamento rápido de child para parent
     child_to_parent = {mapping["child"]: mapping["parent"] for mapping in child_parent_mapping}
-    print(f"Mapeamento Child -> Parent: {child_to_parent}") # Log para depuração
+    logger.debug("Mapeamento Child -> Parent: %s", child_to_parent)
 
-    # Retorna os resultados
-    return all_doctypes, child_parent_mapping, doctypes_with_fields
+    return child_parent_mapping
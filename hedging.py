@@ -0,0 +1,151 @@
+"""
+Requisições "hedged" para reduzir a latência de cauda na API Arteris.
+
+Se um GET não responde dentro de um percentil da latência recente (ex: p95),
+uma cópia da requisição é enviada e a primeira resposta bem-sucedida é usada;
+a outra é descartada. Uma resposta retentável (429/5xx) não vence: a corrida
+continua esperando a outra. A quantidade de cópias é limitada a uma fração das
+requisições (max_hedge_rate), para não multiplicar a carga quando o servidor
+inteiro fica lento.
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from fetch_executor import percentile
+from retry_policy import RetryPolicy
+
+# Valores padrão da política de hedge
+DEFAULT_HEDGE_PERCENTILE = 95
+DEFAULT_MAX_HEDGE_RATE = 0.05
+DEFAULT_HEDGE_WINDOW = 200
+DEFAULT_HEDGE_MIN_SAMPLES = 20
+DEFAULT_HEDGE_MIN_DELAY = 0.05
+
+class HedgePolicy:
+    """
+    Decide quando enviar a cópia de uma requisição e executa a corrida entre as duas.
+
+    O atraso do hedge é o percentil `percentile` das últimas `window` latências
+    (nunca menor que `min_delay`); enquanto houver menos de `min_samples`
+    medições, nenhuma cópia é enviada.
+    """
+
+    def __init__(self, percentile=DEFAULT_HEDGE_PERCENTILE, max_hedge_rate=DEFAULT_MAX_HEDGE_RATE,
+                 window=DEFAULT_HEDGE_WINDOW, min_samples=DEFAULT_HEDGE_MIN_SAMPLES,
+                 min_delay=DEFAULT_HEDGE_MIN_DELAY, max_workers=None):
+        """
+        Args:
+            percentile (float): Percentil da latência recente após o qual a cópia é enviada.
+            max_hedge_rate (float): Fração máxima de requisições que podem ganhar uma cópia.
+            window (int): Quantidade de latências recentes consideradas.
+            min_samples (int): Medições necessárias antes do primeiro hedge.
+            min_delay (float): Atraso mínimo em segundos antes de uma cópia.
+            max_workers (int, optional): Threads usadas para as requisições em corrida
+                                         (padrão: o do ThreadPoolExecutor).
+        """
+        self.percentile = percentile
+        self.max_hedge_rate = max_hedge_rate
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_workers = max_workers
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._pool = None
+        self.counts = {"requests": 0, "hedges_sent": 0, "hedges_won": 0}
+
+    def record(self, latency):
+        """Registra a latência de uma requisição bem-sucedida."""
+        with self._lock:
+            self._latencies.append(latency)
+
+    def hedge_delay(self):
+        """
+        Returns:
+            float or None: Segundos a esperar antes da cópia, ou None sem medições suficientes.
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        return max(self.min_delay, percentile(latencies, self.percentile))
+
+    def _allow_hedge(self):
+        """Reserva uma cópia se a fração de hedges ainda estiver abaixo de max_hedge_rate."""
+        with self._lock:
+            if self.counts["hedges_sent"] + 1 > self.max_hedge_rate * self.counts["requests"]:
+                return False
+            self.counts["hedges_sent"] += 1
+            return True
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hedge")
+            return self._pool
+
+    def run(self, send, classify=RetryPolicy.classify):
+        """
+        Executa `send()` e, se ela demorar mais que hedge_delay(), uma segunda chamada.
+
+        Vence a primeira chamada bem-sucedida (sem exceção e com classify(resposta, None)
+        None); uma resposta com falha (ex: 429 ou 503) não encerra a corrida. Se as duas
+        falharem, vale o resultado da original (ou a resposta da cópia, se a original
+        lançou exceção). A resposta perdedora é fechada quando chegar.
+
+        Args:
+            send (callable): Função sem argumentos que executa o GET e retorna a resposta.
+            classify (callable): Classificador das tentativas (ver RetryPolicy.classify).
+
+        Returns:
+            requests.Response: A resposta vencedora.
+        """
+        self._count("requests")
+        delay = self.hedge_delay()
+        if delay is None:
+            return send()
+
+        pool = self._executor()
+        primary = pool.submit(send)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._allow_hedge():
+            return primary.result()
+
+        hedge = pool.submit(send)
+        pending = {primary, hedge}
+        winner = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((future for future in (primary, hedge) if future in done
+                           and future.exception() is None and classify(future.result(), None) is None), None)
+        if winner is not None:
+            if winner is hedge:
+                self._count("hedges_won")
+        else:
+            # As duas falharam: a original, a menos que ela tenha lançado exceção e a cópia não
+            winner = hedge if primary.exception() is not None and hedge.exception() is None else primary
+        for future in (primary, hedge):
+            if future is not winner:
+                future.add_done_callback(_close_response)
+        return winner.result()
+
+    def summary(self):
+        with self._lock:
+            return dict(self.counts)
+
+    def close(self):
+        """Encerra as threads da corrida (as requisições em andamento terminam antes)."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+def _close_response(future):
+    """Fecha a resposta descartada, devolvendo a conexão ao pool."""
+    if future.exception() is None and future.result() is not None:
+        future.result().close()
@@ -0,0 +1,36 @@
+"""
+Critério compartilhado dos campos que entram na estrutura hierárquica.
+
+Usado pelo transformador (json_to_entity_transformer.process_fields_for_hierarchy)
+e pela projeção de campos das buscas de documentos
+(api_client_data.get_projected_fields), sem que a camada de acesso à API
+dependa do transformador.
+"""
+
+# Campos de controle do Frappe que não entram na estrutura hierárquica
+HIERARCHY_IGNORED_FIELDNAMES = ["owner", "creation", "modified", "modified_by",
+                                "docstatus", "idx", "parentfield", "parenttype", "doctype",
+                                "parent"]
+
+def is_hierarchy_field(field):
+    """
+    Indica se um campo dos metadados é considerado na estrutura hierárquica.
+
+    Ignora campos sem nome/tipo, ocultos, de fórmula ('f_'/'fm_') e os campos
+    de controle do Frappe. Campos Link e Table são mantidos (são tratados por
+    process_fields_for_hierarchy).
+
+    Args:
+        field (dict): Metadados de um campo (DocField).
+
+    Returns:
+        bool: True se o campo deve ser considerado.
+    """
+    field_name = field.get("fieldname")
+    if not field_name or not field.get("fieldtype"):
+        return False
+    if field.get("hidden") == 1: # Ignorar campos ocultos
+        return False
+    if field_name.startswith("f_") or field_name.startswith("fm_"): # Ignorar campos de fórmula
+        return False
+    return field_name not in HIERARCHY_IGNORED_FIELDNAMES
@@ -0,0 +1,286 @@
+"""
+Sincronização incremental dos documentos da API Arteris.
+
+Os documentos ficam persistidos localmente (SQLite) junto com uma marca d'água
+('modified' mais recente visto) por DocType. A cada execução apenas os
+documentos com 'modified >= marca d'água' são buscados (em lote), e as remoções
+são detectadas comparando uma listagem só de 'name' com o que está salvo.
+O resultado tem o mesmo formato e a mesma ordem de um crawl completo em lote.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+
+import requests
+
+from api_client_data import (
+    iter_doctype_data_bulk, iter_keys, get_table_fields,
+    PROPERTIES_TO_REMOVE, DEFAULT_PAGE_SIZE
+)
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Caminho padrão do armazenamento local de documentos
+DEFAULT_STORE_PATH = os.path.join("output", "documents.sqlite")
+
+# Tabelas dos documentos: a sincronização completa grava na de preparo e só
+# substitui a cópia atual quando termina sem erro
+DOCUMENTS_TABLE = "documents"
+STAGING_TABLE = "staging_documents"
+
+class DocumentStore:
+    """Conjunto local de documentos por DocType, com marca d'água de 'modified'."""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        """
+        Args:
+            path (str): Caminho do arquivo SQLite.
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self._connect() as conn:
+            for table in (DOCUMENTS_TABLE, STAGING_TABLE):
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    " doctype TEXT NOT NULL,"
+                    " name TEXT NOT NULL,"
+                    " position INTEGER,"
+                    " data TEXT NOT NULL,"
+                    " PRIMARY KEY (doctype, name))"
+                )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS watermarks ("
+                " doctype TEXT PRIMARY KEY,"
+                " modified TEXT,"
+                " schema_hash TEXT)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # Uma conexão por operação; o timeout cobre escritas concorrentes de várias threads
+        # (confirmada ou desfeita ao sair do bloco e sempre fechada)
+        conn = sqlite3.connect(self.path, timeout=60)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_watermark(self, doctype):
+        """Retorna (modified, schema_hash) do DocType, ou (None, None) se nunca sincronizado."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT modified, schema_hash FROM watermarks WHERE doctype = ?",
+                               (doctype,)).fetchone()
+        return row if row else (None, None)
+
+    def set_watermark(self, doctype, modified, schema_hash):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO watermarks (doctype, modified, schema_hash) VALUES (?, ?, ?)",
+                         (doctype, modified, schema_hash))
+
+    def upsert(self, doctype, documents, staging=False):
+        """
+        Grava (ou substitui) documentos no formato {"doctype", "key", "data"}.
+
+        Com staging=True, grava na tabela de preparo (ver commit_staging); o mesmo
+        vale para names, delete e set_positions.
+        """
+        table = STAGING_TABLE if staging else DOCUMENTS_TABLE
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {table} (doctype, name, position, data) VALUES (?, ?,"
+                f" (SELECT position FROM {table} WHERE doctype = ? AND name = ?), ?)",
+                [(doctype, doc["key"], doctype, doc["key"], json.dumps(doc["data"], ensure_ascii=False))
+                 for doc in documents]
+            )
+
+    def names(self, doctype, staging=False):
+        """Retorna o conjunto de 'name' salvos para o DocType."""
+        table = STAGING_TABLE if staging else DOCUMENTS_TABLE
+        with self._connect() as conn:
+            return {row[0] for row in conn.execute(f"SELECT name FROM {table} WHERE doctype = ?", (doctype,))}
+
+    def delete(self, doctype, names, staging=False):
+        table = STAGING_TABLE if staging else DOCUMENTS_TABLE
+        with self._connect() as conn:
+            conn.executemany(f"DELETE FROM {table} WHERE doctype = ? AND name = ?",
+                             [(doctype, name) for name in names])
+
+    def set_positions(self, doctype, ordered_names, staging=False):
+        """Grava a posição de cada documento conforme a ordem da listagem do servidor."""
+        table = STAGING_TABLE if staging else DOCUMENTS_TABLE
+        with self._connect() as conn:
+            conn.executemany(f"UPDATE {table} SET position = ? WHERE doctype = ? AND name = ?",
+                             [(i, doctype, name) for i, name in enumerate(ordered_names)])
+
+    def clear(self, doctype):
+        """Remove todos os documentos (inclusive os em preparo) e a marca d'água de um DocType."""
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM {DOCUMENTS_TABLE} WHERE doctype = ?", (doctype,))
+            conn.execute(f"DELETE FROM {STAGING_TABLE} WHERE doctype = ?", (doctype,))
+            conn.execute("DELETE FROM watermarks WHERE doctype = ?", (doctype,))
+
+    def clear_staging(self, doctype):
+        """Descarta os documentos em preparo de um DocType (ex: de uma sincronização interrompida)."""
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM {STAGING_TABLE} WHERE doctype = ?", (doctype,))
+
+    def commit_staging(self, doctype, modified, schema_hash):
+        """
+        Substitui os documentos do DocType pelos em preparo e grava a marca d'água,
+        tudo em uma única transação.
+        """
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM {DOCUMENTS_TABLE} WHERE doctype = ?", (doctype,))
+            conn.execute(f"INSERT INTO {DOCUMENTS_TABLE} (doctype, name, position, data)"
+                         f" SELECT doctype, name, position, data FROM {STAGING_TABLE} WHERE doctype = ?", (doctype,))
+            conn.execute(f"DELETE FROM {STAGING_TABLE} WHERE doctype = ?", (doctype,))
+            conn.execute("INSERT OR REPLACE INTO watermarks (doctype, modified, schema_hash) VALUES (?, ?, ?)",
+                         (doctype, modified, schema_hash))
+
+    def iter_documents(self, doctype):
+        """Percorre os documentos do DocType na ordem da última listagem do servidor."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT name, data FROM documents WHERE doctype = ? ORDER BY position, name", (doctype,)
+            ).fetchall()
+        for name, data in rows:
+            yield {"doctype": doctype, "key": name, "data": json.loads(data)}
+
+    def to_output(self, doctype_names):
+        """
+        Monta all_doctype_data a partir do armazenamento.
+
+        Args:
+            doctype_names (list): DocTypes na ordem desejada (a de all_doctypes).
+
+        Returns:
+            list: Documentos no formato {"doctype", "key", "data"}.
+        """
+        output = []
+        for doctype in doctype_names:
+            output.extend(self.iter_documents(doctype))
+        return output
+
+def schema_hash(doctypes_with_fields, doctype_name):
+    """
+    Calcula um hash dos metadados do DocType e de suas tabelas filhas. Se o
+    esquema mudar, os documentos salvos podem ter campos faltando e o DocType
+    é sincronizado por completo novamente.
+    """
+    parts = {doctype_name: doctypes_with_fields.get(doctype_name)}
+    for _, child_doctype in get_table_fields(doctypes_with_fields, doctype_name):
+        parts[child_doctype] = doctypes_with_fields.get(child_doctype)
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def _pop_modified(data):
+    """Remove 'modified' do documento e de suas linhas filhas, retornando o do documento."""
+    modified = data.pop("modified", None)
+    for value in data.values():
+        if isinstance(value, list):
+            for row in value:
+                if isinstance(row, dict):
+                    row.pop("modified", None)
+    return modified
+
+def sync_doctype(client, store, doctype_name, doctypes_with_fields, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Sincroniza um DocType: busca os documentos alterados desde a marca d'água,
+    remove os que não existem mais e atualiza a ordem e a marca d'água.
+
+    Args:
+        client (ArterisClient): Cliente HTTP compartilhado.
+        store (DocumentStore): Armazenamento local.
+        doctype_name (str): O nome do DocType.
+        doctypes_with_fields (dict): Metadados {doctype_name: fields}.
+        page_size (int): Quantidade de registros por página.
+
+    Returns:
+        dict or None: {"changed": n, "deleted": n, "full": bool}, ou None em caso de erro
+                      (nesse caso a marca d'água não avança). Na sincronização completa os
+                      documentos são gravados na tabela de preparo e só substituem a cópia
+                      local no fim; em caso de erro, a cópia anterior continua intacta.
+    """
+    current_hash = schema_hash(doctypes_with_fields, doctype_name)
+    watermark, stored_hash = store.get_watermark(doctype_name)
+    full = watermark is None or stored_hash != current_hash
+    if full:
+        store.clear_staging(doctype_name)
+        watermark = None
+
+    # '>=' em vez de '>': documentos gravados no mesmo instante da marca d'água não são perdidos
+    filters = [["modified", ">=", watermark]] if watermark else None
+    properties = [p for p in PROPERTIES_TO_REMOVE if p != "modified"]
+    table_fields = get_table_fields(doctypes_with_fields, doctype_name)
+
+    try:
+        logger.info("Sincronizando '%s' (%s)", doctype_name, 'completa' if full else f'modified >= {watermark}')
+        changed = []
+        changed_count = 0
+        new_watermark = watermark
+        for document in iter_doctype_data_bulk(client, doctype_name, table_fields, filters=filters,
+                                               page_size=page_size, properties_to_remove=properties):
+            modified = _pop_modified(document["data"])
+            if modified and (new_watermark is None or modified > new_watermark):
+                new_watermark = modified
+            changed.append(document)
+            changed_count += 1
+            if len(changed) >= page_size:
+                store.upsert(doctype_name, changed, staging=full)
+                changed = []
+        store.upsert(doctype_name, changed, staging=full)
+
+        # Detecta remoções e registra a ordem do servidor com uma listagem apenas de 'name'
+        current_names = list(iter_keys(client, doctype_name, page_size=page_size))
+        deleted = store.names(doctype_name, staging=full) - set(current_names)
+        store.delete(doctype_name, deleted, staging=full)
+        store.set_positions(doctype_name, current_names, staging=full)
+    except requests.exceptions.RequestException as e:
+        logger.error("Erro ao sincronizar %s: %s", doctype_name, e)
+        return None
+    except json.JSONDecodeError:
+        logger.error("Erro ao decodificar a resposta JSON durante a sincronização de %s.", doctype_name)
+        return None
+
+    if full:
+        store.commit_staging(doctype_name, new_watermark, current_hash)
+    else:
+        store.set_watermark(doctype_name, new_watermark, current_hash)
+    return {"changed": changed_count, "deleted": len(deleted), "full": full}
+
+def incremental_sync(client, all_doctypes, doctypes_with_fields, store, executor, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Sincroniza todos os DocTypes (em paralelo pelo executor) e devolve o conjunto
+    completo de documentos salvos, no formato de all_doctype_data.
+
+    Args:
+        client (ArterisClient): Cliente HTTP compartilhado.
+        all_doctypes (list): DocTypes retornados por process_arteris_doctypes.
+        doctypes_with_fields (dict): Metadados {doctype_name: fields}.
+        store (DocumentStore): Armazenamento local.
+        executor (FetchExecutor): Executor que limita as requisições simultâneas.
+        page_size (int): Quantidade de registros por página.
+
+    Returns:
+        list: all_doctype_data.
+    """
+    logger.info("--- Sincronização incremental dos documentos ---")
+    doctype_names = [d.get("name") for d in all_doctypes if d.get("name")]
+    tasks = [
+        (name, sync_doctype, (client, store, name, doctypes_with_fields, page_size))
+        for name in doctype_names
+    ]
+    for doctype_name, _, result in executor.run(tasks, ordered=True):
+        if result is None:
+            logger.warning("Aviso: '%s' não foi sincronizado; usando a cópia local anterior.", doctype_name)
+        else:
+            logger.info("'%s': %s alterados, %s removidos%s.",
+                        doctype_name, result['changed'], result['deleted'],
+                        ' (sincronização completa)' if result['full'] else '')
+    return store.to_output(doctype_names)
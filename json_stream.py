@@ -0,0 +1,123 @@
+"""
+Decodificação incremental (streaming) de respostas JSON da API Arteris.
+
+As listagens do Frappe têm o formato {"data": [ {...}, {...}, ... ]}. Em vez
+de ler o corpo inteiro e montar todos os objetos de uma vez (response.json()),
+iter_json_array lê o corpo em blocos e entrega cada elemento do array assim
+que ele termina de chegar, mantendo em memória apenas o trecho ainda não lido.
+"""
+
+import codecs
+import json
+
+# Tamanho dos blocos lidos do corpo da resposta
+DEFAULT_STREAM_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+class _Reader:
+    """Buffer de texto alimentado por blocos de bytes."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Lê mais um bloco. Retorna False se o corpo já terminou."""
+        if self.eof:
+            return False
+        # Descarta o trecho já consumido para manter o buffer pequeno
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self.buffer += self._decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+                return True
+        self.buffer += self._decoder.decode(b"", final=True)
+        self.eof = True
+        return True
+
+    def peek(self):
+        """Pula espaços e retorna o próximo caractere ('' no fim do corpo)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            self.error(f"Esperado '{char}'")
+        self.pos += 1
+
+    def value(self, decoder):
+        """Decodifica o próximo valor JSON completo, lendo mais blocos se necessário."""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # Um número no fim do buffer pode continuar no próximo bloco
+            if end == len(self.buffer) and not isinstance(value, (dict, list, str)) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def error(self, message):
+        raise json.JSONDecodeError(message, self.buffer, self.pos)
+
+def iter_json_array(chunks, key="data"):
+    """
+    Percorre os elementos do array `key` de um objeto JSON lido em blocos.
+
+    Chaves anteriores a `key` no objeto são lidas e descartadas; o restante do
+    corpo após o array não é lido. Se o objeto não tiver a chave, nada é entregue.
+
+    Args:
+        chunks (iterable): Blocos de bytes (ou str) do corpo, ex: response.iter_content(...).
+        key (str): Nome da chave do array no objeto de nível superior.
+
+    Yields:
+        object: Cada elemento do array, assim que é decodificado.
+
+    Raises:
+        json.JSONDecodeError: Se o corpo não for um JSON válido ou terminar no meio.
+    """
+    decoder = json.JSONDecoder()
+    reader = _Reader(chunks)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        name = reader.value(decoder)
+        reader.expect(":")
+        if name == key:
+            break
+        reader.value(decoder) # Valor de outra chave, descartado
+        if reader.peek() == "}":
+            return
+        reader.expect(",")
+
+    if reader.peek() != "[":
+        if reader.value(decoder) is None: # "data": null
+            return
+        reader.error("Esperado um array")
+    reader.pos += 1
+    if reader.peek() == "]":
+        return
+    while True:
+        yield reader.value(decoder)
+        char = reader.peek()
+        if char == "]":
+            return
+        if char != ",":
+            reader.error("Esperado ',' ou ']'")
+        reader.pos += 1
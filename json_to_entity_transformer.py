@@ -1,6 +1,10 @@
 import json
 import unicodedata
 import re
+from hierarchy_fields import is_hierarchy_field, HIERARCHY_IGNORED_FIELDNAMES # Reexportados para quem já importa daqui
+from log_config import get_logger
+
+logger = get_logger(__name__)
 
 def normalize_string(text):
     """Normaliza uma string: substitui acentos por caracteres base (preservando maiúsculas/minúsculas)
@@ -31,7 +35,7 @@ def normalize_string(text):
                  return "string_normalizada_fallback"
         return normalized
     except Exception as e:
-        print(f"Erro ao normalizar string '{text}': {e}")
+        logger.error("Erro ao normalizar string '%s': %s", text, e)
         # Em caso de erro inesperado, retorna uma versão simplificada (minúscula, espaços por _)
         return re.sub(r'\s+', '_', str(text).lower()).strip('_')
 
@@ -227,7 +231,8 @@ def create_entity(
     return entity
 
 
-def process_fields_for_hierarchy(fields_metadata, all_doctypes_data, process_nested_relationships=True):
+def process_fields_for_hierarchy(fields_metadata, all_doctypes_data, process_nested_relationships=True,
+                                 linked_fields_cache=None):
     """
     Processa metadados de campos para a estrutura hierárquica com recursão controlada.
 
@@ -236,13 +241,16 @@ def process_fields_for_hierarchy(fields_metadata, all_doctypes_data, process_nes
         all_doctypes_data (dict): Dicionário completo {doctype_name: fields_metadata_list}.
         process_nested_relationships (bool): Se True, processa Links/Tabelas neste nível.
                                              Se False, ignora Tabelas e trata Links como campos normais.
+        linked_fields_cache (dict, optional): Campos já processados de cada DocType vinculado
+                                              ({doctype_name: nós}), reutilizados por todos os Links
+                                              para o mesmo DocType. Só vale para um mesmo all_doctypes_data.
 
     Returns:
         list: Lista de nós representando campos ou DocTypes vinculados.
     """
     processed_nodes = []
     if not isinstance(fields_metadata, list):
-        print(f"Aviso: Metadados de campos inválidos recebidos por process_fields_for_hierarchy.")
+        logger.warning("Aviso: Metadados de campos inválidos recebidos por process_fields_for_hierarchy.")
         return processed_nodes
 
     for field in fields_metadata:
@@ -251,20 +259,11 @@ def process_fields_for_hierarchy(fields_metadata, all_doctypes_data, process_nes
 
         field_name = field.get("fieldname")
         field_type = field.get("fieldtype")
-        field_hidden = field.get("hidden")
         label = field.get("label")
         options = field.get("options")
 
         # --- Ignorar campos irrelevantes ---
-        if not field_name or not field_type:
-            continue
-        if field_hidden == 1: # Ignorar campos ocultos
-            continue
-        if field_name.startswith("f_") or field_name.startswith("fm_"): # Ignorar campos de fórmula
-            continue
-        if field_name in ["owner", "creation", "modified", "modified_by",
-                          "docstatus", "idx", "parentfield", "parenttype", "doctype",
-                          "parent"]:
+        if not is_hierarchy_field(field):
             continue
 
         # --- Lógica de Processamento Condicional (Baseada em process_nested_relationships) ---
@@ -273,12 +272,18 @@ def process_fields_for_hierarchy(fields_metadata, all_doctypes_data, process_nes
         if field_type == "Link" and process_nested_relationships:
             destination_entity = options
             if destination_entity and destination_entity not in ["Web Page", "Report"]:
-                # Obter metadados do DocType vinculado
-                linked_fields_metadata = all_doctypes_data.get(destination_entity, [])
-                # Chamar recursivamente SEM processar mais relações aninhadas
-                linked_fields = process_fields_for_hierarchy(
-                    linked_fields_metadata, all_doctypes_data, process_nested_relationships=False
-                )
+                linked_fields = linked_fields_cache.get(destination_entity) if linked_fields_cache is not None else None
+                if linked_fields is None:
+                    # Obter metadados do DocType vinculado
+                    linked_fields_metadata = all_doctypes_data.get(destination_entity, [])
+                    # Chamar recursivamente SEM processar mais relações aninhadas
+                    linked_fields = process_fields_for_hierarchy(
+                        linked_fields_metadata, all_doctypes_data, process_nested_relationships=False
+                    )
+                    if linked_fields_cache is not None:
+                        linked_fields_cache[destination_entity] = linked_fields
+                # Cópia dos nós (são folhas): add_paths_recursively grava um 'path' diferente em cada Link
+                linked_fields = [dict(linked_field) for linked_field in linked_fields]
                 # Criar nó para o DocType vinculado
                 normalized_description = normalize_string(destination_entity)
                 linked_doctype_node = {
@@ -315,7 +320,7 @@ def process_fields_for_hierarchy(fields_metadata, all_doctypes_data, process_nes
     return processed_nodes
 
 
-def create_hierarchical_doctype_structure(doctypes_with_fields, child_parent_mapping):
+def create_hierarchical_doctype_structure(doctypes_with_fields, child_parent_mapping, memoize_links=True):
     """
     Cria uma estrutura JSON hierárquica de DocTypes e seus campos (Refatorada v2).
 
@@ -324,22 +329,25 @@ def create_hierarchical_doctype_structure(doctypes_with_fields, child_parent_map
     Args:
         doctypes_with_fields (dict): Dicionário {doctype_name: fields_metadata_list}.
         child_parent_mapping (list): Lista de dicts {"child": child_name, "parent": parent_name}.
+        memoize_links (bool): Processa os campos de cada DocType vinculado uma única vez,
+                              para todos os Links que apontam para ele (ver benchmark_hierarchy.py).
 
     Returns:
         list: Lista contendo os nós DocType raiz, com filhos (campos e DocTypes) aninhados.
               Retorna lista vazia em caso de erro nos inputs principais.
     """
     if not isinstance(doctypes_with_fields, dict):
-        print("Erro: doctypes_with_fields deve ser um dicionário.")
+        logger.error("Erro: doctypes_with_fields deve ser um dicionário.")
         return []
     if child_parent_mapping is not None and not isinstance(child_parent_mapping, list):
-        print("Erro: child_parent_mapping deve ser uma lista ou None.")
+        logger.error("Erro: child_parent_mapping deve ser uma lista ou None.")
         return []
     if child_parent_mapping is None:
         child_parent_mapping = []
 
     nodes = {}
     child_doctypes = set()
+    linked_fields_cache = {} if memoize_links else None
 
     # --- 1. Criar nós DocType e processar seus campos (nível principal) ---
     all_doctype_names = list(doctypes_with_fields.keys()) # Para iteração segura se modificarmos o dict
@@ -355,12 +363,12 @@ def create_hierarchical_doctype_structure(doctypes_with_fields, child_parent_map
                 "fieldname": doctype_name, # Nova propriedade fieldname
                 "type": "doctype",
                 # Chama processador de campos para o nível principal (process_nested_relationships=True)
-                "children": process_fields_for_hierarchy(fields_metadata, doctypes_with_fields, True)
+                "children": process_fields_for_hierarchy(fields_metadata, doctypes_with_fields, True, linked_fields_cache)
             }
         else:
              # Se o nó já existe (criado por mapeamento), processa e adiciona/atualiza os campos
              current_children = nodes[doctype_name].get("children", [])
-             processed_fields = process_fields_for_hierarchy(fields_metadata, doctypes_with_fields, True)
+             processed_fields = process_fields_for_hierarchy(fields_metadata, doctypes_with_fields, True, linked_fields_cache)
              # Evita duplicar campos se o DocType for processado múltiplas vezes (improvável, mas seguro)
              existing_field_keys = {child.get("key") for child in current_children if child.get("type") != "doctype"}
              for field_node in processed_fields:
@@ -388,13 +396,14 @@ def create_hierarchical_doctype_structure(doctypes_with_fields, child_parent_map
         parent_name = mapping.get("parent")
 
         if not child_name or not parent_name:
-            print(f"Aviso: Mapeamento inválido encontrado: {mapping}")
+            logger.warning("Aviso: Mapeamento inválido encontrado: %s", mapping)
             continue
 
         # Garante que nós pai e filho existam
         for name in [parent_name, child_name]:
             if name not in nodes:
-                print(f"Aviso: DocType '{name}' do mapeamento não encontrado em doctypes_with_fields. Criando nó básico.")
+                logger.warning("Aviso: DocType '%s' do mapeamento não encontrado em doctypes_with_fields. Criando nó básico.",
+                               name)
                 node_fields_metadata = doctypes_with_fields.get(name, [])
                 normalized_description = normalize_string(name)
                 nodes[name] = {
@@ -403,7 +412,7 @@ def create_hierarchical_doctype_structure(doctypes_with_fields, child_parent_map
                     "fieldname": name, # Nova propriedade fieldname
                     "type": "doctype",
                     # Processa campos no nível principal ao criar nó básico
-                    "children": process_fields_for_hierarchy(node_fields_metadata, doctypes_with_fields, True)
+                    "children": process_fields_for_hierarchy(node_fields_metadata, doctypes_with_fields, True, linked_fields_cache)
                 }
 
         # Adiciona a REFERÊNCIA do nó filho completo à lista de filhos do nó pai
@@ -419,7 +428,8 @@ def create_hierarchical_doctype_structure(doctypes_with_fields, child_parent_map
 
             child_doctypes.add(child_name)
         else:
-             print(f"Erro Crítico: Nó pai ('{parent_name}') ou filho ('{child_name}') não pôde ser encontrado ou criado. Mapeamento ignorado.")
+             logger.error("Erro Crítico: Nó pai ('%s') ou filho ('%s') não pôde ser encontrado ou criado. Mapeamento ignorado.",
+                          parent_name, child_name)
 
 
     # --- 3. Ordenar filhos (campos primeiro, depois doctypes) ---
@@ -0,0 +1,151 @@
+"""
+Camada de logging comum a todos os módulos.
+
+- get_logger: logger do módulo ("arteris.<módulo>"), que escreve no sys.stdout
+  do momento da emissão (assim o redirecionamento do app.py para o Socket.IO
+  continua funcionando) e só com a mensagem, como os prints de antes.
+- configure_logging: nível das mensagens (ARTERIS_LOG_LEVEL) e modo
+  silencioso (ARTERIS_QUIET), em que só avisos, erros e as linhas de progresso
+  são emitidos.
+- ProgressLogger: linhas de progresso amostradas ("N docs/s, ETA"), no máximo
+  uma a cada `interval` segundos, em vez de uma mensagem por item.
+
+As mensagens usam a formatação preguiçosa do logging (logger.debug("... %s",
+valor)): o texto só é montado se o nível estiver habilitado.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+
+LOGGER_NAME = "arteris"
+PROGRESS_LOGGER_NAME = LOGGER_NAME + ".progress"
+DEFAULT_PROGRESS_INTERVAL = 5.0
+
+_configure_lock = threading.Lock()
+_handler = None
+
+class _StdoutHandler(logging.StreamHandler):
+    """StreamHandler que sempre usa o sys.stdout atual."""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass # O destino é sempre o sys.stdout do momento da emissão
+
+def _env_flag(name):
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+def configure_logging(level=None, quiet=None):
+    """
+    Configura o nível dos loggers da aplicação. Pode ser chamada mais de uma vez.
+
+    Args:
+        level (str or int, optional): Nível (ex: "DEBUG", "INFO"); padrão: ARTERIS_LOG_LEVEL ou INFO.
+        quiet (bool, optional): Modo silencioso (só WARNING ou acima, mais o progresso amostrado);
+                                padrão: ARTERIS_QUIET.
+    """
+    global _handler
+    if level is None:
+        level = os.getenv("ARTERIS_LOG_LEVEL") or logging.INFO
+    if isinstance(level, str):
+        level = logging.getLevelName(level.strip().upper())
+        if not isinstance(level, int):
+            level = logging.INFO
+    if quiet is None:
+        quiet = _env_flag("ARTERIS_QUIET")
+
+    with _configure_lock:
+        root = logging.getLogger(LOGGER_NAME)
+        if _handler is None:
+            _handler = _StdoutHandler()
+            _handler.setFormatter(logging.Formatter("%(message)s"))
+            root.addHandler(_handler)
+            root.propagate = False # Não duplica as mensagens em um basicConfig do logger raiz
+        root.setLevel(max(level, logging.WARNING) if quiet else level)
+        # O progresso é amostrado e continua visível no modo silencioso
+        logging.getLogger(PROGRESS_LOGGER_NAME).setLevel(min(level, logging.INFO) if quiet else logging.NOTSET)
+
+def get_logger(name):
+    """
+    Retorna o logger de um módulo, configurando o logging na primeira chamada.
+
+    Args:
+        name (str): Nome do módulo (normalmente __name__).
+
+    Returns:
+        logging.Logger: O logger "arteris.<name>".
+    """
+    if _handler is None:
+        configure_logging()
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+def format_duration(seconds):
+    """Formata segundos como 'HhMMmSSs' / 'MMmSSs'."""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes:02d}m{seconds:02d}s"
+
+class ProgressLogger:
+    """
+    Conta itens processados e emite uma linha de progresso a cada `interval` segundos.
+
+    Pode ser usado por várias threads ao mesmo tempo.
+    """
+
+    def __init__(self, label, total=None, unit="docs", interval=DEFAULT_PROGRESS_INTERVAL, logger=None):
+        """
+        Args:
+            label (str): Prefixo das mensagens (ex: "Documentos").
+            total (int, optional): Total esperado, para o percentual e o ETA.
+            unit (str): Unidade dos itens na mensagem.
+            interval (float): Segundos mínimos entre duas mensagens.
+            logger (logging.Logger, optional): Padrão: o logger de progresso.
+        """
+        self.label = label
+        self.total = total
+        self.unit = unit
+        self.interval = interval
+        self.logger = logger or get_logger("progress")
+        self.count = 0
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._last_emit = self._started_at
+
+    def advance(self, count=1):
+        """Soma `count` itens e emite o progresso se o intervalo já passou."""
+        with self._lock:
+            self.count += count
+            now = time.monotonic()
+            if now - self._last_emit < self.interval:
+                return
+            self._last_emit = now
+            done = self.count
+        self._emit(done, now)
+
+    def finish(self):
+        """Emite a linha final (total e taxa média)."""
+        with self._lock:
+            done = self.count
+        self._emit(done, time.monotonic())
+
+    def _emit(self, done, now):
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        elapsed = now - self._started_at
+        rate = done / elapsed if elapsed > 0 else 0.0
+        if self.total:
+            eta = format_duration((self.total - done) / rate) if rate > 0 and done < self.total else "--"
+            self.logger.info("%s: %d/%d %s (%.0f%%), %.1f %s/s, ETA %s", self.label, done, self.total,
+                             self.unit, 100.0 * done / self.total, rate, self.unit, eta)
+        else:
+            self.logger.info("%s: %d %s, %.1f %s/s", self.label, done, self.unit, rate, self.unit)
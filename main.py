@@ -14,56 +14,252 @@ Este script executa as seguintes etapas:
 
 import os
 import json
+import argparse
 from dotenv import load_dotenv
+from arteris_client import ArterisClient
+from hedging import HedgePolicy, DEFAULT_MAX_HEDGE_RATE
 from get_docktypes import process_arteris_doctypes
-from api_client_data import get_keys, get_data_from_key
-from json_to_entity_transformer import create_hierarchical_doctype_structure, process_fields_for_hierarchy
+from fetch_executor import FetchExecutor
+from metadata_cache import MetadataCache, DEFAULT_CACHE_PATH, DEFAULT_TTL_SECONDS
+from response_cache import ResponseCache, DEFAULT_RESPONSE_CACHE_PATH, DEFAULT_RESPONSE_TTL_SECONDS
+from crawler import crawl_documents_per_key, crawl_documents_bulk, crawl_documents_scoped, retry_failed_keys
+from sharded_crawl import crawl_documents_sharded
+from distributed_crawl import WorkQueue, run_coordinator, run_worker, DEFAULT_QUEUE_PATH, DEFAULT_LEASE_SECONDS
+from crawl_planner import plan_crawl, print_plan, EtaReporter
+from crawl_deadline import (
+    CrawlDeadline, CrawlManifest, load_doctype_priorities, prioritize_doctypes,
+    DEFAULT_DEADLINE_RESERVE_SECONDS, DEFAULT_MANIFEST_PATH
+)
+from crawl_checkpoint import CrawlCheckpoint, DEFAULT_CHECKPOINT_DIR
+from incremental_sync import DocumentStore, incremental_sync, DEFAULT_STORE_PATH
+from json_to_entity_transformer import create_hierarchical_doctype_structure
 from data_to_engine_entities_v4 import transform_to_entity_engine
+from compiled_schema import CompiledSchema
+from compact_hierarchy import save_compact_hierarchy
+from log_config import configure_logging, get_logger
 
 
 # Carrega variáveis de ambiente do arquivo .env na raiz do projeto
 load_dotenv()
 
-def main():
+logger = get_logger(__name__)
+
+def _parse_root(value):
+    """Converte 'DocType=name' em uma tupla (doctype, name) para --root."""
+    doctype_name, separator, key = value.partition("=")
+    if not separator or not doctype_name.strip() or not key.strip():
+        raise argparse.ArgumentTypeError(f"Raiz inválida '{value}': use DOCTYPE=NAME.")
+    return (doctype_name.strip(), key.strip())
+
+def parse_args(argv=None):
+    """
+    Lê as opções de linha de comando do script.
+
+    Args:
+        argv (list, optional): Lista de argumentos (padrão: sys.argv).
+
+    Returns:
+        argparse.Namespace: Opções lidas.
+    """
+    parser = argparse.ArgumentParser(description="Busca metadados e dados da API Arteris.")
+    parser.add_argument("--bulk-metadata", action="store_true",
+                        help="Busca DocTypes e DocFields em lote (poucas chamadas) em vez de uma chamada por DocType.")
+    parser.add_argument("--metadata-cache", nargs="?", const=DEFAULT_CACHE_PATH,
+                        default=os.getenv("ARTERIS_METADATA_CACHE"),
+                        help=f"Usa um cache local de metadados (SQLite). Caminho padrão: {DEFAULT_CACHE_PATH}.")
+    parser.add_argument("--metadata-ttl", type=float,
+                        default=float(os.getenv("ARTERIS_METADATA_TTL", DEFAULT_TTL_SECONDS)),
+                        help="Idade máxima (segundos) de uma entrada do cache de metadados.")
+    parser.add_argument("--refresh-metadata", action="store_true",
+                        help="Ignora o cache e busca novamente todos os metadados.")
+    parser.add_argument("--response-cache", nargs="?", const=DEFAULT_RESPONSE_CACHE_PATH,
+                        default=os.getenv("ARTERIS_RESPONSE_CACHE"),
+                        help="Guarda as respostas GET da API em um cache local (SQLite) e as revalida "
+                             f"com ETag/Last-Modified. Caminho padrão: {DEFAULT_RESPONSE_CACHE_PATH}.")
+    parser.add_argument("--response-ttl", type=float,
+                        default=float(os.getenv("ARTERIS_RESPONSE_TTL", DEFAULT_RESPONSE_TTL_SECONDS)),
+                        help="Idade máxima (segundos) de uma resposta em cache sem ETag/Last-Modified.")
+    parser.add_argument("--offline", action="store_true",
+                        help="Usa apenas o cache de respostas, sem acessar a API (implica --response-cache).")
+    parser.add_argument("--hedge-percentile", type=float, default=None,
+                        help="Envia uma cópia da busca de um documento que passar deste percentil "
+                             "da latência recente (ex: 95); a primeira resposta vence.")
+    parser.add_argument("--hedge-max-rate", type=float, default=DEFAULT_MAX_HEDGE_RATE,
+                        help=f"Fração máxima de requisições com cópia (padrão: {DEFAULT_MAX_HEDGE_RATE}).")
+    parser.add_argument("--bulk-data", action="store_true",
+                        help="Busca os documentos em lote (listagem paginada + tabelas filhas) em vez de um GET por documento.")
+    parser.add_argument("--shards", type=int, default=int(os.getenv("ARTERIS_FETCH_SHARDS", 1)),
+                        help="Busca em lote dividindo cada DocType em N faixas de nomes (UUIDv7) "
+                             "lidas por processos em paralelo (padrão: 1, sem shards).")
+    parser.add_argument("--shard-processes", type=int, default=None,
+                        help="Número de processos do crawl em shards (padrão: min(shards, núcleos)).")
+    parser.add_argument("--shard-doctypes", type=lambda value: [name.strip() for name in value.split(",") if name.strip()],
+                        default=None, metavar="DOCTYPE,...",
+                        help="DocTypes divididos em shards (padrão: todos); os demais são lidos em uma faixa.")
+    parser.add_argument("--role", choices=["coordinator", "worker"], default=None,
+                        help="Crawl distribuído: 'coordinator' grava as tarefas (DocType, faixa) na fila e "
+                             "aguarda; 'worker' consome tarefas da fila e grava os documentos nela.")
+    parser.add_argument("--queue", default=os.getenv("ARTERIS_CRAWL_QUEUE", DEFAULT_QUEUE_PATH),
+                        help=f"Arquivo SQLite compartilhado da fila do crawl distribuído (padrão: {DEFAULT_QUEUE_PATH}).")
+    parser.add_argument("--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS,
+                        help="Duração do lease de uma tarefa; tarefas de workers que morreram voltam à fila depois dele.")
+    parser.add_argument("--project-fields", action="store_true",
+                        help="Com --bulk-data, pede apenas as colunas usadas pela estrutura hierárquica "
+                             "(sem campos ocultos, de fórmula e de controle).")
+    parser.add_argument("--incremental", nargs="?", const=DEFAULT_STORE_PATH, default=None,
+                        help="Sincronização incremental: busca apenas documentos alterados desde a última "
+                             f"execução e mantém o conjunto salvo localmente (padrão: {DEFAULT_STORE_PATH}).")
+    parser.add_argument("--root", action="append", type=_parse_root, default=[], metavar="DOCTYPE=NAME",
+                        help="Busca apenas o documento indicado e o que ele alcança por tabelas filhas e "
+                             "Links (pode ser repetido). Ex: --root 'Contract=CT-0001'.")
+    parser.add_argument("--max-depth", type=int, default=None,
+                        help="Com --root, quantos níveis de Link seguir (padrão: sem limite).")
+    parser.add_argument("--checkpoint-dir", default=DEFAULT_CHECKPOINT_DIR,
+                        help=f"Diretório dos checkpoints do crawl (padrão: {DEFAULT_CHECKPOINT_DIR}).")
+    parser.add_argument("--no-checkpoint", action="store_true",
+                        help="Não grava checkpoints durante o crawl de documentos.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Retoma o crawl a partir do último checkpoint.")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Busca novamente apenas as chaves que falharam no último crawl (modo por chave).")
+    parser.add_argument("--plan", action="store_true",
+                        help="Conta os documentos, imprime o plano do crawl (requisições, bytes e tempo) e encerra.")
+    parser.add_argument("--auto-plan", action="store_true",
+                        help="Planeja o crawl antes de buscar os documentos, aplica o tamanho de página e os "
+                             "shards sugeridos e imprime o progresso com ETA.")
+    parser.add_argument("--deadline", type=float,
+                        default=float(os.getenv("ARTERIS_CRAWL_DEADLINE", 0)) or None,
+                        help="Prazo total da execução em segundos; ao se aproximar, o crawl para de iniciar "
+                             "requisições e grava uma saída parcial com manifesto.")
+    parser.add_argument("--deadline-reserve", type=float, default=DEFAULT_DEADLINE_RESERVE_SECONDS,
+                        help="Segundos finais do prazo reservados para transformar e gravar as saídas "
+                             f"(padrão: {DEFAULT_DEADLINE_RESERVE_SECONDS}).")
+    parser.add_argument("--priorities", default=None,
+                        help="Arquivo JSON {doctype: prioridade}; DocTypes de maior prioridade são buscados "
+                             "primeiro (padrão: variável ARTERIS_DOCTYPE_PRIORITIES).")
+    parser.add_argument("--max-workers", type=int,
+                        default=int(os.getenv("ARTERIS_FETCH_MAX_WORKERS", 8)),
+                        help="Número máximo de requisições simultâneas (padrão: 8).")
+    parser.add_argument("--per-doctype-limit", type=int,
+                        default=int(os.getenv("ARTERIS_FETCH_PER_DOCTYPE_LIMIT", 0)) or None,
+                        help="Máximo de requisições simultâneas por DocType (padrão: sem limite).")
+    parser.add_argument("--page-size", type=int,
+                        default=int(os.getenv("ARTERIS_FETCH_PAGE_SIZE", 1000)),
+                        help="Quantidade de registros por página nas listagens (padrão: 1000).")
+    parser.add_argument("--unordered", action="store_true",
+                        help="Processa os resultados na ordem de conclusão em vez da ordem das chaves.")
+    parser.add_argument("--compact-hierarchy", action="store_true",
+                        help="Também grava a estrutura hierárquica no formato compacto, com referências "
+                             "($ref) em vez de subárvores repetidas (ver compact_hierarchy.py).")
+    parser.add_argument("--quiet", action="store_true", default=None,
+                        help="Modo silencioso: apenas avisos, erros e o progresso amostrado "
+                             "(padrão: variável ARTERIS_QUIET).")
+    parser.add_argument("--log-level", default=None,
+                        help="Nível das mensagens: DEBUG, INFO, WARNING ou ERROR "
+                             "(padrão: variável ARTERIS_LOG_LEVEL ou INFO).")
+    return parser.parse_args(argv)
+
+def main(args=None):
     """
     Função principal que orquestra as etapas de busca e transformação.
+
+    Args:
+        args (argparse.Namespace, optional): Opções da linha de comando (ver parse_args).
     """
-    # Obtém a URL base e o token das variáveis de ambiente
-    api_base_url = os.getenv("ARTERIS_API_BASE_URL")
-    api_token = os.getenv("ARTERIS_API_TOKEN")
+    if args is None:
+        args = parse_args()
+    configure_logging(level=args.log_level, quiet=args.quiet)
+
+    # O prazo conta desde o início da execução (inclui a fase de metadados)
+    deadline = CrawlDeadline(args.deadline, reserve_seconds=args.deadline_reserve) if args.deadline else None
+
+    # Cria o cliente HTTP compartilhado a partir das variáveis de ambiente
+    response_cache = None
+    if args.response_cache or args.offline:
+        response_cache = ResponseCache(
+            args.response_cache or DEFAULT_RESPONSE_CACHE_PATH,
+            ttl_seconds=args.response_ttl,
+            offline=args.offline)
+    hedge_policy = None
+    if args.hedge_percentile:
+        hedge_policy = HedgePolicy(percentile=args.hedge_percentile, max_hedge_rate=args.hedge_max_rate,
+                                   max_workers=args.max_workers * 2)
+    client = ArterisClient.from_env(
+        pool_size=args.max_workers, response_cache=response_cache, hedge_policy=hedge_policy)
 
     # Validação inicial das configurações
-    if not api_base_url or not api_token:
-        print("Erro: Variáveis de ambiente ARTERIS_API_BASE_URL ou ARTERIS_API_TOKEN não definidas.")
-        print("Certifique-se de que o arquivo .env existe na raiz do projeto e contém as variáveis.")
+    if client is None:
+        logger.error("Erro: Variáveis de ambiente ARTERIS_API_BASE_URL ou ARTERIS_API_TOKEN não definidas.")
+        logger.error("Certifique-se de que o arquivo .env existe na raiz do projeto e contém as variáveis.")
         return
 
+    # Worker do crawl distribuído: não busca metadados nem gera as saídas
+    if args.role == "worker":
+        run_worker(client, WorkQueue(args.queue), lease_seconds=args.lease_seconds)
+        client.close()
+        client.print_report()
+        return
+
+    # Executor compartilhado pelas fases de metadados e de documentos
+    executor = FetchExecutor(
+        max_workers=args.max_workers,
+        per_doctype_limit=args.per_doctype_limit,
+        ordered=not args.unordered)
+
+    # Cache local de metadados (opcional)
+    metadata_cache = None
+    if args.metadata_cache:
+        metadata_cache = MetadataCache(args.metadata_cache, ttl_seconds=args.metadata_ttl)
+
     # --- Processar DocTypes, Fields e Dados ---
-    print("\n--- Iniciando Mapeamento de de DocTypes e Fields---")
-    all_doctypes, child_parent_mapping, doctypes_with_fields = process_arteris_doctypes(api_base_url, api_token)
+    logger.info("--- Iniciando Mapeamento de de DocTypes e Fields---")
+    all_doctypes, child_parent_mapping, doctypes_with_fields = process_arteris_doctypes(
+        client, bulk=args.bulk_metadata, executor=executor,
+        cache=metadata_cache, force_refresh=args.refresh_metadata)
+
+    # --- Planejar o crawl de documentos (opcional) ---
+    plan = None
+    if args.plan or args.auto_plan:
+        bulk_mode = bool(args.bulk_data or args.shards > 1 or args.role)
+        # No modo por chave, a página só lista os 'name': o tamanho pelos registros não se aplica
+        plan = plan_crawl(
+            client, all_doctypes, doctypes_with_fields, executor,
+            mode="bulk" if bulk_mode else "per_key",
+            page_size=None if args.auto_plan and bulk_mode else args.page_size)
+        print_plan(plan)
+        if args.plan:
+            client.close()
+            client.print_report()
+            return
+        if bulk_mode:
+            args.page_size = plan["page_size"]
+        sharded = [d["doctype"] for d in plan["doctypes"] if d.get("shards", 1) > 1]
+        if sharded and args.bulk_data and args.shards <= 1 and args.role is None:
+            args.shards = max(d["shards"] for d in plan["doctypes"] if d["doctype"] in sharded)
+            args.shard_doctypes = sharded
 
     # --- Transformar DocTypes em estrutura hierárquica ---
-    print("\n--- Criar estrutura hierarquica ---")
+    logger.info("--- Criar estrutura hierarquica ---")
     entity_structure = create_hierarchical_doctype_structure(
         doctypes_with_fields,
         child_parent_mapping
     )
-    print(f"Encontrados {len(entity_structure.get('entities', []))} DocTypes no módulo Arteris.")
-    print(f"Entididades: \n{entity_structure}")
+    logger.info("Encontrados %s DocTypes no módulo Arteris.", len(entity_structure.get('entities', [])))
+    logger.debug("Entididades: \n%s", entity_structure)
     # Salvar resultado 
     output_dir = "output"
     output_filename = "output_hierarchical.json"
     try:
         with open(os.path.join(output_dir, output_filename), "w", encoding="utf-8") as f:
             json.dump(entity_structure, f, indent=4, ensure_ascii=False)
-        print(f"\n************************")    
-        print(f"\nEstrutura hierarquica de entidades salva em {output_filename}")
-        print(f"\n************************")    
+        logger.info("************************")    
+        logger.info("Estrutura hierarquica de entidades salva em %s", output_filename)
+        logger.info("************************")    
     except IOError as e:
-        print(f"\nErro ao salvar o arquivo {output_filename}: {e}")
+        logger.error("Erro ao salvar o arquivo %s: %s", output_filename, e)
 
     # --- Transformar DocTypes em estrutura de entidades hierarquica ---
-    print("\n--- Criar estrutura de entidades hierarquica ---")
+    logger.info("--- Criar estrutura de entidades hierarquica ---")
     hierarchical_entities = create_hierarchical_doctype_structure(
         doctypes_with_fields,
         child_parent_mapping)
@@ -73,57 +269,117 @@ def main():
     try:
         with open(os.path.join(output_dir, output_hierarchical_filename), "w", encoding="utf-8") as f:
             json.dump(hierarchical_entities, f, indent=4, ensure_ascii=False)
-        print(f"\n************************")    
-        print(f"\nEstrutura hierárquica de entidades salva em {output_hierarchical_filename}")
-        print(f"\n************************")
+        logger.info("************************")    
+        logger.info("Estrutura hierárquica de entidades salva em %s", output_hierarchical_filename)
+        logger.info("************************")
     except IOError as e:
-        print(f"\nErro ao salvar o arquivo {output_hierarchical_filename}: {e}")
+        logger.error("Erro ao salvar o arquivo %s: %s", output_hierarchical_filename, e)
+    if args.compact_hierarchy:
+        output_compact_filename = "output_hierarchical_compact.json"
+        if save_compact_hierarchy(hierarchical_entities, os.path.join(output_dir, output_compact_filename)):
+            logger.info("Estrutura hierárquica compacta salva em %s", output_compact_filename)
+    # Compilada uma única vez e usada pelas duas transformações abaixo
+    compiled_schema = CompiledSchema(hierarchical_entities, doctypes_with_fields, child_parent_mapping)
     
-    # --- Carregar as chaves (name) por DocType ---
-    print("\n--- Carregando as chaves (name) dos DocTypes ---")
-    doctypes_with_keys = []
-    # Percorre a lista de all_doctypes e obtém as chaves usando o método get_keys
-    for doctype in all_doctypes:
-        doctype_name = doctype.get("name")
-        if doctype_name:
-            keys = get_keys(api_base_url, api_token, doctype_name)
-            doctypes_with_keys.append({"doctype": doctype_name, "keys": keys})
-    print("\n--- DocTypes com suas respectivas chaves ---")
-    print(json.dumps(doctypes_with_keys, indent=4, ensure_ascii=False))
-
-    # --- Carregar dados dos DocTypes com base nas chaves ---
-    print("\n--- Carregando dados dos DocTypes com base nas chaves ---")
-    all_doctype_data = []
-    for doctype in doctypes_with_keys:
-        doctype_name = doctype.get("doctype")
-        keys = doctype.get("keys")
-        if keys:
-            for key in keys:
-                data = get_data_from_key(api_base_url, api_token, doctype_name, key)
-                if data:
-                    all_doctype_data.append({"doctype": doctype_name, "key": key, "data": data})
-                else:
-                    print(f"Erro ao buscar dados para {doctype_name} com chave {key}.")
+    # --- Carregar os documentos dos DocTypes ---
+    if args.project_fields and ((not args.bulk_data and args.shards <= 1 and args.role is None)
+                                or args.incremental or args.root):
+        logger.warning("Aviso: --project-fields só tem efeito com --bulk-data; o GET de um documento "
+                       "sempre retorna todas as colunas.")
+
+    checkpoint = None
+    if (not args.incremental and not args.root and args.shards <= 1 and args.role is None
+            and not args.no_checkpoint):
+        checkpoint = CrawlCheckpoint(
+            args.checkpoint_dir,
+            mode="bulk" if args.bulk_data else "per_key",
+            resume=args.resume or args.retry_failed)
+
+    # Prazo e prioridades valem para os modos por chave e em lote (neste processo)
+    single_process = not args.incremental and not args.root and args.shards <= 1 and args.role is None
+    if deadline is not None and not single_process:
+        logger.warning("Aviso: --deadline só tem efeito nos modos por chave e em lote (--bulk-data).")
+    crawl_doctypes = all_doctypes
+    priorities = load_doctype_priorities(args.priorities)
+    if priorities and single_process:
+        crawl_doctypes = prioritize_doctypes(all_doctypes, priorities)
+    manifest = CrawlManifest([doctype.get("name") for doctype in all_doctypes if doctype.get("name")])
+    if deadline is not None and single_process:
+        executor.deadline = deadline
+        client.deadline = deadline
+        logger.info("Prazo do crawl: %.0fs restantes.", max(0, deadline.remaining()))
+
+    # O progresso só é medido pelas requisições deste processo (sem shards nem fila distribuída)
+    eta_reporter = None
+    if plan is not None and args.shards <= 1 and args.role is None:
+        eta_reporter = EtaReporter(client, plan["totals"]["requests"]).start()
+
+    per_task_report = False
+    # try/finally: a thread do EtaReporter é parada mesmo se o crawl falhar
+    try:
+        if args.root:
+            all_doctype_data = crawl_documents_scoped(
+                client, args.root, all_doctypes, doctypes_with_fields, executor, max_depth=args.max_depth)
+        elif args.incremental:
+            all_doctype_data = incremental_sync(
+                client, all_doctypes, doctypes_with_fields, DocumentStore(args.incremental),
+                executor, page_size=args.page_size)
+        elif args.role == "coordinator":
+            all_doctype_data = run_coordinator(
+                client, all_doctypes, doctypes_with_fields, WorkQueue(args.queue), shards=args.shards,
+                page_size=args.page_size, project_fields=args.project_fields, sharded_doctypes=args.shard_doctypes,
+                lease_seconds=args.lease_seconds)
+            if all_doctype_data is None:
+                client.close()
+                return
+        elif args.shards > 1:
+            all_doctype_data = crawl_documents_sharded(
+                client, all_doctypes, doctypes_with_fields, args.shards, processes=args.shard_processes,
+                page_size=args.page_size, project_fields=args.project_fields, sharded_doctypes=args.shard_doctypes)
+        elif args.retry_failed and checkpoint is not None:
+            all_doctype_data = retry_failed_keys(client, crawl_doctypes, executor, checkpoint)
+            manifest = None
+        elif args.bulk_data:
+            # Cada tarefa do executor pagina um DocType inteiro: o relatório do executor é por tarefa
+            per_task_report = True
+            all_doctype_data = crawl_documents_bulk(
+                client, crawl_doctypes, doctypes_with_fields, executor,
+                page_size=args.page_size, checkpoint=checkpoint, project_fields=args.project_fields,
+                manifest=manifest)
         else:
-            print(f"Aviso: Nenhuma chave encontrada para o DocType {doctype_name}.")
+            all_doctype_data = crawl_documents_per_key(
+                client, crawl_doctypes, executor, page_size=args.page_size, checkpoint=checkpoint,
+                manifest=manifest)
+    finally:
+        if eta_reporter is not None:
+            eta_reporter.stop()
+    executor.deadline = None
+    client.deadline = None
+    if crawl_doctypes is not all_doctypes:
+        # Volta à ordem de all_doctypes para que a saída não dependa das prioridades
+        order = {doctype.get("name"): index for index, doctype in enumerate(all_doctypes)}
+        all_doctype_data.sort(key=lambda document: order.get(document["doctype"], len(order))) # sort estável
+    # Manifesto: situação de cada DocType na saída (apenas modos por chave e em lote)
+    if manifest is not None and single_process:
+        manifest.write(DEFAULT_MANIFEST_PATH, deadline)
     # Salva os dados em um arquivo
     output_dir = "output"
     output_data_filename = "output_data.json"
     try:
         with open(os.path.join(output_dir, output_data_filename), "w", encoding="utf-8") as f:
             json.dump(all_doctype_data, f, indent=4, ensure_ascii=False)
-        print(f"\n************************")    
-        print(f"\nDados salvos em {output_data_filename}")
-        print(f"\n************************")
+        logger.info("************************")    
+        logger.info("Dados salvos em %s", output_data_filename)
+        logger.info("************************")
     except IOError as e:
-        print(f"\nErro ao salvar o arquivo {output_data_filename}: {e}")
+        logger.error("Erro ao salvar o arquivo %s: %s", output_data_filename, e)
 
     # --- Transformar dados para o formato engine_entities ---
-    print("\n--- Iniciando transformação para formato engine_entities v2---")
+    logger.info("--- Iniciando transformação para formato engine_entities v2---")
     
     engine_data_v2 = transform_to_entity_engine(
         all_doctype_data, 
-        hierarchical_entities)
+        compiled_schema)
     
     # Grava o resultado em um arquivo
     output_dir = "output"
@@ -131,18 +387,18 @@ def main():
     try:
         with open(os.path.join(output_dir, output_engine_data_filename), "w", encoding="utf-8") as f:
             json.dump(engine_data_v2, f, indent=4, ensure_ascii=False)
-        print(f"\n************************")
-        print(f"\nDados no formato engine_entities salvos em {output_engine_data_filename}")
-        print(f"\n************************")
+        logger.info("************************")
+        logger.info("Dados no formato engine_entities salvos em %s", output_engine_data_filename)
+        logger.info("************************")
     except IOError as e:
-        print(f"\nErro ao salvar o arquivo {output_engine_data_filename}: {e}")
+        logger.error("Erro ao salvar o arquivo %s: %s", output_engine_data_filename, e)
 
     # --- Transformar dados para o formato engine_entities ---
-    print("\n--- Iniciando transformação para formato engine_entities v3---")
+    logger.info("--- Iniciando transformação para formato engine_entities v3---")
     
     engine_data_v4 = transform_to_entity_engine(
         all_doctype_data, 
-        hierarchical_entities)
+        compiled_schema)
     
     # Grava o resultado em um arquivo
     output_dir = "output"
@@ -150,14 +406,21 @@ def main():
     try:
         with open(os.path.join(output_dir, output_engine_data_filename), "w", encoding="utf-8") as f:
             json.dump(engine_data_v4, f, indent=4, ensure_ascii=False)
-        print(f"\n************************")    
-        print(f"\nDados no formato engine_entities salvos em {output_engine_data_filename}")
-        print(f"\n************************")
+        logger.info("************************")    
+        logger.info("Dados no formato engine_entities salvos em %s", output_engine_data_filename)
+        logger.info("************************")
     except IOError as e:
-        print(f"\nErro ao salvar o arquivo {output_engine_data_filename}: {e}")        
+        logger.error("Erro ao salvar o arquivo %s: %s", output_engine_data_filename, e)        
 
     
-    print(f"\n--- Fim da execução ---")
+    client.close()
+    if per_task_report:
+        # As requisições da carga em lote são contadas no relatório do cliente (Tentativas)
+        executor.print_report("Tarefas do executor (uma por DocType nos dados em lote)", per_task=True)
+    else:
+        executor.print_report("Requisições à API Arteris")
+    client.print_report()
+    logger.info("--- Fim da execução ---")
 
 
 # Ponto de entrada do script
@@ -0,0 +1,137 @@
+"""
+Cache local (SQLite) dos metadados de DocTypes e DocFields da API Arteris.
+
+Cada DocType é guardado com seu timestamp 'modified' e o instante da busca.
+Uma entrada é considerada válida enquanto o 'modified' informado pela listagem
+de DocTypes for o mesmo do cache e a idade da entrada não passar do TTL.
+"""
+
+import contextlib
+import json
+import os
+import sqlite3
+import time
+
+# Valores padrão do cache
+DEFAULT_CACHE_PATH = os.path.join("output", "metadata_cache.sqlite")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+class MetadataCache:
+    """Cache de DocFields por DocType, invalidado pelo 'modified' do DocType e por TTL."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS):
+        """
+        Args:
+            path (str): Caminho do arquivo SQLite.
+            ttl_seconds (float or None): Idade máxima de uma entrada; None desativa o TTL.
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS doctype_metadata ("
+                " name TEXT PRIMARY KEY,"
+                " istable INTEGER NOT NULL,"
+                " modified TEXT,"
+                " mode TEXT NOT NULL,"
+                " docfields TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # Uma conexão por operação: o cache pode ser usado por várias threads (app.py)
+        # (confirmada ou desfeita ao sair do bloco e sempre fechada)
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def load(self):
+        """
+        Lê todas as entradas do cache.
+
+        Returns:
+            dict: {name: {"istable", "modified", "mode", "docfields", "fetched_at"}}.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT name, istable, modified, mode, docfields, fetched_at FROM doctype_metadata"
+            ).fetchall()
+        return {
+            name: {
+                "istable": istable,
+                "modified": modified,
+                "mode": mode,
+                "docfields": json.loads(docfields),
+                "fetched_at": fetched_at,
+            }
+            for name, istable, modified, mode, docfields, fetched_at in rows
+        }
+
+    def stale_names(self, doctypes, mode, force_refresh=False):
+        """
+        Compara a listagem atual de DocTypes com o cache.
+
+        Args:
+            doctypes (list): Listagem com 'name', 'istable' e 'modified' de cada DocType.
+            mode (str): Modo de busca dos DocFields (ex: 'bulk/v2'); entradas gravadas em
+                        outro modo ou em outra versão do conjunto de campos são refeitas.
+            force_refresh (bool): Se True, todos os DocTypes são considerados desatualizados.
+
+        Returns:
+            list: Nomes dos DocTypes cujos DocFields precisam ser buscados novamente.
+        """
+        cached = self.load()
+        now = time.time()
+        stale = []
+        for doctype in doctypes:
+            name = doctype.get("name")
+            if not name:
+                continue
+            entry = cached.get(name)
+            if (force_refresh
+                    or entry is None
+                    or entry["mode"] != mode
+                    or entry["modified"] != doctype.get("modified")
+                    or (self.ttl_seconds is not None and now - entry["fetched_at"] > self.ttl_seconds)):
+                stale.append(name)
+        return stale
+
+    def store(self, doctypes, docfields_by_doctype, mode):
+        """
+        Grava os DocFields buscados. DocTypes com DocFields None (erro) não são gravados.
+
+        Args:
+            doctypes (list): Listagem com 'name', 'istable' e 'modified' de cada DocType.
+            docfields_by_doctype (dict): {name: docfields} recém-buscados.
+            mode (str): Modo de busca usado (ex: 'per_doctype/v2').
+        """
+        by_name = {d.get("name"): d for d in doctypes}
+        now = time.time()
+        rows = []
+        for name, docfields in docfields_by_doctype.items():
+            if docfields is None or name not in by_name:
+                continue
+            doctype = by_name[name]
+            rows.append((name, 1 if doctype.get("istable") else 0, doctype.get("modified"),
+                         mode, json.dumps(docfields, ensure_ascii=False), now))
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO doctype_metadata"
+                " (name, istable, modified, mode, docfields, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def prune(self, names):
+        """Remove do cache os DocTypes que não aparecem mais na listagem."""
+        keep = set(names)
+        with self._connect() as conn:
+            existing = [row[0] for row in conn.execute("SELECT name FROM doctype_metadata")]
+            conn.executemany("DELETE FROM doctype_metadata WHERE name = ?",
+                             [(name,) for name in existing if name not in keep])
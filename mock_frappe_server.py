@@ -0,0 +1,699 @@
+"""
+Servidor Frappe simulado, com um conjunto de dados sintético do módulo Arteris.
+
+Implementa, em memória, os endpoints usados pela camada de busca:
+- GET /api/resource/DocType e /api/resource/DocField (metadados do módulo);
+- GET /api/resource/{doctype} (listagem com filters, fields, order_by,
+  limit_start e limit_page_length);
+- GET /api/resource/{doctype}/{name} (documento com as tabelas filhas);
+- GET /api/method/frappe.client.get_count.
+
+Os dados seguem o esquema real (Asset, Asset Operator, City, Contract,
+Contract Item, Contract Measurement, Work Role, ...) e são gerados de forma
+determinística a partir de uma semente, em uma escala configurável. Latência,
+erros 5xx e respostas 429 podem ser injetados para medir cada recurso da
+busca (novas tentativas, limitador, hedge, cache, ...) sem acessar a API real.
+
+Uso:
+    python mock_frappe_server.py --port 8000 --scale 2 --latency 0.05 --error-rate 0.01
+e, no .env, ARTERIS_API_BASE_URL=http://127.0.0.1:8000/api/resource.
+"""
+
+import argparse
+import datetime
+import fnmatch
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, unquote
+
+# Esquema do módulo Arteris: {doctype: {"istable": bool, "fields": [(fieldname, label, fieldtype, options)]}}
+ARTERIS_SCHEMA = {
+    "Subsidiary": {"istable": False, "fields": [
+        ("nome", "Subsidiária", "Data", None),
+    ]},
+    "Contracted Company": {"istable": False, "fields": [
+        ("nome", "Nome", "Data", None),
+        ("razaosocial", "Razão Social", "Data", None),
+        ("column_break_1", None, "Column Break", None),
+        ("cnpj", "CNPJ", "Data", None),
+        ("endereco", "Endereço", "Small Text", None),
+    ]},
+    "City": {"istable": False, "fields": [
+        ("uf", "UF", "Data", None),
+        ("municipio", "Município", "Data", None),
+        ("iss", "ISS", "Float", None),
+    ]},
+    "Work Role": {"istable": False, "fields": [
+        ("funcao", "Função", "Data", None),
+    ]},
+    "Asset": {"istable": False, "fields": [
+        ("nomeativo", "Nome do ativo", "Data", None),
+        ("section_break_1", "Operadores", "Section Break", None),
+        ("operadoresoumotoristas", "Operadores ou motoristas", "Table", "Asset Operator"),
+    ]},
+    "Asset Operator": {"istable": True, "fields": [
+        ("operador", "Operador", "Link", "Work Role"),
+        ("quantidade", "Quantidade", "Int", None),
+    ]},
+    "SAP Order": {"istable": False, "fields": [
+        ("numeropedido", "Nº do pedido", "Data", None),
+        ("centrocusto", "Centro de custo", "Data", None),
+        ("valortotal", "Valor total", "Currency", None),
+    ]},
+    "Formula": {"istable": False, "fields": [
+        ("formula", "Formula", "Code", None),
+        ("open", "Open", "Data", None),
+    ]},
+    "Formula Template": {"istable": False, "fields": [
+        ("nome", "Nome", "Data", None),
+        ("descricao", "Descrrção", "Small Text", None),
+        ("formula", "Fórmula", "Code", None),
+        ("configurar", "Configurar", "Data", None),
+    ]},
+    "Contract": {"istable": False, "fields": [
+        ("contrato", "Nº do Contrato", "Data", None),
+        ("contratada", "Contratada", "Link", "Contracted Company"),
+        ("subsidiaria", "Subsidiária", "Link", "Subsidiary"),
+        ("modeloformula", "Modelo de fórmula", "Link", "Formula Template"),
+        ("column_break_1", None, "Column Break", None),
+        ("obra", "Obra", "Data", None),
+        ("descricao", "Descrição", "Small Text", None),
+        ("section_break_1", "Datas", "Section Break", None),
+        ("datainicial", "Data inicial do contrato", "Date", None),
+        ("datafinal", "Data final do contrato", "Date", None),
+        ("inicioservicosprevisto", "Início dos serviços conf. contrato", "Date", None),
+        ("terminoservicosprevisto", "Término serviços conf. contrato", "Date", None),
+        ("inicioservicos", "Início real dos serviços", "Date", None),
+        ("terminoservicos", "Término previsto dos serviços", "Date", None),
+        ("tab_break_1", "Valores", "Tab Break", None),
+        ("valortotal", "Valor total do contrato", "Currency", None),
+        ("percentualreidi", "Percentual", "Percent", None),
+        ("fm_valor_medido", "Valor medido", "Currency", None),
+    ]},
+    "Contract Item": {"istable": False, "fields": [
+        ("codigo", "Código", "Data", None),
+        ("descricao", "Descrição", "Small Text", None),
+        ("contrato", "Nº do contrato", "Link", "Contract"),
+        ("is_group", "Is Group", "Check", None),
+        ("parent_contract_item", "Parent Contract Item", "Link", "Contract Item"),
+        ("old_parent", "Old Parent", "Link", "Contract Item"),
+        ("lft", "Left", "Int", None),
+        ("rgt", "Right", "Int", None),
+        ("quantidade", "Quantidade", "Float", None),
+        ("valorunitario", "Valor unitário", "Currency", None),
+        ("tablepedidossap", "Pedidos SAP", "Table", "Contract Item Order"),
+        ("tabcidades", "Cidades", "Table", "Contract Item City"),
+        ("tablemaodeobra", "Mão de obra", "Table", "Contract Item Work Role"),
+        ("tableassets", "Ativos", "Table", "Contract Item Asset"),
+    ]},
+    "Contract Item Order": {"istable": True, "fields": [
+        ("pedidosap", "Pedido SAP", "Link", "SAP Order"),
+        ("centrocusto", "Centro de custo", "Data", None),
+        ("valortotal", "Valor total", "Currency", None),
+        ("percentual", "Percentual", "Percent", None),
+    ]},
+    "Contract Item City": {"istable": True, "fields": [
+        ("cidade", "Cidade", "Link", "City"),
+        ("iss", "ISS", "Data", None),
+        ("participacaopercentual", "Participação", "Percent", None),
+    ]},
+    "Contract Item Work Role": {"istable": True, "fields": [
+        ("funcao", "Função", "Link", "Work Role"),
+        ("quantidade", "Quantidade", "Int", None),
+        ("pagamentohora", "Pagamento por hora", "Check", None),
+        ("valorporhora", "Valor por hora", "Currency", None),
+        ("valortotalmensal", "Valor total mensal", "Currency", None),
+    ]},
+    "Contract Item Asset": {"istable": True, "fields": [
+        ("asset", "Ativo", "Link", "Asset"),
+        ("descricao", "Descrição", "Data", None),
+        ("quantidade", "Quantidade", "Int", None),
+        ("valormensal", "Valor mensal", "Currency", None),
+    ]},
+    "Contract Measurement": {"istable": False, "fields": [
+        ("contrato", "Contrato", "Link", "Contract"),
+        ("contratada", "Contratada", "Link", "Contracted Company"),
+        ("data_ejak", "Data inicial do contrato", "Date", None),
+        ("data_final_do_contrato", "Data final do contrato", "Date", None),
+        ("obra", "Obra", "Data", None),
+        ("table_iqgd", "Mão de obra medida", "Table", "Contract Measurement Work Role"),
+        ("table_juun", "Ativos medidos", "Table", "Contract Measurement Asset"),
+    ]},
+    "Contract Measurement Work Role": {"istable": True, "fields": [
+        ("data_e_hora", "Data e hora", "Datetime", None),
+        ("item", "Item", "Link", "Contract Item"),
+        ("funcao", "Função", "Link", "Work Role"),
+        ("funcaoitem", "Função do item", "Link", "Contract Item Work Role"),
+        ("quantidade_medida", "Quantidade medida", "Float", None),
+    ]},
+    "Contract Measurement Asset": {"istable": True, "fields": [
+        ("data_e_hora", "Data e hora", "Datetime", None),
+        ("item", "Item", "Link", "Contract Item"),
+        ("maquina_equipamento_ou_ferramenta", "Máquina, equipamento ou ferramenta", "Link", "Asset"),
+        ("quantidade_medida", "Quantidade medida", "Float", None),
+    ]},
+}
+
+# Quantidade de documentos de cada DocType na escala 1 (as tabelas filhas dependem dos pais)
+BASE_COUNTS = {
+    "Subsidiary": 10,
+    "Contracted Company": 20,
+    "City": 50,
+    "Work Role": 30,
+    "Asset": 40,
+    "SAP Order": 100,
+    "Formula": 5,
+    "Formula Template": 10,
+    "Contract": 50,
+    "Contract Item": 1000,
+    "Contract Measurement": 200,
+}
+
+# Campos padrão do Frappe presentes em todos os registros
+STANDARD_FIELDS = ["name", "owner", "creation", "modified", "modified_by", "docstatus", "idx"]
+CHILD_FIELDS = ["parent", "parentfield", "parenttype"]
+
+DEFAULT_PAGE_LENGTH = 20 # Padrão do Frappe quando limit_page_length não é enviado
+DEFAULT_ORDER_BY = "modified desc"
+BASE_TIMESTAMP_MS = 1743508800000 # 2025-04-01 12:00:00 UTC
+
+UFS = ["SP", "RJ", "MG", "PR", "SC"]
+MUNICIPIOS = ["Mairiporã", "Vargem", "Atibaia", "Registro", "Juquitiba", "Miracatu", "Cajati",
+              "Jacupiranga", "Barra do Turvo", "Embu-Guaçu", "São Lourenço", "Bragança", "Itapecerica"]
+FUNCOES = ["Supervisor de manutenção", "Eletricista", "Técnico de pedágio", "Motorista", "Operador de máquina"]
+ATIVOS = ["Automovel", "Caminhão", "Equipamentos e ferramentas em geral", "Retroescavadeira", "Gerador"]
+
+class ArterisDatasetGenerator:
+    """Gera documentos sintéticos do módulo Arteris, de forma determinística."""
+
+    def __init__(self, scale=1.0, seed=0):
+        """
+        Args:
+            scale (float): Multiplicador das quantidades de BASE_COUNTS.
+            seed (int): Semente do gerador aleatório (mesma semente, mesmos dados).
+        """
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self._clock = 0
+        self.tables = {doctype: [] for doctype in ARTERIS_SCHEMA}
+
+    def _count(self, doctype):
+        return max(1, int(round(BASE_COUNTS[doctype] * self.scale)))
+
+    def _uuid7(self):
+        """Nome no formato UUIDv7, com timestamps crescentes."""
+        self._clock += self.rng.randint(1, 60000)
+        hex_ts = f"{BASE_TIMESTAMP_MS + self._clock:012x}"
+        rand = self.rng.getrandbits(74)
+        return (f"{hex_ts[:8]}-{hex_ts[8:]}-7{(rand >> 62) & 0xfff:03x}-"
+                f"{0x8000 | ((rand >> 48) & 0x3fff):04x}-{rand & 0xffffffffffff:012x}")
+
+    def _timestamp(self):
+        moment = datetime.datetime(2025, 4, 1, 12, 0, 0) + datetime.timedelta(milliseconds=self._clock)
+        return moment.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+    def _date(self, start_year=2023):
+        day = datetime.date(start_year, 1, 1) + datetime.timedelta(days=self.rng.randint(0, 900))
+        return day.isoformat()
+
+    def _pick(self, doctype):
+        return self.rng.choice(self.tables[doctype])["name"]
+
+    def _add(self, doctype, values, name=None):
+        """Cria um documento com os campos padrão e os valores informados."""
+        creation = self._timestamp()
+        row = {"name": name or self._uuid7(), "owner": "Administrator", "creation": creation,
+               "modified": creation, "modified_by": "Administrator", "docstatus": 0,
+               "idx": 0}
+        row.update(values)
+        self.tables[doctype].append(row)
+        return row
+
+    def _add_child(self, parent_doctype, parent, fieldname, child_doctype, count, make_values):
+        for idx in range(1, count + 1):
+            row = self._add(child_doctype, make_values())
+            row.update({"parent": parent["name"], "parentfield": fieldname,
+                        "parenttype": parent_doctype, "idx": idx})
+
+    def generate(self):
+        """
+        Returns:
+            dict: {doctype: [registros]}; os registros das tabelas filhas ficam nas
+                  tabelas dos DocTypes filhos (com parent, parentfield, parenttype e idx).
+        """
+        rng = self.rng
+        for i in range(self._count("Subsidiary")):
+            self._add("Subsidiary", {"nome": f"Subsidiária {i + 1}"})
+        for i in range(self._count("Contracted Company")):
+            nome = f"EMPRESA {i + 1} ENGENHARIA LTDA"
+            self._add("Contracted Company", {
+                "nome": nome, "razaosocial": nome,
+                "cnpj": f"{rng.randint(10, 99)}.{rng.randint(100, 999)}.{rng.randint(100, 999)}/0001-{rng.randint(10, 99)}",
+                "endereco": f"Rua {rng.choice(MUNICIPIOS)}, {rng.randint(1, 2000)}, Centro"})
+        for i in range(self._count("City")):
+            municipio = MUNICIPIOS[i % len(MUNICIPIOS)]
+            if i >= len(MUNICIPIOS):
+                municipio += f" {i // len(MUNICIPIOS) + 1}"
+            uf = rng.choice(UFS)
+            # Cidades usam o nome 'Município-UF' em vez de UUIDv7, como na base real
+            self._add("City", {"uf": uf, "municipio": municipio, "iss": rng.choice([0.0, 2.0, 5.0])},
+                      name=f"{municipio}-{uf}")
+        for i in range(self._count("Work Role")):
+            self._add("Work Role", {"funcao": f"{rng.choice(FUNCOES)} {i + 1}"})
+        for i in range(self._count("Asset")):
+            asset = self._add("Asset", {"nomeativo": f"{rng.choice(ATIVOS)} {i + 1}"})
+            self._add_child("Asset", asset, "operadoresoumotoristas", "Asset Operator", rng.randint(0, 2),
+                            lambda: {"operador": self._pick("Work Role"), "quantidade": rng.randint(1, 3)})
+        for i in range(self._count("SAP Order")):
+            self._add("SAP Order", {"numeropedido": str(4500000000 + i), "centrocusto": f"FD{rng.randint(10000000, 99999999)}",
+                                    "valortotal": round(rng.uniform(1000, 5000000), 2)})
+        for i in range(self._count("Formula")):
+            self._add("Formula", {"formula": f"SUM(Contract.valortotal) * {i + 1}", "open": ""})
+        for i in range(self._count("Formula Template")):
+            self._add("Formula Template", {
+                "nome": f"Modelo {i + 1}", "descricao": "Calcula o valor total para o serviço",
+                "formula": "SUM(Contract_Measurement.Contract_Measurement_Work_Role.Quantidade_medida)",
+                "configurar": ""})
+        for i in range(self._count("Contract")):
+            start = self._date()
+            self._add("Contract", {
+                "contrato": f"CW{32000 + i}", "contratada": self._pick("Contracted Company"),
+                "subsidiaria": self._pick("Subsidiary"), "modeloformula": self._pick("Formula Template"),
+                "obra": "OPERAÇÃO DA RODOVIA - MANUTENÇÃO", "descricao": f"Contrato {i + 1}",
+                "datainicial": start, "datafinal": self._date(2025),
+                "inicioservicosprevisto": start, "terminoservicosprevisto": self._date(2025),
+                "inicioservicos": start, "terminoservicos": self._date(2025),
+                "valortotal": round(rng.uniform(1e5, 1e7), 2), "percentualreidi": 0.0,
+                "fm_valor_medido": 0.0})
+        self._generate_contract_items()
+        self._generate_measurements()
+        return self.tables
+
+    def _generate_contract_items(self):
+        """Itens em árvore (um grupo raiz por contrato) com as quatro tabelas filhas."""
+        rng = self.rng
+        contracts = self.tables["Contract"]
+        per_contract = max(1, self._count("Contract Item") // len(contracts))
+        for contract in contracts:
+            root = self._add("Contract Item", {
+                "codigo": "0", "descricao": f"Contrato {contract['contrato']}", "contrato": contract["name"],
+                "is_group": 1, "parent_contract_item": "", "old_parent": "", "lft": 1, "rgt": 2 * per_contract,
+                "quantidade": 0.0, "valorunitario": 0.0})
+            for k in range(1, per_contract):
+                item = self._add("Contract Item", {
+                    "codigo": f"1.{k}", "descricao": f"1.{k}. SERVIÇO {k}", "contrato": contract["name"],
+                    "is_group": 0, "parent_contract_item": root["name"], "old_parent": root["name"],
+                    "lft": 2 * k, "rgt": 2 * k + 1,
+                    "quantidade": float(rng.randint(1, 500)), "valorunitario": round(rng.uniform(10, 5000), 2)})
+                self._add_child("Contract Item", item, "tablepedidossap", "Contract Item Order", rng.randint(0, 2),
+                                lambda: {"pedidosap": self._pick("SAP Order"), "centrocusto": f"FD{rng.randint(10000000, 99999999)}",
+                                         "valortotal": round(rng.uniform(1000, 1e6), 2), "percentual": round(rng.uniform(0, 100), 2)})
+                self._add_child("Contract Item", item, "tabcidades", "Contract Item City", rng.randint(0, 3),
+                                lambda: {"cidade": self._pick("City"), "iss": str(rng.choice([0, 2, 5])),
+                                         "participacaopercentual": round(rng.uniform(0, 100), 2)})
+                self._add_child("Contract Item", item, "tablemaodeobra", "Contract Item Work Role", rng.randint(0, 3),
+                                lambda: {"funcao": self._pick("Work Role"), "quantidade": rng.randint(1, 10),
+                                         "pagamentohora": rng.randint(0, 1), "valorporhora": round(rng.uniform(20, 200), 2),
+                                         "valortotalmensal": round(rng.uniform(0, 50000), 2)})
+                self._add_child("Contract Item", item, "tableassets", "Contract Item Asset", rng.randint(0, 2),
+                                lambda: {"asset": self._pick("Asset"), "descricao": f"Ativo {rng.randint(1, 999)}",
+                                         "quantidade": rng.randint(1, 5), "valormensal": round(rng.uniform(100, 10000), 2)})
+
+    def _generate_measurements(self):
+        rng = self.rng
+        items = [item for item in self.tables["Contract Item"] if not item["is_group"]]
+        for _ in range(self._count("Contract Measurement")):
+            contract = rng.choice(self.tables["Contract"])
+            measurement = self._add("Contract Measurement", {
+                "contrato": contract["name"], "contratada": contract["contratada"],
+                "data_ejak": contract["datainicial"], "data_final_do_contrato": contract["datafinal"],
+                "obra": contract["obra"]})
+            self._add_child("Contract Measurement", measurement, "table_iqgd", "Contract Measurement Work Role",
+                            rng.randint(0, 6),
+                            lambda: {"data_e_hora": self._timestamp()[:19], "item": rng.choice(items)["name"],
+                                     "funcao": self._pick("Work Role"),
+                                     "funcaoitem": self._pick("Contract Item Work Role") if self.tables["Contract Item Work Role"] else "",
+                                     "quantidade_medida": float(rng.randint(1, 300))})
+            self._add_child("Contract Measurement", measurement, "table_juun", "Contract Measurement Asset",
+                            rng.randint(0, 3),
+                            lambda: {"data_e_hora": self._timestamp()[:19], "item": rng.choice(items)["name"],
+                                     "maquina_equipamento_ou_ferramenta": self._pick("Asset"),
+                                     "quantidade_medida": float(rng.randint(1, 60))})
+
+def generate_arteris_dataset(scale=1.0, seed=0):
+    """
+    Gera o conjunto de dados sintético do módulo Arteris.
+
+    Args:
+        scale (float): Multiplicador das quantidades de BASE_COUNTS.
+        seed (int): Semente do gerador (mesma semente, mesmos dados).
+
+    Returns:
+        dict: {doctype: [registros]}, incluindo as tabelas DocType e DocField.
+    """
+    tables = ArterisDatasetGenerator(scale, seed).generate()
+    doctypes, docfields = [], []
+    for doctype_name, spec in ARTERIS_SCHEMA.items():
+        doctypes.append({"name": doctype_name, "module": "Arteris", "istable": int(spec["istable"]),
+                         "modified": "2025-04-01 12:00:00.000000", "idx": 0, "docstatus": 0})
+        for idx, (fieldname, label, fieldtype, options) in enumerate(spec["fields"], start=1):
+            docfields.append({
+                "name": hashlib.sha1(f"{doctype_name}.{fieldname}".encode("utf-8")).hexdigest()[:10],
+                "parent": doctype_name, "parentfield": "fields", "parenttype": "DocType", "idx": idx,
+                "fieldname": fieldname, "label": label, "fieldtype": fieldtype, "options": options,
+                # Campos de árvore do Frappe ficam ocultos no formulário
+                "hidden": int(fieldname in ("lft", "rgt", "old_parent")),
+            })
+    tables["DocType"] = doctypes
+    tables["DocField"] = docfields
+    return tables
+
+# --- Filtros, campos e ordenação no formato do Frappe ---
+
+def _coerce(value, expected):
+    """Compara como números quando um dos lados é numérico (ex: istable 0 e o filtro "1")."""
+    if isinstance(value, (int, float)) or isinstance(expected, (int, float)):
+        try:
+            return float(value), float(expected)
+        except (TypeError, ValueError):
+            pass
+    return value, expected
+
+def _compare(value, operator, expected):
+    """Aplica um operador de filtro do Frappe ao valor de um registro."""
+    if operator in ("in", "not in"):
+        options = expected if isinstance(expected, list) else [v.strip() for v in str(expected).split(",")]
+        result = str(value) in [str(option) for option in options]
+        return result if operator == "in" else not result
+    if operator in ("like", "not like"):
+        # '%' e '_' do LIKE viram '*' e '?'; '\\_' e '\\%' são literais
+        pattern = str(expected).replace("\\_", "\0").replace("\\%", "\1")
+        pattern = pattern.replace("_", "?").replace("%", "*").replace("\0", "_").replace("\1", "%")
+        result = fnmatch.fnmatchcase(str(value if value is not None else ""), pattern)
+        return result if operator == "like" else not result
+    if operator == "is":
+        is_set = value not in (None, "")
+        return is_set if expected == "set" else not is_set
+    if operator == "between":
+        low, high = expected
+        return value is not None and str(low) <= str(value) <= str(high)
+    value, expected = _coerce(value, expected)
+    if operator == "=":
+        return value == expected
+    if operator == "!=":
+        return value != expected
+    if value is None:
+        return False
+    if operator == ">":
+        return value > expected
+    if operator == ">=":
+        return value >= expected
+    if operator == "<":
+        return value < expected
+    if operator == "<=":
+        return value <= expected
+    raise ValueError(f"Operador não suportado: {operator}")
+
+def parse_filters(raw_filters):
+    """
+    Normaliza os filtros do Frappe para uma lista de (campo, operador, valor).
+
+    Aceita [[campo, op, valor]], [[doctype, campo, op, valor]], {campo: valor}
+    e {campo: [op, valor]}.
+    """
+    if not raw_filters:
+        return []
+    filters = json.loads(raw_filters) if isinstance(raw_filters, str) else raw_filters
+    if isinstance(filters, dict):
+        normalized = []
+        for field, value in filters.items():
+            if isinstance(value, list):
+                normalized.append((field, value[0], value[1]))
+            else:
+                normalized.append((field, "=", value))
+        return normalized
+    normalized = []
+    for item in filters:
+        if len(item) == 4:
+            item = item[1:]
+        normalized.append((item[0], item[1].lower(), item[2]))
+    return normalized
+
+def _clean_field(field):
+    """Remove a tabela e os acentos graves: '`tabContract`.`name`' -> 'name'."""
+    return field.split(".")[-1].strip("` ")
+
+def _sort_rows(rows, order_by):
+    keys = [part.split() for part in order_by.split(",") if part.strip()]
+    for key in reversed(keys):
+        field = _clean_field(key[0])
+        descending = len(key) > 1 and key[1].lower() == "desc"
+        rows.sort(key=lambda row: (row.get(field) is not None, row.get(field) if row.get(field) is not None else ""),
+                  reverse=descending)
+    return rows
+
+# --- Servidor ---
+
+class MockFrappeServer(ThreadingHTTPServer):
+    """
+    Servidor HTTP com a API de recursos do Frappe em memória e injeção de falhas.
+
+    Atributos:
+        stats (dict): Requisições por status HTTP e por tipo de falha injetada.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, dataset, host="127.0.0.1", port=0, latency=0.0, latency_jitter=0.0,
+                 slow_rate=0.0, slow_latency=5.0, error_rate=0.0, rate_429=0.0, retry_after=1,
+                 token=None, seed=0):
+        """
+        Args:
+            dataset (dict): {doctype: [registros]} (ver generate_arteris_dataset).
+            host (str): Endereço de escuta.
+            port (int): Porta (0 escolhe uma porta livre).
+            latency (float): Latência fixa adicionada a cada resposta, em segundos.
+            latency_jitter (float): Variação aleatória (uniforme) somada à latência.
+            slow_rate (float): Fração das requisições que demoram slow_latency (cauda lenta).
+            slow_latency (float): Latência das requisições lentas, em segundos.
+            error_rate (float): Fração das requisições respondidas com 500/502/503.
+            rate_429 (float): Fração das requisições respondidas com 429.
+            retry_after (int): Valor do cabeçalho Retry-After dos 429.
+            token (str, optional): Se informado, exige 'Authorization: <token>'.
+            seed (int): Semente das falhas e latências injetadas.
+        """
+        super().__init__((host, port), _MockFrappeHandler)
+        self.tables = dataset
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.token = token
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {}
+        self._by_name = {doctype: {row["name"]: row for row in rows} for doctype, rows in dataset.items()}
+        self._children = {} # (doctype filho, parent) -> linhas, na ordem de idx
+        for doctype, rows in dataset.items():
+            for row in rows:
+                if row.get("parent") and row.get("parenttype"):
+                    self._children.setdefault((doctype, row["parent"]), []).append(row)
+        self._table_fields = {
+            doctype: [(fieldname, options) for fieldname, _, fieldtype, options in spec["fields"] if fieldtype == "Table"]
+            for doctype, spec in ARTERIS_SCHEMA.items()
+        }
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """URL base para ARTERIS_API_BASE_URL."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/resource"
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def draw_fault(self):
+        """
+        Sorteia a latência e a falha injetadas em uma requisição.
+
+        Returns:
+            tuple: (atraso em segundos, status de erro ou None).
+        """
+        with self._lock:
+            delay = self.latency + self._rng.uniform(0, self.latency_jitter)
+            if self.slow_rate and self._rng.random() < self.slow_rate:
+                delay = self.slow_latency
+            draw = self._rng.random()
+            status = None
+            if draw < self.rate_429:
+                status = 429
+            elif draw < self.rate_429 + self.error_rate:
+                status = self._rng.choice([500, 502, 503])
+        return delay, status
+
+    def list_records(self, doctype, params):
+        """Executa uma listagem de /api/resource/{doctype} com os parâmetros do Frappe."""
+        filters = parse_filters(params.get("filters"))
+        rows = self._candidates(doctype, filters)
+        for field, operator, value in filters:
+            field = _clean_field(field)
+            rows = [row for row in rows if _compare(row.get(field), operator, value)]
+        rows = _sort_rows(list(rows), params.get("order_by") or DEFAULT_ORDER_BY)
+        start = int(params.get("limit_start") or 0)
+        length = int(params.get("limit_page_length", params.get("limit", DEFAULT_PAGE_LENGTH)) or 0)
+        rows = rows[start:start + length] if length else rows[start:]
+        fields = json.loads(params["fields"]) if params.get("fields") else ["name"]
+        if "*" in fields:
+            return [dict(row) for row in rows]
+        fields = [_clean_field(field) for field in fields]
+        return [{field: row.get(field) for field in fields} for row in rows]
+
+    def _candidates(self, doctype, filters):
+        """Usa os índices por name/parent quando há um filtro '=' ou 'in' nesses campos."""
+        for field, operator, value in filters:
+            field = _clean_field(field)
+            values = [value] if operator == "=" else value if operator == "in" and isinstance(value, list) else None
+            if values is None:
+                continue
+            if field == "name":
+                by_name = self._by_name.get(doctype, {})
+                return [by_name[v] for v in dict.fromkeys(values) if v in by_name]
+            if field == "parent" and ARTERIS_SCHEMA.get(doctype, {}).get("istable"):
+                return [row for v in dict.fromkeys(values) for row in self._children.get((doctype, v), [])]
+        return self.tables.get(doctype, [])
+
+    def get_document(self, doctype, name):
+        """Documento completo, com as tabelas filhas, ou None se não existir."""
+        row = self._by_name.get(doctype, {}).get(name)
+        if row is None:
+            return None
+        document = dict(row)
+        document["doctype"] = doctype
+        for fieldname, child_doctype in self._table_fields.get(doctype, []):
+            document[fieldname] = [dict(child, doctype=child_doctype)
+                                   for child in self._children.get((child_doctype, name), [])
+                                   if child.get("parentfield") == fieldname]
+        return document
+
+    def start(self):
+        """Atende as requisições em uma thread em segundo plano e retorna o servidor."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+class _MockFrappeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive, como atrás de um proxy real
+
+    def log_message(self, format, *args):
+        pass # Sem log por requisição (atrapalharia as medições)
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        etag = '"' + hashlib.md5(payload).hexdigest() + '"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            status, payload = 304, b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        if status in (200, 304):
+            self.send_header("ETag", etag)
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+        self.server.count(status)
+
+    def do_GET(self):
+        server = self.server
+        delay, fault = server.draw_fault()
+        if delay:
+            time.sleep(delay)
+        if server.token and self.headers.get("Authorization") != server.token:
+            return self._send_json(401, {"exc_type": "AuthenticationError"})
+        if fault == 429:
+            return self._send_json(429, {"exc_type": "TooManyRequests"}, {"Retry-After": server.retry_after})
+        if fault:
+            return self._send_json(fault, {"exc_type": "InternalServerError"})
+
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        try:
+            if url.path == "/api/method/frappe.client.get_count":
+                return self._send_json(200, {"message": len(server.list_records(
+                    params.get("doctype", ""), {"filters": params.get("filters"), "limit_page_length": 0}))})
+            if not url.path.startswith("/api/resource/"):
+                return self._send_json(404, {"exc_type": "DoesNotExistError"})
+            parts = [unquote(part) for part in url.path[len("/api/resource/"):].split("/", 1)]
+            doctype = parts[0]
+            if doctype not in server.tables:
+                return self._send_json(404, {"exc_type": "DoesNotExistError", "message": f"DocType {doctype} not found"})
+            if len(parts) == 2 and parts[1]:
+                document = server.get_document(doctype, parts[1])
+                if document is None:
+                    return self._send_json(404, {"exc_type": "DoesNotExistError"})
+                return self._send_json(200, {"data": document})
+            return self._send_json(200, {"data": server.list_records(doctype, params)})
+        except (ValueError, TypeError, KeyError, IndexError) as e:
+            return self._send_json(417, {"exc_type": "ValidationError", "message": str(e)})
+
+def start_mock_server(scale=1.0, seed=0, **options):
+    """
+    Gera o conjunto de dados e inicia o servidor em segundo plano.
+
+    Args:
+        scale (float): Escala do conjunto de dados.
+        seed (int): Semente dos dados e das falhas.
+        **options: Demais argumentos de MockFrappeServer (latency, error_rate, rate_429, ...).
+
+    Returns:
+        MockFrappeServer: O servidor em execução (ver base_url e stop()).
+    """
+    return MockFrappeServer(generate_arteris_dataset(scale, seed), seed=seed, **options).start()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor Frappe simulado com dados sintéticos do módulo Arteris.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplicador das quantidades de documentos.")
+    parser.add_argument("--seed", type=int, default=0, help="Semente dos dados e das falhas injetadas.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latência fixa por requisição (s).")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="Variação aleatória da latência (s).")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fração de requisições lentas.")
+    parser.add_argument("--slow-latency", type=float, default=5.0, help="Latência das requisições lentas (s).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de respostas 5xx.")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fração de respostas 429.")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After dos 429 (s).")
+    parser.add_argument("--token", default=None, help="Exige este cabeçalho Authorization.")
+    args = parser.parse_args(argv)
+
+    dataset = generate_arteris_dataset(args.scale, args.seed)
+    server = MockFrappeServer(
+        dataset, host=args.host, port=args.port, latency=args.latency, latency_jitter=args.latency_jitter,
+        slow_rate=args.slow_rate, slow_latency=args.slow_latency, error_rate=args.error_rate,
+        rate_429=args.rate_429, retry_after=args.retry_after, token=args.token, seed=args.seed)
+    total = sum(len(rows) for doctype, rows in dataset.items() if doctype not in ("DocType", "DocField"))
+    print(f"Servidor Frappe simulado com {total} registros em {server.base_url}")
+    print(f"Use ARTERIS_API_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Limitação de taxa no lado do cliente para a API Arteris.
+
+- TokenBucket: limita as requisições por segundo, permitindo rajadas curtas.
+- AdaptiveConcurrencyLimiter: limite de requisições simultâneas ajustado por
+  AIMD: começa no máximo, cai pela metade em 429/5xx/timeouts ou em picos de
+  latência e volta a crescer de forma aditiva enquanto a latência está estável.
+  A latência de base é separada por classe de requisição (ex: páginas da
+  listagem e documentos individuais), que têm durações muito diferentes.
+- RateLimiter: combina os dois; limiter_for() devolve uma instância
+  compartilhada por URL base, configurável via ARTERIS_API_RATE_LIMITS.
+
+O limitador é opcional no ArterisClient.from_env: é ativado com
+ARTERIS_API_RATE_LIMIT=1, ao definir ARTERIS_API_RATE ou quando
+ARTERIS_API_RATE_LIMITS tem uma entrada para a URL base (ou "*").
+"""
+
+import json
+import os
+import threading
+import time
+from urllib.parse import urlparse
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Valores padrão do controle adaptativo
+DEFAULT_MIN_CONCURRENCY = 1
+DEFAULT_MAX_CONCURRENCY = 64
+DEFAULT_LATENCY_TOLERANCE = 2.0
+DEFAULT_DECREASE_INTERVAL = 1.0
+# Peso das latências de pico na linha de base (menor que o das latências normais)
+SPIKE_BASELINE_WEIGHT = 0.05
+
+class TokenBucket:
+    """Token bucket thread-safe: `rate` fichas por segundo, até `burst` acumuladas."""
+
+    def __init__(self, rate, burst=None):
+        """
+        Args:
+            rate (float): Requisições por segundo.
+            burst (int, optional): Tamanho máximo da rajada (padrão: max(1, rate)).
+        """
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bloqueia até haver uma ficha disponível e a consome."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limite de concorrência AIMD (additive increase, multiplicative decrease).
+
+    A cada requisição bem-sucedida com latência dentro de `latency_tolerance`
+    vezes a linha de base da sua classe, o limite cresce 1/limite (cerca de +1 por "rodada"
+    de requisições). Em sobrecarga (429/5xx/timeout) ou pico de latência, o
+    limite cai pela metade, no máximo uma vez a cada `decrease_interval` segundos,
+    para que uma rajada de erros simultâneos não o derrube até o mínimo.
+
+    Os picos também atualizam a linha de base, com peso menor e limitados a
+    `latency_tolerance` vezes a base: se o servidor ficar mais lento de forma
+    permanente, a base acompanha e o limite volta a crescer.
+    """
+
+    def __init__(self, initial=None, min_limit=DEFAULT_MIN_CONCURRENCY,
+                 max_limit=DEFAULT_MAX_CONCURRENCY, latency_tolerance=DEFAULT_LATENCY_TOLERANCE,
+                 decrease_interval=DEFAULT_DECREASE_INTERVAL):
+        """
+        Args:
+            initial (int, optional): Limite inicial de requisições simultâneas (padrão: max_limit,
+                                     para não reduzir a concorrência antes de qualquer sobrecarga).
+            min_limit (int): Limite mínimo.
+            max_limit (int): Limite máximo.
+            latency_tolerance (float): Múltiplo da latência de base considerado pico.
+            decrease_interval (float): Intervalo mínimo em segundos entre reduções.
+        """
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        initial = self.max_limit if initial is None else initial
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.latency_tolerance = latency_tolerance
+        self.decrease_interval = decrease_interval
+        self.baselines = {} # classe da requisição -> média móvel (EWMA) das latências sem sobrecarga
+        self.in_flight = 0
+        self.increases = 0
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Bloqueia até haver vaga dentro do limite atual."""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency, overloaded=False, request_class=None):
+        """
+        Libera a vaga e ajusta o limite.
+
+        Args:
+            latency (float): Latência da requisição em segundos.
+            overloaded (bool): True para 429/5xx/timeout.
+            request_class (str, optional): Classe da requisição; o pico de latência é
+                comparado apenas com a linha de base da mesma classe.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            baseline = self.baselines.get(request_class)
+            spike = baseline is not None and latency > baseline * self.latency_tolerance
+            if spike:
+                sample = baseline * self.latency_tolerance
+                self.baselines[request_class] = (1 - SPIKE_BASELINE_WEIGHT) * baseline + SPIKE_BASELINE_WEIGHT * sample
+            if overloaded or spike:
+                now = time.monotonic()
+                if now - self._last_decrease >= self.decrease_interval:
+                    self._last_decrease = now
+                    self.limit = max(float(self.min_limit), self.limit / 2)
+                    self.decreases += 1
+            else:
+                self.baselines[request_class] = latency if baseline is None else 0.9 * baseline + 0.1 * latency
+                if self.limit < self.max_limit:
+                    self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+                    self.increases += 1
+            self._cond.notify_all()
+
+class RateLimiter:
+    """Token bucket opcional + limite de concorrência adaptativo para uma URL base."""
+
+    def __init__(self, rate=None, burst=None, initial_concurrency=None,
+                 min_concurrency=DEFAULT_MIN_CONCURRENCY, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 latency_tolerance=DEFAULT_LATENCY_TOLERANCE):
+        """
+        Args:
+            rate (float, optional): Requisições por segundo (None para não limitar a taxa).
+            burst (int, optional): Rajada máxima do token bucket.
+            initial_concurrency (int, optional): Limite inicial de requisições simultâneas
+                                                 (padrão: max_concurrency).
+            min_concurrency (int): Limite mínimo de requisições simultâneas.
+            max_concurrency (int): Limite máximo de requisições simultâneas.
+            latency_tolerance (float): Múltiplo da latência de base considerado pico.
+        """
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.concurrency = AdaptiveConcurrencyLimiter(
+            initial=initial_concurrency, min_limit=min_concurrency,
+            max_limit=max_concurrency, latency_tolerance=latency_tolerance)
+
+    def acquire(self):
+        """Aguarda uma vaga de concorrência e uma ficha do token bucket."""
+        self.concurrency.acquire()
+        if self.bucket is not None:
+            self.bucket.acquire()
+
+    def release(self, latency, overloaded=False, request_class=None):
+        self.concurrency.release(latency, overloaded, request_class)
+
+    def summary(self):
+        """
+        Returns:
+            dict: limit (atual), increases, decreases e baselines ({classe: latência de base em s}).
+        """
+        return {
+            "limit": int(self.concurrency.limit),
+            "increases": self.concurrency.increases,
+            "decreases": self.concurrency.decreases,
+            "baselines": dict(self.concurrency.baselines),
+        }
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def _base_key(api_base_url):
+    parsed = urlparse(api_base_url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+def load_rate_limit_config():
+    """
+    Lê a configuração por URL base da variável ARTERIS_API_RATE_LIMITS.
+
+    Formato: JSON {"https://host": {"rate": 20, "burst": 40, "max_concurrency": 16}, ...};
+    a chave "*" vale para URLs sem configuração própria.
+
+    Returns:
+        dict: {url_base: kwargs de RateLimiter}.
+    """
+    raw = os.getenv("ARTERIS_API_RATE_LIMITS")
+    if not raw:
+        return {}
+    try:
+        config = json.loads(raw)
+    except json.JSONDecodeError:
+        logger.error("Erro: ARTERIS_API_RATE_LIMITS não é um JSON válido; usando os limites padrão.")
+        return {}
+    return {(key if key == "*" else _base_key(key)): value for key, value in config.items()}
+
+def has_rate_limit_config(api_base_url, config=None):
+    """
+    Indica se ARTERIS_API_RATE_LIMITS (ou `config`) tem uma entrada para a URL base ou "*".
+
+    Args:
+        api_base_url (str): URL base da API.
+        config (dict, optional): Configuração por URL base (padrão: load_rate_limit_config()).
+
+    Returns:
+        bool: True se há configuração aplicável à URL.
+    """
+    config = load_rate_limit_config() if config is None else config
+    return _base_key(api_base_url) in config or "*" in config
+
+def limiter_for(api_base_url, config=None, **defaults):
+    """
+    Retorna o RateLimiter compartilhado da URL base (scheme://host) informada.
+
+    Clientes diferentes para o mesmo servidor dividem o mesmo limitador, então
+    o limite adaptativo reflete a carga total enviada a ele.
+
+    Args:
+        api_base_url (str): URL base da API.
+        config (dict, optional): Configuração por URL base (padrão: load_rate_limit_config()).
+        **defaults: Valores usados quando a URL não tem configuração própria.
+
+    Returns:
+        RateLimiter: O limitador da URL base.
+    """
+    key = _base_key(api_base_url)
+    with _limiters_lock:
+        if key not in _limiters:
+            config = load_rate_limit_config() if config is None else config
+            settings = dict(defaults)
+            settings.update(config.get(key, config.get("*", {})))
+            _limiters[key] = RateLimiter(**settings)
+        return _limiters[key]
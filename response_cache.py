@@ -0,0 +1,261 @@
+"""
+Cache local (SQLite) das respostas GET da API Arteris.
+
+Cada resposta 200 é guardada pela URL completa (incluindo os parâmetros) com
+seus validadores (ETag / Last-Modified). Na próxima requisição:
+- se houver validadores, o GET é condicional (If-None-Match / If-Modified-Since)
+  e um 304 devolve o corpo do cache;
+- se não houver, a entrada é usada enquanto a idade não passar do TTL;
+- no modo offline, nenhuma requisição é feita e apenas o cache é consultado.
+
+Respostas lidas em streaming (stream=True, como as listagens) não são lidas
+inteiras para o cache: os blocos são copiados para um arquivo à medida que o
+consumidor os decodifica (ver store_streaming), e uma entrada assim é entregue
+de volta também em streaming, lida do arquivo. O corpo só é guardado se o
+stream for lido até o fim (o restante depois do array de dados é lido no
+close, se for pequeno); um consumidor que para no meio não gera entrada.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+# Valores padrão do cache
+DEFAULT_RESPONSE_CACHE_PATH = os.path.join("output", "response_cache.sqlite")
+DEFAULT_RESPONSE_TTL_SECONDS = 24 * 3600
+
+# Cabeçalhos da resposta guardados junto com o corpo
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+# Bytes lidos no close de uma resposta em streaming para completar o corpo no cache
+STREAM_TAIL_BYTES = 64 * 1024
+
+class ResponseCache:
+    """Cache de respostas GET em disco, com revalidação condicional e TTL."""
+
+    def __init__(self, path=DEFAULT_RESPONSE_CACHE_PATH, ttl_seconds=DEFAULT_RESPONSE_TTL_SECONDS,
+                 offline=False):
+        """
+        Args:
+            path (str): Caminho do arquivo SQLite.
+            ttl_seconds (float or None): Idade máxima de uma entrada sem validadores;
+                None faz essas entradas valerem para sempre.
+            offline (bool): Se True, responde apenas com o cache, sem acessar a API.
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.offline = offline
+        self._lock = threading.Lock()
+        self.counts = {"hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "offline_misses": 0}
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " url TEXT NOT NULL,"
+                " headers TEXT NOT NULL,"
+                " body BLOB NOT NULL,"
+                " stored_at REAL NOT NULL)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(responses)")}
+            if "body_file" not in columns: # Caches criados antes das respostas em streaming
+                conn.execute("ALTER TABLE responses ADD COLUMN body_file TEXT")
+        self.body_dir = f"{path}.bodies" # Corpos das respostas em streaming
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # Uma conexão por operação: o cache é usado pelas threads do executor
+        # (confirmada ou desfeita ao sair do bloco e sempre fechada)
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def count(self, name):
+        """Incrementa um dos contadores de self.counts."""
+        with self._lock:
+            self.counts[name] += 1
+
+    @staticmethod
+    def request_url(url, params=None):
+        """Monta a URL final (com a query string) usada como chave do cache."""
+        return requests.Request("GET", url, params=params).prepare().url
+
+    @staticmethod
+    def _key(full_url):
+        return hashlib.sha256(full_url.encode("utf-8")).hexdigest()
+
+    def lookup(self, full_url):
+        """
+        Busca uma entrada do cache.
+
+        Args:
+            full_url (str): URL retornada por request_url.
+
+        Returns:
+            dict or None: {"headers", "body", "body_file", "stored_at"}, ou None se não houver entrada.
+                          body_file é o arquivo do corpo de uma resposta guardada em streaming.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT headers, body, body_file, stored_at FROM responses WHERE key = ?", (self._key(full_url),)
+            ).fetchone()
+        if row is None:
+            return None
+        headers, body, body_file, stored_at = row
+        if body_file:
+            body_file = os.path.join(self.body_dir, body_file)
+            if not os.path.exists(body_file):
+                return None
+        return {"headers": json.loads(headers), "body": bytes(body), "body_file": body_file, "stored_at": stored_at}
+
+    def is_fresh(self, entry):
+        """Entradas sem validadores valem até o TTL; as demais são sempre revalidadas."""
+        if entry["headers"].get("ETag") or entry["headers"].get("Last-Modified"):
+            return False
+        return self.ttl_seconds is None or time.time() - entry["stored_at"] <= self.ttl_seconds
+
+    @staticmethod
+    def conditional_headers(entry):
+        """Cabeçalhos If-None-Match / If-Modified-Since para revalidar a entrada."""
+        headers = {}
+        if entry["headers"].get("ETag"):
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        if entry["headers"].get("Last-Modified"):
+            headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        return headers
+
+    def store(self, full_url, response):
+        """Guarda o corpo e os validadores de uma resposta 200."""
+        key = self._key(full_url)
+        self._insert(key, full_url, response, sqlite3.Binary(response.content), None)
+        body_file = os.path.join(self.body_dir, key)
+        if os.path.exists(body_file): # Entrada anterior guardada em streaming
+            os.remove(body_file)
+
+    def _insert(self, key, full_url, response, body, body_file):
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, url, headers, body, body_file, stored_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, full_url, json.dumps(headers), body, body_file, time.time()),
+            )
+        self.count("stored")
+
+    def store_streaming(self, full_url, response):
+        """
+        Prepara uma resposta 200 lida em streaming para ser guardada sem lê-la inteira.
+
+        Os blocos entregues por response.iter_content são copiados para um arquivo
+        temporário; no response.close(), se o corpo foi lido até o fim, o arquivo
+        passa a ser o corpo da entrada. A cópia em disco custa uma escrita por
+        bloco, mas a memória continua limitada ao bloco atual.
+
+        Returns:
+            requests.Response: A própria resposta, com iter_content e close substituídos.
+        """
+        key = self._key(full_url)
+        if not os.path.exists(self.body_dir):
+            os.makedirs(self.body_dir, exist_ok=True)
+        final_path = os.path.join(self.body_dir, key)
+        temp_path = f"{final_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        body = open(temp_path, "wb")
+        state = {"chunks": None, "complete": False}
+        original_iter_content = response.iter_content
+        original_close = response.close
+
+        def write(chunk):
+            body.write(chunk if isinstance(chunk, bytes) else chunk.encode(response.encoding or "utf-8"))
+
+        def iter_content(chunk_size=1, decode_unicode=False):
+            chunks = original_iter_content(chunk_size=chunk_size, decode_unicode=decode_unicode)
+            state["chunks"] = chunks
+            for chunk in chunks:
+                write(chunk)
+                yield chunk
+            state["complete"] = True
+
+        def close():
+            try:
+                if not body.closed and not state["complete"] and state["chunks"] is not None:
+                    # O decodificador não lê o que vem depois do array de dados: completa o corpo se o resto for pequeno
+                    tail = 0
+                    for chunk in state["chunks"]:
+                        write(chunk)
+                        tail += len(chunk)
+                        if tail > STREAM_TAIL_BYTES:
+                            break
+                    else:
+                        state["complete"] = True
+            except requests.exceptions.RequestException:
+                state["complete"] = False
+            finally:
+                original_close()
+                if not body.closed:
+                    body.close()
+                    if state["complete"]:
+                        os.replace(temp_path, final_path)
+                        self._insert(key, full_url, response, sqlite3.Binary(b""), key)
+                    else:
+                        os.remove(temp_path)
+
+        response.iter_content = iter_content
+        response.close = close
+        return response
+
+    def touch(self, full_url):
+        """Renova o instante de uma entrada confirmada por um 304."""
+        with self._connect() as conn:
+            conn.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), self._key(full_url)))
+
+    @staticmethod
+    def to_response(full_url, entry, status_code=200, stream=False):
+        """
+        Recria um requests.Response a partir de uma entrada do cache.
+
+        Com stream=True, o corpo guardado em arquivo é lido sob demanda
+        (response.iter_content), como em uma resposta da rede.
+        """
+        response = requests.Response()
+        response.status_code = status_code
+        response.url = full_url
+        response.headers.update(entry["headers"])
+        if entry.get("body_file") and stream:
+            response.raw = open(entry["body_file"], "rb")
+            response._content = False
+            response._content_consumed = False
+        elif entry.get("body_file"):
+            with open(entry["body_file"], "rb") as f:
+                response._content = f.read()
+            response._content_consumed = True
+        else:
+            response._content = entry["body"]
+            response._content_consumed = True
+        response.from_cache = True
+        return response
+
+    @staticmethod
+    def offline_miss(full_url):
+        """Resposta 504 usada no modo offline quando a URL não está no cache."""
+        response = requests.Response()
+        response.status_code = 504
+        response.reason = "Offline: resposta não encontrada no cache"
+        response.url = full_url
+        response._content = b""
+        response._content_consumed = True
+        return response
+
+    def summary(self):
+        with self._lock:
+            return dict(self.counts)
@@ -0,0 +1,213 @@
+"""
+Política de novas tentativas e circuit breaker para as requisições à API Arteris.
+
+- RetryPolicy: classifica falhas em retentáveis (timeouts, erros de conexão,
+  429 e 5xx) ou fatais (demais 4xx) e calcula a espera com backoff
+  exponencial e jitter, respeitando o cabeçalho Retry-After.
+- CircuitBreaker: acompanha a taxa de erro recente e, quando ela dispara,
+  pausa todas as requisições por um período antes de voltar a tentar.
+- RetryStats: contadores de tentativas, novas tentativas, desistências e pausas.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+import requests
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Valores padrão da política de novas tentativas
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+
+# Valores padrão do circuit breaker
+DEFAULT_BREAKER_WINDOW = 50
+DEFAULT_BREAKER_THRESHOLD = 0.5
+DEFAULT_BREAKER_MIN_REQUESTS = 20
+DEFAULT_BREAKER_COOLDOWN = 30.0
+
+# Status HTTP que indicam falha transitória do servidor
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+def parse_retry_after(value):
+    """
+    Converte o cabeçalho Retry-After em segundos.
+
+    Args:
+        value (str): Valor do cabeçalho (segundos ou data HTTP).
+
+    Returns:
+        float or None: Segundos de espera, ou None se o valor for inválido.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+class RetryStats:
+    """Contadores de novas tentativas, acumulados entre threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.retries = 0
+        self.give_ups = 0
+        self.fatal = 0
+        self.breaker_trips = 0
+        self.retries_by_reason = {}
+
+    def increment(self, counter, reason=None):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+            if counter == "retries" and reason is not None:
+                self.retries_by_reason[reason] = self.retries_by_reason.get(reason, 0) + 1
+
+    def summary(self):
+        """
+        Returns:
+            dict: attempts, retries, give_ups, fatal, breaker_trips e retries_by_reason.
+        """
+        with self._lock:
+            return {
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "give_ups": self.give_ups,
+                "fatal": self.fatal,
+                "breaker_trips": self.breaker_trips,
+                "retries_by_reason": dict(self.retries_by_reason),
+            }
+
+class RetryPolicy:
+    """Decide se uma falha deve ser repetida e quanto esperar antes da próxima tentativa."""
+
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES, backoff_base=DEFAULT_BACKOFF_BASE,
+                 backoff_max=DEFAULT_BACKOFF_MAX):
+        """
+        Args:
+            max_retries (int): Número máximo de novas tentativas após a primeira.
+            backoff_base (float): Espera base em segundos (dobra a cada tentativa).
+            backoff_max (float): Teto da espera em segundos.
+        """
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    @staticmethod
+    def classify(response=None, error=None):
+        """
+        Classifica o resultado de uma tentativa.
+
+        Args:
+            response (requests.Response, optional): Resposta recebida.
+            error (Exception, optional): Exceção levantada pela requisição.
+
+        Returns:
+            str or None: Motivo da falha retentável (ex: '429', '503', 'timeout',
+                'connection'), 'fatal' para falhas que não devem ser repetidas,
+                ou None para sucesso.
+        """
+        if error is not None:
+            if isinstance(error, requests.exceptions.Timeout):
+                return "timeout"
+            if isinstance(error, requests.exceptions.ConnectionError):
+                return "connection"
+            return "fatal"
+        if response.status_code in RETRYABLE_STATUS:
+            return str(response.status_code)
+        if response.status_code >= 400:
+            return "fatal"
+        return None
+
+    def delay(self, retry_number, response=None):
+        """
+        Calcula a espera antes da próxima tentativa (full jitter), respeitando Retry-After.
+
+        Args:
+            retry_number (int): Número da nova tentativa (1 para a primeira).
+            response (requests.Response, optional): Resposta com possível Retry-After.
+
+        Returns:
+            float: Segundos de espera.
+        """
+        cap = min(self.backoff_max, self.backoff_base * (2 ** (retry_number - 1)))
+        delay = random.uniform(0, cap)
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+class CircuitBreaker:
+    """
+    Pausa as requisições quando a taxa de erro recente ultrapassa um limite.
+
+    Considera as últimas `window` tentativas; se houver pelo menos `min_requests`
+    e a fração de falhas retentáveis for >= threshold, o circuito abre e todas as
+    threads aguardam `cooldown` segundos em before_request. Depois disso o
+    histórico é descartado e as requisições voltam a ser feitas.
+    """
+
+    def __init__(self, window=DEFAULT_BREAKER_WINDOW, threshold=DEFAULT_BREAKER_THRESHOLD,
+                 min_requests=DEFAULT_BREAKER_MIN_REQUESTS, cooldown=DEFAULT_BREAKER_COOLDOWN,
+                 stats=None):
+        """
+        Args:
+            window (int): Quantidade de tentativas recentes consideradas.
+            threshold (float): Fração de falhas (0 a 1) que abre o circuito.
+            min_requests (int): Mínimo de tentativas na janela antes de avaliar a taxa.
+            cooldown (float): Segundos de pausa quando o circuito abre.
+            stats (RetryStats, optional): Onde contar as aberturas do circuito.
+        """
+        self.threshold = threshold
+        self.min_requests = min_requests
+        self.cooldown = cooldown
+        self.stats = stats
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._open_until = 0.0
+
+    def before_request(self):
+        """Bloqueia enquanto o circuito estiver aberto."""
+        while True:
+            with self._lock:
+                remaining = self._open_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def record(self, failed):
+        """
+        Registra o resultado de uma tentativa e abre o circuito se necessário.
+
+        Args:
+            failed (bool): True se a tentativa teve uma falha retentável.
+        """
+        with self._lock:
+            if time.monotonic() < self._open_until:
+                return
+            self._outcomes.append(failed)
+            if len(self._outcomes) < self.min_requests:
+                return
+            error_rate = sum(self._outcomes) / len(self._outcomes)
+            if error_rate < self.threshold:
+                return
+            self._open_until = time.monotonic() + self.cooldown
+            self._outcomes.clear()
+        if self.stats is not None:
+            self.stats.increment("breaker_trips")
+        logger.warning("Taxa de erro da API em %.0f%%: pausando as requisições por %.0fs.",
+                       error_rate * 100, self.cooldown)
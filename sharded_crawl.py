@@ -0,0 +1,237 @@
+"""
+Crawl em shards de DocTypes grandes, usando o prefixo de tempo dos nomes UUIDv7.
+
+Os nomes dos documentos (ex: '01967343-b7d4-7e20-...') são UUIDv7: os 12
+primeiros dígitos hexadecimais são o timestamp em milissegundos, então a
+ordem dos nomes é a ordem de criação. O intervalo de tempo entre o menor e o
+maior nome de um DocType é dividido em faixas; cada faixa vira um filtro
+'name >= início' / 'name < fim' e é lida em lote por um processo separado,
+com seu próprio cliente HTTP. Os resultados são juntados na ordem das faixas,
+que é a ordem dos nomes, então a saída é determinística.
+"""
+
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import requests
+
+from arteris_client import ArterisClient
+from api_client_data import (
+    iter_doctype_data_bulk, get_table_fields, get_projected_fields, DEFAULT_PAGE_SIZE
+)
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Nome no formato UUIDv7 (versão 7 no 13º dígito hexadecimal)
+UUID7_PATTERN = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-7[0-9a-f]{3}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+def uuid7_timestamp(name):
+    """
+    Extrai o timestamp (ms) de um nome UUIDv7.
+
+    Returns:
+        int or None: O timestamp, ou None se o nome não for um UUIDv7.
+    """
+    if not name or not UUID7_PATTERN.match(name):
+        return None
+    return int(name[:8] + name[9:13], 16)
+
+def uuid7_prefix(timestamp_ms):
+    """Prefixo de nome UUIDv7 ('xxxxxxxx-xxxx') correspondente a um timestamp em ms."""
+    hex_value = f"{timestamp_ms:012x}"
+    return f"{hex_value[:8]}-{hex_value[8:]}"
+
+def split_name_range(first_name, last_name, shards):
+    """
+    Divide o intervalo de nomes UUIDv7 [first_name, last_name] em faixas de tempo iguais.
+
+    Args:
+        first_name (str): Menor nome do DocType.
+        last_name (str): Maior nome do DocType.
+        shards (int): Quantidade desejada de faixas.
+
+    Returns:
+        list: Tuplas (início, fim) de prefixos; None em uma ponta significa sem limite.
+              Com nomes que não são UUIDv7, retorna uma única faixa [(None, None)].
+    """
+    start, end = uuid7_timestamp(first_name), uuid7_timestamp(last_name)
+    if start is None or end is None or shards <= 1 or end <= start:
+        return [(None, None)]
+    shards = min(shards, end - start + 1)
+    step = (end - start + 1) / shards
+    bounds = [uuid7_prefix(start + int(round(step * i))) for i in range(1, shards)]
+    # As pontas ficam abertas para não perder nomes fora do padrão nas extremidades
+    lower = [None] + bounds
+    upper = bounds + [None]
+    return list(zip(lower, upper))
+
+def _range_filters(lower, upper):
+    filters = []
+    if lower is not None:
+        filters.append(["name", ">=", lower])
+    if upper is not None:
+        filters.append(["name", "<", upper])
+    return filters
+
+def get_name_bounds(client, doctype_name):
+    """
+    Busca o menor e o maior nome de um DocType (duas listagens de um registro).
+
+    Returns:
+        tuple or None: (menor, maior); (None, None) se o DocType estiver vazio;
+                       None em caso de erro na requisição.
+    """
+    bounds = []
+    try:
+        for order in ("asc", "desc"):
+            params = {
+                "fields": json.dumps(["name"]),
+                "order_by": f"name {order}",
+                "limit_page_length": 1
+            }
+            response = client.get(doctype_name, params=params)
+            response.raise_for_status() # Lança HTTPError para respostas 4xx/5xx
+            data = response.json().get("data", [])
+            bounds.append(data[0]["name"] if data else None)
+    except requests.exceptions.RequestException as e:
+        logger.error("Erro ao buscar o intervalo de nomes de %s: %s", doctype_name, e)
+        return None
+    except json.JSONDecodeError:
+        logger.error("Erro ao decodificar a resposta JSON do intervalo de nomes de %s.", doctype_name)
+        return None
+    return tuple(bounds)
+
+def fetch_name_range(client, doctype_name, doctypes_with_fields, lower, upper,
+                     page_size=DEFAULT_PAGE_SIZE, project_fields=False):
+    """
+    Lê em lote os documentos de uma faixa de nomes de um DocType.
+
+    Args:
+        client (ArterisClient): Cliente HTTP.
+        doctype_name (str): O nome do DocType.
+        doctypes_with_fields (dict): Metadados {doctype_name: fields}.
+        lower (str or None): Início da faixa (inclusivo).
+        upper (str or None): Fim da faixa (exclusivo).
+        page_size (int): Quantidade de registros por página.
+        project_fields (bool): Se True, pede apenas as colunas usadas pela estrutura hierárquica.
+
+    Returns:
+        list or None: Documentos {"doctype", "key", "data"} da faixa, em ordem de 'name',
+                      ou None em caso de erro.
+    """
+    table_fields = get_table_fields(doctypes_with_fields, doctype_name)
+    fields, child_fields = None, None
+    if project_fields:
+        fields = get_projected_fields(doctypes_with_fields, doctype_name)
+        child_fields = {
+            child_doctype: get_projected_fields(doctypes_with_fields, child_doctype, is_child=True)
+            for _, child_doctype in table_fields
+        }
+    try:
+        return list(iter_doctype_data_bulk(
+            client, doctype_name, table_fields, filters=_range_filters(lower, upper),
+            page_size=page_size, fields=fields, child_fields=child_fields))
+    except requests.exceptions.RequestException as e:
+        logger.error("Erro ao buscar a faixa [%s, %s) de %s: %s", lower, upper, doctype_name, e)
+        return None
+    except json.JSONDecodeError:
+        logger.error("Erro ao decodificar a resposta JSON da faixa [%s, %s) de %s.", lower, upper, doctype_name)
+        return None
+
+def crawl_shard(client_config, doctype_name, doctypes_with_fields, lower, upper,
+                page_size=DEFAULT_PAGE_SIZE, project_fields=False):
+    """
+    Executa fetch_name_range em um processo do pool, com um cliente próprio.
+
+    Args:
+        client_config (dict): Configuração do cliente (ArterisClient.config()).
+        Demais argumentos: ver fetch_name_range.
+
+    Returns:
+        list or None: Documentos da faixa, ou None em caso de erro.
+    """
+    with ArterisClient.from_config(client_config) as client:
+        return fetch_name_range(client, doctype_name, doctypes_with_fields, lower, upper,
+                                page_size, project_fields)
+
+def plan_name_ranges(client, doctype_names, shards, sharded_doctypes=None):
+    """
+    Define as faixas de nomes de cada DocType (ver split_name_range).
+
+    Args:
+        client (ArterisClient): Cliente usado para descobrir o menor e o maior nome.
+        doctype_names (list): DocTypes a planejar.
+        shards (int): Quantidade de faixas por DocType.
+        sharded_doctypes (list, optional): DocTypes divididos em faixas; os demais
+            ficam com uma única faixa (padrão: todos são divididos).
+
+    Returns:
+        dict: {doctype: [(início, fim), ...]}; lista vazia para DocTypes vazios.
+    """
+    plan = {}
+    for doctype_name in doctype_names:
+        doctype_shards = shards if sharded_doctypes is None or doctype_name in sharded_doctypes else 1
+        bounds = get_name_bounds(client, doctype_name) if doctype_shards > 1 else None
+        if bounds == (None, None):
+            plan[doctype_name] = [] # DocType vazio
+        elif bounds:
+            plan[doctype_name] = split_name_range(bounds[0], bounds[1], doctype_shards)
+        else:
+            plan[doctype_name] = [(None, None)]
+        if len(plan[doctype_name]) > 1:
+            logger.info("%s: %s faixas de %s a %s", doctype_name, len(plan[doctype_name]), bounds[0], bounds[1])
+    return plan
+
+def crawl_documents_sharded(client, all_doctypes, doctypes_with_fields, shards, processes=None,
+                            page_size=DEFAULT_PAGE_SIZE, project_fields=False, sharded_doctypes=None):
+    """
+    Busca os documentos em lote, dividindo cada DocType em faixas de nomes
+    processadas em paralelo por um pool de processos.
+
+    Args:
+        client (ArterisClient): Cliente usado para descobrir os intervalos e cuja
+                                configuração é repassada aos processos.
+        all_doctypes (list): DocTypes retornados por process_arteris_doctypes.
+        doctypes_with_fields (dict): Metadados {doctype_name: fields}.
+        shards (int): Quantidade de faixas por DocType.
+        processes (int, optional): Tamanho do pool (padrão: min(shards, núcleos)).
+        page_size (int): Quantidade de registros por página.
+        project_fields (bool): Se True, pede apenas as colunas usadas pela estrutura hierárquica.
+        sharded_doctypes (list, optional): DocTypes divididos em faixas; os demais são
+            lidos em uma única faixa (padrão: todos são divididos).
+
+    Returns:
+        list: all_doctype_data, na ordem de all_doctypes e, dentro de cada DocType, de 'name'.
+    """
+    logger.info("--- Carregando dados dos DocTypes em %s shards por DocType ---", shards)
+    doctype_names = [doctype.get("name") for doctype in all_doctypes if doctype.get("name")]
+    processes = processes or min(shards, os.cpu_count() or 1)
+    client_config = client.config()
+
+    plan = plan_name_ranges(client, doctype_names, shards, sharded_doctypes)
+
+    all_doctype_data = []
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = {
+            doctype_name: [
+                pool.submit(crawl_shard, client_config, doctype_name, doctypes_with_fields,
+                            lower, upper, page_size, project_fields)
+                for lower, upper in ranges
+            ]
+            for doctype_name, ranges in plan.items()
+        }
+        # Junta na ordem dos DocTypes e das faixas, independentemente da ordem de conclusão
+        for doctype_name in doctype_names:
+            results = [future.result() for future in futures[doctype_name]]
+            if any(result is None for result in results):
+                logger.error("Erro ao buscar dados em shards para %s.", doctype_name)
+                continue
+            documents = [document for result in results for document in result]
+            if not documents:
+                logger.warning("Aviso: Nenhum documento encontrado para o DocType %s.", doctype_name)
+            logger.info("%s documentos de '%s' recebidos em %s faixas.", len(documents), doctype_name, len(results))
+            all_doctype_data.extend(documents)
+    return all_doctype_data